@@ -1,44 +1,81 @@
 #!/bin/bash
 
-# File containing clipboard history
-history_file="$HOME/.local/state/sbdots/cliphist"
+# Clipboard history: a snapshot plus a journal of newer clips, see sbdots' clip_history.py
+state_dir="${XDG_STATE_HOME:-$HOME/.local/state}/sbdots"
+history_file="$state_dir/cliphist"
+journal_file="$state_dir/cliphist.journal"
+lock_file="$state_dir/cliphist.lock"
+blob_dir="$state_dir/clipblobs"
+db_file="$state_dir/cliphist.db" # With 'backend = sqlite' in sbdots' [clipboard] settings
+max_entries=50
 
 # Theme
 theme="$HOME/.config/rofi/dmenu.rasi"
 
 title="Clipboard History"
 
-# Rofi command
+# Rofi command, entries are '<id>\t<preview>', only the preview is shown
 rofi_cmd() {
-    rofi -theme-str 'textbox-prompt-colon {str: "";}' \
+    rofi -theme-str 'textbox-prompt-colon {str: "";}' \
         -theme-str 'window {width: 30%;}' \
         -theme "${theme}" \
         -p "$title" \
         -l 8 \
         -dmenu \
-        -markup-rows
+        -i \
+        -matching fuzzy \
+        -sort -sorting-method fzf \
+        -display-columns 2 \
+        -display-column-separator '\t'
 }
 
-# Load clipboard history and pass to rofi
-run_rofi() {
-    if [[ -f "$history_file" ]]; then
-        tac "$history_file" | rofi_cmd
-    else
-        echo "No clipboard history found." | rofi_cmd
-    fi
+# Menu prebuilt by the actions daemon, newest first
+daemon_menu() {
+    sbdots-actions clipboard menu 2>/dev/null
+}
+
+# Fallback when the daemon isn't running: read the index directly
+# Its lines are '<hash>\t<mime>\t<preview>', the payload is in "$blob_dir/<hash>"
+file_menu() {
+    flock -s "$lock_file" cat "$history_file" "$journal_file" 2>/dev/null |
+        tac | awk '!seen[$0]++' | head -n "$max_entries" |
+        awk -F '\t' 'NF == 3 { print $1 "\t" $3 }'
+}
+
+# Same, for the SQLite history
+db_menu() {
+    sqlite3 -readonly -separator $'\t' "$db_file" \
+        'SELECT hash, preview FROM clips ORDER BY id DESC' 2>/dev/null
 }
 
-# Copy the selected entry back to the clipboard
-copy_to_clipboard() {
-    selected="$1"
-    if [[ -n "$selected" ]]; then
-        echo -n "$selected" | wl-copy
-        notify-send -u low "Clipboard" "Copied to clipboard: $selected"
+db_mime() {
+    sqlite3 -readonly "$db_file" "SELECT mime FROM clips WHERE hash = '$1'" 2>/dev/null
+}
+
+restore() {
+    local id="$1" preview="$2"
+    if ! sbdots-actions clipboard restore "$id" 2>/dev/null | grep -q '"OK"'; then
+        # Fallback: ids from file_menu and db_menu are full hashes
+        [[ "$id" =~ ^[0-9a-f]{64}$ ]] || return 1
+        local mime
+        [[ -f "$db_file" ]] && mime="$(db_mime "$id")"
+        [[ -n "$mime" ]] || mime="$(awk -F '\t' -v h="$id" '$1 == h { print $2; exit }' "$history_file" "$journal_file" 2>/dev/null)"
+        [[ -n "$mime" && -f "$blob_dir/$id" ]] || return 1
+        wl-copy --type "$mime" <"$blob_dir/$id"
     fi
+    notify-send -u low "Clipboard" "Copied to clipboard: $preview"
 }
 
 # Main
-chosen="$(run_rofi)"
-if [[ -n "$chosen" ]]; then
-    copy_to_clipboard "$chosen"
+menu="$(daemon_menu)"
+if [[ -z "$menu" || "$menu" == Error:* ]]; then
+    menu=""
+    [[ -f "$db_file" ]] && command -v sqlite3 >/dev/null && menu="$(db_menu)"
+    [[ -n "$menu" ]] || menu="$(file_menu)"
+fi
+[[ -n "$menu" ]] || menu="No clipboard history found."
+
+chosen="$(printf '%s\n' "$menu" | rofi_cmd)"
+if [[ "$chosen" == *$'\t'* ]]; then
+    restore "${chosen%%$'\t'*}" "${chosen#*$'\t'}"
 fi
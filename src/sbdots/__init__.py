@@ -1,66 +1,22 @@
-from logging import getLogger
-from typing import Optional, Annotated
-from importlib.metadata import PackageNotFoundError, version
-import typer
+"""
+SBDots: the 'sbdots' command line and the library behind sbdotsctl, the
+actions and the daemons.
 
-from sbdots.lifecycle import SBDotsInitializer
-from sbdots.library.logger import setup_logging
+The 'sbdots' CLI lives in sbdots._cli and is only imported when one of its
+names is first accessed (PEP 562), so importing any sbdots module doesn't
+pay for typer and the installer.
+"""
 
+_CLI_NAMES = ("cli", "init", "get_sbdots_version", "version_callback")
 
-def get_sbdots_version() -> str:
-    """Get the current version of SBDots from metadata file."""
-    try:
-        return version("sbdots")
-    except PackageNotFoundError:
-        typer.echo("Warning: sbdots package metadata not found.")
-        return "unknown"
 
+def __getattr__(name: str):
+    if name in _CLI_NAMES:
+        from sbdots import _cli
 
-def version_callback(version: bool):
-    if version:
-        typer.echo(get_sbdots_version())
-        raise typer.Exit(0)
+        return getattr(_cli, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-cli = typer.Typer(add_completion=False)
-
-common_options = [
-    typer.Option(False, "--dry-run/--no-dry-run", help="Run without making changes"),
-    typer.Option(False, "--verbose/--no-verbose", help="Verbose output"),
-]
-
-
-@cli.callback(invoke_without_command=True, no_args_is_help=True)
-def _(
-    version: Annotated[
-        Optional[bool],
-        typer.Option(
-            "--version",
-            help="show version and exit",
-            callback=version_callback,
-            is_eager=True,
-        ),
-    ] = None,
-): ...
-
-
-@cli.command()
-def init(
-    dry_run: bool = common_options[0],
-    verbose: bool = common_options[1],
-):
-    """
-    Initialize sbdots for the current user
-    """
-    LOGGER_NAME = "SBDotsInitializer"
-
-    setup_logging(
-        LOGGER_NAME,
-        verbose=verbose,
-        use_rotating_file=True,
-        file_handling_mode="a",
-        log_file="SBDotsInstaller.log",
-    )
-    logger = getLogger(LOGGER_NAME)
-
-    SBDotsInitializer(dry_run=dry_run, logger=logger, verbose=verbose).install()
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_CLI_NAMES])
@@ -13,8 +13,14 @@ class BaseAction(ABC):
     - inherit BaseAction
     - implement main()
     - optionally implement stop()
+
+    Actions with 'latest_wins' set are superseded by newer requests for the
+    same action: the daemon calls stop() on the running instance and waits
+    for it to finish before starting the new one.
     """
 
+    latest_wins: bool = False
+
     def __init__(self, conn: socket.socket, *args: str):
         self.conn = conn
         self.args = args
@@ -31,6 +37,8 @@ class BaseAction(ABC):
     def stop(self) -> None:
         """
         Optional graceful shutdown hook for long-running actions.
+
+        May be called from another thread while main() is running.
         """
         pass
 
@@ -41,9 +49,20 @@ class BaseAction(ABC):
         if data is None:
             data = {}
 
+        self._sendall((json.dumps(data) + "\n").encode())
+
+    def send_text(self, text: str) -> None:
+        """
+        Send raw text to the client, i.e: a menu piped straight into rofi.
+        """
+        if text and not text.endswith("\n"):
+            text += "\n"
+
+        self._sendall(text.encode())
+
+    def _sendall(self, payload: bytes) -> None:
         try:
-            encoded = (json.dumps(data) + "\n").encode()
-            self.conn.sendall(encoded)
+            self.conn.sendall(payload)
 
         except BrokenPipeError:
             # except (BrokenPipeError, ConnectionResetError, OSError):
@@ -1,7 +1,6 @@
-from typing import Literal
-from subprocess import CalledProcessError
+from typing import Literal, Optional
 
-from sbdots.library.commands import check_output, run_command
+from sbdots.library.commands import check_output
 from sbdots.library.command import notify_send
 from ._base import BaseAction
 
@@ -29,8 +28,11 @@ class Brightness(BaseAction):
             )
             return
 
+        self.apply(delta, delta_value)
+
+    def apply(self, delta: str, delta_value: int) -> None:
         # Do nothing if brightness is already 100% and try to increase or 0% and try to decrese
-        curr = self.get_current()
+        curr = self.parse_percent(check_output(["brightnessctl", "-m"]))
         if (curr == 100 and delta == "up") or (curr == 0 and delta == "down"):
             return
 
@@ -67,24 +69,26 @@ class Brightness(BaseAction):
 
     def update(self, delta: Literal["-"] | Literal["+"], delta_value: int) -> None:
         try:
-            run_command(["brightnessctl", "set", f"{delta_value}%{delta}"], check=True)
-            self.notify(self.get_current())
-
-        except CalledProcessError as e:
-            self.send(
-                {
-                    "status": "Error",
-                    "command": e.cmd,
-                    "returncode": e.returncode,
-                    "stdout": e.stdout or "",
-                    "stderr": e.stderr or "",
-                }
+            # With '-m', 'set' prints the updated device line, no need to read it again
+            output = check_output(
+                ["brightnessctl", "-m", "set", f"{delta_value}%{delta}"]
             )
+            value = self.parse_percent(output)
+            if value is None:
+                value = self.parse_percent(check_output(["brightnessctl", "-m"]))
+            if value is not None:
+                self.notify(value)
 
-    def get_current(self) -> int:
-        # Cmd 'brightnessctl -m' returns something like this <amdgpu_bl1,backlight,49961,80%,62451>
-        # so, output will store ['amdgpu_bl1', 'backlight', '49961', '80%', '62451']
-        output: str = check_output(["brightnessctl", "-m"]).strip().split(",")
+        except RuntimeError as e:
+            self.send({"status": "Error", "stderr": str(e)})
 
-        # Return the 4th item with '%' removed
-        return int(output[3].strip("%"))
+    @staticmethod
+    def parse_percent(output: str) -> Optional[int]:
+        # Cmd 'brightnessctl -m' returns something like this <amdgpu_bl1,backlight,49961,80%,62451>
+        # so, fields will store ['amdgpu_bl1', 'backlight', '49961', '80%', '62451']
+        for line in output.splitlines():
+            fields = line.strip().split(",")
+            # Return the 4th item with '%' removed
+            if len(fields) == 5 and fields[3].endswith("%"):
+                return int(fields[3].strip("%"))
+        return None
@@ -0,0 +1,70 @@
+import logging
+import subprocess
+
+from sbdots.library import tracing
+from sbdots.library.clip_query import open_menu
+from sbdots.library.clip_store import blob_path
+from sbdots.library.logger import setup_actions_state
+from ._base import BaseAction
+
+setup_actions_state(__name__)
+logger = logging.getLogger(__name__)
+
+# Lives as long as the daemon, so the menu is only rebuilt when history changes
+MENU = open_menu(logger)
+
+
+class Clipboard(BaseAction):
+    """
+    Clipboard history for pickers.
+
+    Usage:
+        clipboard menu              newest first '<id>\\t<preview>' lines
+        clipboard search <query>    fuzzy matches, best first, same format
+        clipboard restore <id>      copy the entry back to the clipboard
+    """
+
+    def main(self) -> None:
+        command = self.args[0] if self.args else "menu"
+
+        if command == "menu":
+            self.send_text(MENU.menu())
+        elif command == "search":
+            query = " ".join(self.args[1:])
+            self.send_text(
+                "".join(MENU.render_line(r) + "\n" for r in MENU.search(query))
+            )
+        elif command == "restore" and len(self.args) == 2:
+            self.restore(self.args[1])
+        else:
+            self.send(
+                {
+                    "status": "Error",
+                    "stderr": f"expected 'menu', 'search <query>' or 'restore <id>', got {list(self.args)}",
+                }
+            )
+
+    def restore(self, clip_id: str) -> None:
+        record = MENU.get(clip_id)
+        if record is None:
+            self.send({"status": "Error", "stderr": f"no clipboard entry '{clip_id}'"})
+            return
+
+        try:
+            with open(blob_path(record.hash), "rb") as blob:
+                # wl-copy keeps serving the selection from a forked child, don't wait on its output
+                tracing.run(
+                    ["wl-copy", "--type", record.mime],
+                    stdin=blob,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=True,
+                    timeout=5,
+                )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"Failed to restore clipboard entry '{clip_id}': {e}")
+            self.send({"status": "Error", "stderr": str(e)})
+            return
+
+        logger.debug(f"Restored clipboard entry '{clip_id}' ({record.mime})")
+        self.send({"status": "OK", "id": clip_id, "preview": record.preview})
@@ -1,8 +1,9 @@
-import shutil
+import asyncio
 import logging
 
+from sbdots.library.exceptions import CommandNotFound
 from sbdots.library.logger import setup_actions_state
-from sbdots.library.commands import check_output
+from sbdots.library.commands import arun_command, resolve_executable
 from ._base import BaseAction
 
 setup_actions_state(__name__)
@@ -29,61 +30,56 @@ class GetAvailableUpdates(BaseAction):
         self.send(data)
 
     def _calculate_updates(self):
+        # Each check is a slow, mostly network bound command, run them all at once
+        pacman_updates, aur_updates, flatpak_updates = asyncio.run(
+            self._gather_updates()
+        )
+
         total_updates: int = 0
-        pacman_updates: str | int = self._get_pacman_updates()
-        total_updates += pacman_updates if isinstance(pacman_updates, int) else 0
+        for updates in (pacman_updates, aur_updates, flatpak_updates):
+            total_updates += updates if isinstance(updates, int) else 0
+
+        return total_updates, pacman_updates, aur_updates, flatpak_updates
 
-        aur_updates: str | int = self._get_aur_updates()
-        total_updates += aur_updates if isinstance(aur_updates, int) else 0
+    async def _gather_updates(self):
+        return await asyncio.gather(
+            self._get_pacman_updates(),
+            self._get_aur_updates(),
+            self._get_flatpak_updates(),
+        )
 
-        flatpak_updates: str | int = self._get_flatpak_updates()
-        total_updates += flatpak_updates if isinstance(flatpak_updates, int) else 0
+    async def _count_lines(self, command: list[str]) -> int:
+        """Count the output lines of 'command', 0 if it can't run"""
+        try:
+            # No check: i.e. 'checkupdates' exits with 2 when there are no updates
+            result = await arun_command(command)
+        except (CommandNotFound, RuntimeError) as e:
+            logger.warning(f"Failed to run {command[0]}: {e}")
+            return 0
 
-        return total_updates, pacman_updates, aur_updates, flatpak_updates
+        output = result.stdout.strip()
+        return len(output.split("\n")) if output else 0
 
-    def _get_pacman_updates(self):
-        if shutil.which("checkupdates"):
-            try:
-                pacman_updates_raw = check_output(
-                    ["checkupdates"],
-                ).strip()
-                return len(pacman_updates_raw.split("\n")) if pacman_updates_raw else 0
-            except FileNotFoundError:
-                return 0
+    async def _get_pacman_updates(self):
+        if resolve_executable("checkupdates"):
+            return await self._count_lines(["checkupdates"])
         else:
             return "'pacman-contrib' Not-installed"
 
-    def _get_aur_updates(self):
-        if shutil.which("yay") or shutil.which("paru"):
-            if shutil.which("aur-check-updates"):
-                try:
-                    aur_updates_raw = check_output(
-                        ["aur-check-updates"],
-                    ).strip()
-                    aur_updates = (
-                        len(aur_updates_raw.split("\n")) if aur_updates_raw else 0
-                    )
-                    return (
-                        aur_updates - 2
-                    )  # first 2 lines are aur-check-updates's stdout
-                except FileNotFoundError:
-                    return 0
+    async def _get_aur_updates(self):
+        if resolve_executable("yay") or resolve_executable("paru"):
+            if resolve_executable("aur-check-updates"):
+                aur_updates = await self._count_lines(["aur-check-updates"])
+                # first 2 lines are aur-check-updates's stdout
+                return max(0, aur_updates - 2)
             else:
                 return "'aur-check-updates' Not-installed"
         else:
             return "'yay' | 'paru' Not-installed"
 
-    def _get_flatpak_updates(self):
-        if shutil.which("flatpak"):
-            try:
-                flatpak_updates_raw = check_output(
-                    ["flatpak", "remote-ls", "--updates"],
-                ).strip()
-                return (
-                    len(flatpak_updates_raw.split("\n")) if flatpak_updates_raw else 0
-                )
-            except FileNotFoundError:
-                return 0
+    async def _get_flatpak_updates(self):
+        if resolve_executable("flatpak"):
+            return await self._count_lines(["flatpak", "remote-ls", "--updates"])
         else:
             return "'flatpak' Not-installed"
 
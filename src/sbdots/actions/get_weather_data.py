@@ -1,9 +1,8 @@
-import requests
 import logging
 from typing import Any
 
 from sbdots.library.logger import setup_actions_state
-from sbdots.library.config_utils import get_config, set_config
+from sbdots.library.config_utils import get_section, settings_transaction
 from sbdots.constants import WEATHER_ICONS, WEATHER_SECTION
 from ._base import BaseAction
 
@@ -15,22 +14,19 @@ class GetWeatherData(BaseAction):
     def _ensure_default_credentials(self) -> None:
         """Ensure default weather credentials exist in settings"""
         logger.debug("Creating default weather credentials in settings...")
-        set_config(
-            "api_key",
-            "your_api_key_here",
-            section=WEATHER_SECTION,
-            logger=logger,
-        )
-        set_config("latitude", "0.0", section=WEATHER_SECTION, logger=logger)
-        set_config("longitude", "0.0", section=WEATHER_SECTION, logger=logger)
+        with settings_transaction(logger) as settings:
+            settings.set("api_key", "your_api_key_here", section=WEATHER_SECTION)
+            settings.set("latitude", "0.0", section=WEATHER_SECTION)
+            settings.set("longitude", "0.0", section=WEATHER_SECTION)
 
     def get_user_credentials(self) -> Any:
         """Load weather credentials from settings"""
         logger.debug("Loading weather credentials from settings...")
 
-        api_key = get_config("api_key", section=WEATHER_SECTION, logger=logger)
-        latitude = get_config("latitude", section=WEATHER_SECTION, logger=logger)
-        longitude = get_config("longitude", section=WEATHER_SECTION, logger=logger)
+        settings = get_section(WEATHER_SECTION, logger=logger)
+        api_key = settings.get("api_key")
+        latitude = settings.get("latitude")
+        longitude = settings.get("longitude")
 
         # If credentials don't exist, create defaults
         if not api_key or not latitude or not longitude:
@@ -64,6 +60,9 @@ class GetWeatherData(BaseAction):
         latitude = self.user_credentials.get("latitude")
         longitude = self.user_credentials.get("longitude")
 
+        # Imported here, only needed once an API key is set
+        import requests
+
         url = f"http://api.weatherapi.com/v1/current.json?key={key}&q={latitude},{longitude}"
         try:
             response = requests.get(url, timeout=10)
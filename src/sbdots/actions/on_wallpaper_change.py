@@ -1,11 +1,26 @@
+import json
 import logging
+import os
+import signal
 import subprocess
 import shutil
+import threading
+import tomllib
 from pathlib import Path
 
+from sbdots.library import tracing
 from sbdots.library.logger import setup_actions_state
 from sbdots.library.fs_ops import path_lexists
-from sbdots.library.command import MatugenImage, notify_send
+from sbdots.library.command import MatugenImage, MatugenColor, notify_send
+from sbdots.library.palette_cache import load_palette, source_color, store_palette
+from sbdots.library.template_engine import (
+    TemplateSpec,
+    build_context,
+    load_matugen_config,
+    render_templates,
+)
+from sbdots.library.theme_reload import reload_changed
+from sbdots.library.exceptions import ConfigNotFound, TemplateError
 from sbdots.constants import SBDOTS_STATE_DIR
 from ._base import BaseAction
 
@@ -15,10 +30,88 @@ logger = logging.getLogger(__name__)
 
 
 class OnWallpaperChange(BaseAction):
+    # A newer wallpaper cancels the pipeline of the previous one
+    latest_wins = True
+
+    def __init__(self, conn, *args: str):
+        super().__init__(conn, *args)
+        self._cancelled = threading.Event()
+        self._proc_lock = threading.Lock()
+        # Running children, with their start time for tracing
+        self._children: dict[subprocess.Popen, float] = {}
+
+    def stop(self) -> None:
+        """Cancel the pipeline: kill the running matugen and post-hook processes."""
+        self._cancelled.set()
+
+        with self._proc_lock:
+            procs = list(self._children)
+
+        for proc in procs:
+            self._kill_child(proc)
+
+    def _kill_child(self, proc: subprocess.Popen) -> None:
+        if proc.poll() is not None:
+            return
+
+        # Children run in their own session, so this also reaches anything they spawned
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            logger.debug(f"Killed process group {proc.pid}")
+        except ProcessLookupError:
+            pass
+        except PermissionError as e:
+            logger.warning(f"Unable to kill process group {proc.pid}: {e}")
+
+    def _is_cancelled(self, step: str) -> bool:
+        """Return True, and report it, if a newer wallpaper superseded this one."""
+        if not self._cancelled.is_set():
+            return False
+
+        logger.info(f"Superseded by a newer wallpaper, cancelled at: {step}")
+        self.send({"status": "Cancelled", "wallpaper": str(self.wallpaper_path)})
+        return True
+
+    def _release(self, proc: subprocess.Popen) -> None:
+        with self._proc_lock:
+            started = self._children.pop(proc, None)
+
+        if started is not None:
+            tracing.record(
+                tracing.command_name(proc.args),
+                started,
+                args={"argv": proc.args, "returncode": proc.returncode},
+            )
+
+    def _communicate(self, proc: subprocess.Popen) -> tuple[str, str]:
+        """Wait for a child started by _spawn(), and unregister it."""
+        try:
+            return proc.communicate()
+        finally:
+            self._release(proc)
+
+    def _spawn(self, cmd: list[str] | str, shell: bool = False) -> subprocess.Popen:
+        """Start a cancellable child process, stop() kills its process group."""
+        with self._proc_lock:
+            proc = subprocess.Popen(
+                cmd,
+                shell=shell,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                start_new_session=True,
+            )
+            self._children[proc] = tracing.now_us()
+
+        # stop() may have raced with the spawn
+        if self._cancelled.is_set():
+            self._kill_child(proc)
+        return proc
+
     def _run_command(self, cmd) -> bool:
         """Run a shell command and return True on success, False on failure."""
         try:
-            subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
+            tracing.run(cmd, shell=True, check=True, capture_output=True, text=True)
             return True
         except subprocess.CalledProcessError as e:
             logger.error(
@@ -48,6 +141,103 @@ class OnWallpaperChange(BaseAction):
             icon="sbdots",
         )
 
+    def _build_matugen_command(
+        self, options: dict[str, str], palette: dict | None
+    ) -> list[str]:
+        """
+        Build the full matugen command for the wallpaper.
+
+        Uses 'matugen color' with the source color when the wallpaper's
+        palette is known, 'matugen image' otherwise.
+        """
+        color = source_color(palette, options["mode"]) if palette else None
+        if color:
+            logger.debug(f"Using known palette, source color: {color}")
+            return MatugenColor(logger)._build_command(color, options=options)
+
+        return MatugenImage(logger)._build_command(
+            image_path=self.wallpaper_path, json_format="hex", options=options
+        )
+
+    def _load_palette(
+        self, matugen_stdout: str, options: dict[str, str]
+    ) -> dict | None:
+        """Parse matugen's json output and cache it for the next selection."""
+        try:
+            palette = json.loads(matugen_stdout)
+        except ValueError as e:
+            logger.warning(f"Invalid json from matugen: {e}")
+            return None
+
+        try:
+            store_palette(self.wallpaper_path, options, palette)
+            logger.debug(f"Cached palette for {self.wallpaper_path}")
+        except OSError as e:
+            logger.warning(f"Unable to cache palette for {self.wallpaper_path}: {e}")
+        return palette
+
+    def _render_templates(self, palette: dict | None, options: dict[str, str]) -> bool:
+        """
+        Render matugen's templates in-process and reload apps whose output changed.
+
+        Returns False if the templates can't be rendered in-process,
+        in which case matugen has to apply them itself.
+        """
+        if palette is None:
+            return False
+
+        try:
+            context = build_context(
+                palette, options["mode"], image=str(self.wallpaper_path)
+            )
+            result = render_templates(load_matugen_config(), context, logger=logger)
+        except (TemplateError, ConfigNotFound, tomllib.TOMLDecodeError) as e:
+            logger.warning(f"Unable to render templates in-process: {e}")
+            return False
+
+        logger.info(
+            f"Rendered templates, changed: {[spec.name for spec in result.changed]}, "
+            f"unchanged: {len(result.unchanged)}, failed: {list(result.failed)}"
+        )
+
+        if self._cancelled.is_set():
+            return True
+
+        reload_changed(result.changed, context, run_hook=self._run_hook, logger=logger)
+        return True
+
+    def _run_hook(self, spec: TemplateSpec, hook: str) -> None:
+        """Run a post-hook that has no in-process equivalent."""
+        if self._cancelled.is_set():
+            return
+
+        proc = self._spawn(hook, shell=True)
+        stdout, stderr = self._communicate(proc)
+        if proc.returncode != 0 and not self._cancelled.is_set():
+            raise RuntimeError(
+                f"Post-hook <{hook}> failed\nstderr: {stderr}\nstdout: {stdout}"
+            )
+
+    def _run_matugen(self, options: dict[str, str], palette: dict | None) -> None:
+        """Fallback: let matugen generate colors and apply its templates itself."""
+        cmd = self._build_matugen_command(options, palette)
+        self.send({"cmd": cmd})
+
+        matugen_proc = self._spawn(cmd)
+        matugen_stdout, matugen_stderr = self._communicate(matugen_proc)
+        if self._cancelled.is_set():
+            return
+
+        if matugen_proc.returncode != 0:
+            msg = f"Matugen operation failed\nstdout: {matugen_stdout}\nstderr: {matugen_stderr}"
+            logger.error(msg)
+            self.send({"error": msg})
+            self._notify_action_failed()
+
+        logger.debug("Matugen operation completed successfully")
+        if palette is None:
+            self._load_palette(matugen_stdout, options)
+
     def main(self):
         # Validate args
         if len(self.args) < 1:
@@ -61,27 +251,38 @@ class OnWallpaperChange(BaseAction):
             logger.error(f"Invalid wallpaper path: {self.wallpaper_path}")
             self._notify_action_failed()
 
+        if self._is_cancelled("start"):
+            return
+
+        matugen_proc = None
         try:
             self._notify_progress(
                 text="Executing post wallpaper change scripts.", progress=0
             )
 
-            # Step: 1 - start matugen color generation
-            self._notify_progress(text="Generating matugen colors...", progress=60)
+            matugen = MatugenImage(logger)
+            options = matugen.get_options()
+            palette = load_palette(self.wallpaper_path, options)
 
-            cmd = MatugenImage(logger)._build_command(image_path=self.wallpaper_path)
-            self.send({"cmd": cmd})
-            matugen_proc = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
+            # Step: 1 - start matugen color extraction, unless pre-generated
+            if palette is None:
+                self._notify_progress(text="Generating matugen colors...", progress=30)
 
-            logger.debug("Started generating matugen colors")
+                cmd = matugen._build_export_command(
+                    self.wallpaper_path, json_format="hex", options=options
+                )
+                self.send({"cmd": cmd})
+                matugen_proc = self._spawn(cmd)
+
+                logger.debug("Started generating matugen colors")
+            else:
+                logger.debug(f"Using cached palette for {self.wallpaper_path}")
 
             # Step: 2 - cache wallpaper
-            self._notify_progress(text="Updating cached wallpaper...", progress=30)
+            if self._is_cancelled("cache wallpaper"):
+                return
+
+            self._notify_progress(text="Updating cached wallpaper...", progress=50)
 
             cached_wallpaper = Path.home() / ".cache" / "current.wall"
             cached_wallpaper.parent.mkdir(parents=True, exist_ok=True)
@@ -94,17 +295,29 @@ class OnWallpaperChange(BaseAction):
             logger.debug(f"Copied wallpaper to cache: {cached_wallpaper}")
 
             # Step: 3 - wait for matugen
-            self._notify_progress(
-                text="Waiting for matugen to finish generating colors...", progress=90
-            )
-            matugen_stdout, matugen_stderr = matugen_proc.communicate()
-            if matugen_proc.returncode != 0:
-                msg = f"Matugen operation failed\nstdout: {matugen_stdout}\nstderr: {matugen_stderr}"
-                logger.error(msg)
-                self.send({"error": msg})
-                self._notify_action_failed()
+            if matugen_proc is not None:
+                self._notify_progress(
+                    text="Waiting for matugen to finish generating colors...",
+                    progress=70,
+                )
+                matugen_stdout, matugen_stderr = self._communicate(matugen_proc)
+                if self._is_cancelled("matugen"):
+                    return
 
-            logger.debug("Matugen operation completed successfully")
+                if matugen_proc.returncode == 0:
+                    palette = self._load_palette(matugen_stdout, options)
+                else:
+                    logger.warning(
+                        f"Matugen color extraction failed\nstdout: {matugen_stdout}\nstderr: {matugen_stderr}"
+                    )
+
+            # Step: 4 - apply templates, through matugen if they can't be rendered here
+            self._notify_progress(text="Applying colors...", progress=90)
+            if not self._render_templates(palette, options):
+                self._run_matugen(options, palette)
+
+            if self._is_cancelled("apply templates"):
+                return
 
             # Final success notification
             self._notify_progress(
@@ -117,3 +330,9 @@ class OnWallpaperChange(BaseAction):
             logger.exception("Unexpected error:")
             self.send({"error": str(e)})
             self._notify_action_failed()
+
+        finally:
+            # Cancelled or failed before waiting for matugen: reap it here
+            if matugen_proc is not None and matugen_proc.returncode is None:
+                self._kill_child(matugen_proc)
+                self._communicate(matugen_proc)
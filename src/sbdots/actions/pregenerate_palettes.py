@@ -0,0 +1,34 @@
+import logging
+
+from sbdots.library.logger import setup_actions_state
+from sbdots.library.palette_cache import pregenerate
+from ._base import BaseAction
+
+setup_actions_state(__name__)
+logger = logging.getLogger(__name__)
+
+
+class PregeneratePalettes(BaseAction):
+    """
+    Low priority background job: cache matugen palettes for every wallpaper
+    so selecting one later can skip color extraction.
+    """
+
+    def main(self) -> None:
+        force = "--force" in self.args
+
+        try:
+            result = pregenerate(force=force, logger=logger)
+        except Exception as e:
+            logger.exception("Palette pre-generation failed:")
+            self.send({"status": "Error", "stderr": str(e)})
+            return
+
+        self.send(
+            {
+                "status": "OK",
+                "generated": len(result.generated),
+                "skipped": len(result.skipped),
+                "failed": len(result.failed),
+            }
+        )
@@ -1,10 +1,12 @@
-from typing import Literal
-from subprocess import CalledProcessError
+import re
+from typing import Literal, Optional
 
 from sbdots.library.commands import check_output, run_command
 from sbdots.library.command import notify_send
 from ._base import BaseAction
 
+SINK = "@DEFAULT_AUDIO_SINK@"
+
 
 class Volume(BaseAction):
     def main(self) -> None:
@@ -31,13 +33,18 @@ class Volume(BaseAction):
                 )
                 return
 
+        self.apply(delta, None if delta == "toggle" else delta_value)
+
+    def apply(self, delta: str, delta_value: Optional[int]) -> None:
         # Do nothing if volume is already 100% and try to increase or 0% and try to decrease
-        curr = self.get_current()
+        curr, _ = self.get_state()
         if (curr == 100 and delta == "up") or (curr == 0 and delta == "down"):
             return
 
         if delta == "toggle":
             self.toggle_mute()
+        elif delta_value is None:
+            self.send({"status": "Error", "stderr": f"expected <int> for '{delta}'"})
         elif delta == "down":
             self.update("-", delta_value)
         elif delta == "up":
@@ -51,10 +58,7 @@ class Volume(BaseAction):
             )
             return
 
-    def notify(self, value: int) -> None:
-        # Check if muted
-        is_muted = self.is_muted()
-
+    def notify(self, value: int, is_muted: bool) -> None:
         if is_muted:
             icon = "󰝟"  # muted icon
         else:
@@ -74,72 +78,44 @@ class Volume(BaseAction):
             sync_tag="volume-notification",
         )
 
-    def update(self, delta: Literal["-"] | Literal["+"], delta_value: int) -> None:
-        try:
-            if delta == "+":
-                run_command(
-                    [
-                        "wpctl",
-                        "set-volume",
-                        "-l",
-                        "1",
-                        "@DEFAULT_AUDIO_SINK@",
-                        f"{delta_value}%+",
-                    ],
-                    check=True,
-                )
-                self.notify(self.get_current())
-            else:  # delta == "-"
-                run_command(
-                    ["wpctl", "set-volume", "@DEFAULT_AUDIO_SINK@", f"{delta_value}%-"],
-                    check=True,
-                )
-                self.notify(self.get_current())
-
-        except CalledProcessError as e:
-            self.send(
-                {
-                    "status": "Error",
-                    "command": e.cmd,
-                    "returncode": e.returncode,
-                    "stdout": e.stdout or "",
-                    "stderr": e.stderr or "",
-                }
-            )
-
-    def get_current(self) -> int:
-        # Get current volume from wpctl
-        output: str = check_output(["wpctl", "get-volume", "@DEFAULT_AUDIO_SINK@"])
+    def send_error(self, e: RuntimeError) -> None:
+        self.send({"status": "Error", "stderr": str(e)})
 
-        # Parse volume (e.g., "Volume: 0.64" or "Volume: 0.64 [MUTED]")
-        import re
+    def update(self, delta: Literal["-"] | Literal["+"], delta_value: int) -> None:
+        if delta == "+":
+            cmd = ["wpctl", "set-volume", "-l", "1", SINK, f"{delta_value}%+"]
+        else:  # delta == "-"
+            cmd = ["wpctl", "set-volume", SINK, f"{delta_value}%-"]
 
+        try:
+            run_command(cmd, check=True)
+            self.notify(*self.get_state())
+        except RuntimeError as e:
+            self.send_error(e)
+
+    def get_state(self) -> tuple[int, bool]:
+        """
+        Return the default sink's volume (0-100) and whether it's muted,
+        both from a single 'wpctl get-volume' call.
+        """
+        # e.g: "Volume: 0.64" or "Volume: 0.64 [MUTED]"
+        output = check_output(["wpctl", "get-volume", SINK])
+
+        volume = 0
         match = re.search(r"Volume:\s+([\d.]+)", output)
         if match:
             # Convert from decimal (0.00-1.00) to percentage (0-100)
-            volume_decimal = float(match.group(1))
-            return min(100, max(0, round(volume_decimal * 100)))
-
-        return 0
+            volume = min(100, max(0, round(float(match.group(1)) * 100)))
 
-    def is_muted(self) -> bool:
-        """Check if the default audio sink is muted"""
-        try:
-            output: str = check_output(["wpctl", "get-volume", "@DEFAULT_AUDIO_SINK@"])
-            return "[MUTED]" in output
-        except CalledProcessError:
-            return False
+        return volume, "[MUTED]" in output
 
     def toggle_mute(self) -> None:
         """Toggle mute state"""
         try:
-            run_command(
-                ["wpctl", "set-mute", "@DEFAULT_AUDIO_SINK@", "toggle"], check=True
-            )
+            run_command(["wpctl", "set-mute", SINK, "toggle"], check=True)
 
             # Send notification for mute/unmute
-            is_muted = self.is_muted()
-            current_vol = self.get_current()
+            current_vol, is_muted = self.get_state()
 
             if is_muted:
                 icon = "󰝟"
@@ -155,13 +131,5 @@ class Volume(BaseAction):
                 sync_tag="volume-notification",
             )
 
-        except CalledProcessError as e:
-            self.send(
-                {
-                    "status": "Error",
-                    "command": e.cmd,
-                    "returncode": e.returncode,
-                    "stdout": e.stdout or "",
-                    "stderr": e.stderr or "",
-                }
-            )
+        except RuntimeError as e:
+            self.send_error(e)
@@ -29,9 +29,14 @@ SBDOTS_STATE_DIR = (
 SBDOTS_DOTFILES_DIR = SBDOTS_DATA_DIR / "configs"
 SBDOTS_WALLPAPERS_DIR = SBDOTS_DATA_DIR / "wallpapers"
 SBDOTS_LOG_DIR = SBDOTS_STATE_DIR / "logs"
+PALETTE_CACHE_DIR = SBDOTS_STATE_DIR / "palettes"
+# Resolved rich theme, so CLI starts skip parsing the theme toml
+RICH_THEME_CACHE_FILE = SBDOTS_STATE_DIR / "rich_theme.json"
 
 DEFAULT_RICH_THEME_PATH = Path("/etc") / "sbdots" / "rich_theme.toml"
 USER_RICH_THEME_PATH = USER_CONFIGS_DIR / "rich" / "theme.toml"
+MATUGEN_CONFIG_PATH = USER_CONFIGS_DIR / "matugen" / "config.toml"
+HYPR_CONFIG_DIR = USER_CONFIGS_DIR / "hypr"
 
 
 # =============================================================================
@@ -46,13 +51,38 @@ VALID_ACTIONS: list[str] = [
     "brightness",
     "volume",
     "toggle_hypridle",
+    "pregenerate_palettes",
+    "clipboard",
 ]
 
 # Clipboard listener configuration
 CACHE_FILE = SBDOTS_STATE_DIR / "cliphist"
+CLIP_JOURNAL_FILE = SBDOTS_STATE_DIR / "cliphist.journal"
+CLIP_LOCK_FILE = SBDOTS_STATE_DIR / "cliphist.lock"
+CLIP_BLOB_DIR = SBDOTS_STATE_DIR / "clipblobs"
+# SQLite history, used instead of the files above with 'backend = sqlite'
+CLIP_DB_FILE = SBDOTS_STATE_DIR / "cliphist.db"
 MAX_ENTRIES = 50
-MAX_LENGTH = 200
+# Retention defaults of the SQLite history, 0 disables a limit
+CLIP_DB_MAX_ENTRIES = 100_000
+CLIP_DB_MAX_AGE_DAYS = 0
+CLIP_DB_MAX_SIZE_MB = 1024
+# Journal records after which history is compacted into CACHE_FILE
+JOURNAL_COMPACT_AT = 100
+# Largest clipboard payload stored, in bytes
+MAX_CLIP_SIZE = 32 * 1024 * 1024
+# Characters of a clip shown in the history index
+PREVIEW_LENGTH = 80
+# Polling interval, only used while 'wl-paste --watch' is unavailable
 POLL_SEC = 0.2
+# Quiet time after a clipboard change before reading it, collapses bursts
+WATCH_DEBOUNCE_SEC = 0.05
+# Seconds to poll before trying to restart a failed 'wl-paste --watch'
+WATCH_RETRY_SEC = 30
+
+# Wallpaper palette pre-generation
+WALLPAPER_EXTENSIONS = [".png", ".jpg", ".jpeg", ".webp"]
+PALETTE_PREGEN_NICENESS = 19
 
 
 # =============================================================================
@@ -60,6 +90,15 @@ POLL_SEC = 0.2
 # =============================================================================
 LOG_MAX_BYTES = 5 * 1024 * 1024  # 5MB
 LOG_BACKUP_COUNT = 3
+# Records buffered for the daemons' log writer thread, newer ones are dropped past that
+LOG_QUEUE_SIZE = 10_000
+
+# Tracing, see library/tracing.py
+TRACE_ENV_VAR = "SBDOTS_TRACE"
+TRACE_MAX_BYTES = 20 * 1024 * 1024  # 20MB
+TRACE_BACKUP_COUNT = 2
+# Trace files kept in the traces dir, one per traced process, oldest removed first
+TRACE_MAX_FILES = 50
 
 
 class LogLevel(Enum):
@@ -117,6 +156,7 @@ DEFAULT_SECTION = "core"
 WEATHER_SECTION = "weather"
 WAYBAR_SECTION = "waybar"
 MATUGEN_SECTION = "matugen"
+CLIPBOARD_SECTION = "clipboard"
 
 # =============================================================================
 # WEATHER DATA ICONS
@@ -193,6 +233,16 @@ SUDO_PROMPT_PATTERNS = [
     ),  # sudo password query timeout prompt
 ]
 
+# Patterns for turning pacman/yay output lines into progress events
+ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b[()][A-Z0-9]")
+PKG_STEP_RE = re.compile(
+    r"^\((\d+)/(\d+)\) (?:installing|upgrading|reinstalling|downgrading) (\S+?)(?:\.\.\.)?(?:\s|$)"
+)  # (1/3) installing foo  [####] 100%
+PKG_DOWNLOAD_RE = re.compile(
+    r"^\s*([^\s(]\S*)\s.*\[[#o\-c ]*\]\s+(\d{1,3})%\s*$"
+)  # foo-1.0-1-x86_64  3.4 MiB  2.1 MiB/s 00:02 [####---]  45%
+PKG_ERROR_RE = re.compile(r"^(?:error:|==> ERROR:|\s*-> error|fatal:)", re.IGNORECASE)
+
 # =============================================================================
 # TYPE ALIASES
 # =============================================================================
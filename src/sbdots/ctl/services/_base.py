@@ -1,6 +1,3 @@
-import psutil
-import time
-
 from sbdots.library.exceptions import ProcessNotKilled
 from sbdots.library.procs_utils import (
     get_pid,
@@ -37,10 +34,10 @@ class Process:
             return True
 
         try:
+            # Returns once the process has exited
             kill_proc(self.pid, logger=self.logger)
-            time.sleep(0.05)
             self._refresh_pid()
-            if self.pid and psutil.pid_exists(self.pid):
+            if self.pid:
                 self.logger.error(f"Failed to kill {self.name} (pid {self.pid})")
                 return False
             self.logger.info(f"{self.name} killed.")
@@ -62,7 +59,6 @@ class Process:
             if not self.kill():
                 self.logger.info(f"{self.name} failed to reload. Unable to kill...")
                 return
-            time.sleep(0.2)
             self.start()
             self.logger.info(f"{self.name} reloaded.")
         else:
@@ -5,7 +5,7 @@ import signal
 
 from ._base import Process  # base process class
 from sbdots.library.procs_utils import start_proc
-from sbdots.library.cli_utils import print_error, print_warning
+from sbdots.library import cli_utils
 from sbdots.library.config_utils import get_config, set_config
 from sbdots.library.logger import setup_logging
 from sbdots.constants import USER_CONFIGS_DIR, WAYBAR_SECTION
@@ -74,11 +74,11 @@ class Waybar(Process):
                 self.config_file,
                 self.css_file,
             )
-            print_error(f"Invalid style: {self.current_style}")
+            cli_utils.print_error(f"Invalid style: {self.current_style}")
 
         try:
             if self.is_running():
-                print_warning("Waybar already running!")
+                cli_utils.print_warning("Waybar already running!")
                 return
 
             result = start_proc(
@@ -104,7 +104,7 @@ class Waybar(Process):
     def kill(self):
         self.logger.debug("Killing waybar...")
         if not self.is_running():
-            print_error("Unable to kill, waybar not running!")
+            cli_utils.print_error("Unable to kill, waybar not running!")
             return False
 
         return super().kill()
@@ -112,7 +112,7 @@ class Waybar(Process):
     def reload_config(self):
         self.logger.debug("Reloading waybar's configs...")
         if not self.is_running():
-            print_error("Unable to reload config, waybar is not running!")
+            cli_utils.print_error("Unable to reload config, waybar is not running!")
             return
 
         return super().send_signal(signal.SIGUSR2)
@@ -120,7 +120,7 @@ class Waybar(Process):
     def toggle(self):
         self.logger.debug("Toggling waybar's visibility...")
         if not self.is_running():
-            print_error("Unable to toggle visibility, waybar is not running!")
+            cli_utils.print_error("Unable to toggle visibility, waybar is not running!")
             return
 
         return super().send_signal(signal.SIGUSR1)
@@ -1,15 +1,11 @@
-from sbdots.library.commands import check_output, run_sudo_cmd, run_command
-from sbdots.library.cli_utils import (
-    print_error,
-    print_info,
-    print_success,
-    print_warning,
-    print_subtext,
-    print_newline,
-    confirm,
-    Spinner,
-    print_ascii_art,
+from sbdots.library.commands import (
+    SudoEvent,
+    SudoEventKind,
+    check_output,
+    run_sudo_cmd,
+    run_command,
 )
+from sbdots.library import cli_utils
 
 from typing import Optional
 from logging import Logger
@@ -30,12 +26,32 @@ class InstallUpdates:
         else:
             return None
 
-    def _run_command(self, cmd, spinner: Optional[Spinner] = None) -> bool:
+    def _run_command(self, cmd, spinner: Optional["cli_utils.Spinner"] = None) -> bool:
+        def _on_event(event: SudoEvent) -> None:
+            if event.kind is SudoEventKind.ERROR:
+                self.logger.error(event.line)
+            elif not spinner:
+                return
+            elif event.kind is SudoEventKind.DOWNLOAD:
+                spinner.progress(
+                    "Downloading", item=event.package, percent=event.percent
+                )
+            elif event.kind is SudoEventKind.INSTALLING:
+                spinner.progress(
+                    "Installing",
+                    item=event.package,
+                    current=event.current,
+                    total=event.total,
+                )
+            elif text := event.describe():
+                spinner.update_text(text)
+
         rc = run_sudo_cmd(
             command=cmd,
             spinner=spinner,
             logger=self.logger,
             verbose=self.verbose,
+            on_event=_on_event,
         )
 
         if not rc and rc != 0:
@@ -46,44 +62,46 @@ class InstallUpdates:
 
     def main(self) -> None:
         # Header
-        print_ascii_art("System Updates")
-        print_subtext("It is recommended to install updates 3-4 times a week.")
-        print_newline(2)
+        cli_utils.print_ascii_art("System Updates")
+        cli_utils.print_subtext(
+            "It is recommended to install updates 3-4 times a week."
+        )
+        cli_utils.print_newline(2)
 
         # Check for AUR helper
         if not self.aur_helper:
-            print_error("ERROR - No AUR helper found (yay or paru).")
+            cli_utils.print_error("ERROR - No AUR helper found (yay or paru).")
             return
 
-        print_info(f"Using AUR helper: {self.aur_helper}")
-        print_newline()
+        cli_utils.print_info(f"Using AUR helper: {self.aur_helper}")
+        cli_utils.print_newline()
 
         # Confirm update start
-        if not confirm("Do you want to start the full system update now?"):
-            print_warning("Update canceled.")
+        if not cli_utils.confirm("Do you want to start the full system update now?"):
+            cli_utils.print_warning("Update canceled.")
             return
 
-        print_info("UPDATE STARTED")
-        print_newline()
+        cli_utils.print_info("UPDATE STARTED")
+        cli_utils.print_newline()
 
-        with Spinner("Installing updates...") as spinner:
+        with cli_utils.Spinner("Installing updates...") as spinner:
             # System updates
             if not self._run_command(
                 cmd="sudo pacman -Syu --noconfirm", spinner=spinner
             ):
-                print_error("System update installation has failed")
+                cli_utils.print_error("System update installation has failed")
                 return
 
             # AUR updates
             if not self._run_command(
                 cmd=f"{self.aur_helper} -Syu --noconfirm", spinner=spinner
             ):
-                print_error("Aur update installation has failed")
+                cli_utils.print_error("Aur update installation has failed")
                 return
 
         # Cleanup orphaned packages
-        print_newline()
-        if confirm("Do you want to clean up orphaned packages?"):
+        cli_utils.print_newline()
+        if cli_utils.confirm("Do you want to clean up orphaned packages?"):
             # Check for orphans
             import subprocess
 
@@ -93,20 +111,20 @@ class InstallUpdates:
             orphans = result.stdout.strip()
 
             if orphans:
-                print_warning("Orphaned packages found:")
-                print_subtext(orphans)
+                cli_utils.print_warning("Orphaned packages found:")
+                cli_utils.print_subtext(orphans)
 
                 # Remove orphans
                 cmd = f"pacman -Rns {orphans.replace(chr(10), ' ')} --noconfirm"
                 self._run_command(cmd)
             else:
-                print_success("No orphaned packages found")
+                cli_utils.print_success("No orphaned packages found")
         else:
-            print_warning("Skipping orphan cleanup")
+            cli_utils.print_warning("Skipping orphan cleanup")
 
         # Clean package cache
-        print_newline()
-        if confirm("Do you want to clean package cache? (Free disk space)"):
+        cli_utils.print_newline()
+        if cli_utils.confirm("Do you want to clean package cache? (Free disk space)"):
             self._run_command("pacman -Sc --noconfirm")
 
             # Clean AUR cache based on helper
@@ -116,8 +134,8 @@ class InstallUpdates:
                 self._run_command("paru -Sc --noconfirm")
 
         # Final summary
-        print_newline()
-        print_success("UPDATE COMPLETE")
+        cli_utils.print_newline()
+        cli_utils.print_success("UPDATE COMPLETE")
 
         # Notify
         run_command(
@@ -129,12 +147,14 @@ class InstallUpdates:
         )
 
         # Reboot check
-        print_newline()
-        if confirm("Updates complete. Some updates may require a reboot. Reboot now?"):
+        cli_utils.print_newline()
+        if cli_utils.confirm(
+            "Updates complete. Some updates may require a reboot. Reboot now?"
+        ):
             self._run_command("reboot")
 
-        print_newline()
-        print_success("All updates completed successfully!")
-        print_newline()
-        print_info("Press [ENTER] to close.")
+        cli_utils.print_newline()
+        cli_utils.print_success("All updates completed successfully!")
+        cli_utils.print_newline()
+        cli_utils.print_info("Press [ENTER] to close.")
         input()
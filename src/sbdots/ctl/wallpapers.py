@@ -0,0 +1,75 @@
+from typing import Annotated, Optional
+from pathlib import Path
+import logging
+import typer
+
+from sbdots.library.palette_cache import pregenerate
+from sbdots.library import cli_utils
+from sbdots.library.logger import setup_logging
+from sbdots.constants import USER_WALLPAPERS_DIR
+
+
+def cli_api() -> typer.Typer:
+    """Manage wallpapers: pre-generate color palettes, etc."""
+    cli = typer.Typer(no_args_is_help=True)
+    logger = logging.getLogger(__name__)
+
+    @cli.command("pregenerate")
+    def _pregenerate(
+        directory: Annotated[
+            Optional[Path],
+            typer.Argument(help="Wallpapers directory", show_default=False),
+        ] = None,
+        jobs: Annotated[
+            Optional[int],
+            typer.Option("--jobs", "-j", help="Number of parallel workers"),
+        ] = None,
+        force: Annotated[
+            bool,
+            typer.Option("--force", "-f", help="Regenerate up to date palettes too"),
+        ] = False,
+        verbose: Annotated[
+            bool, typer.Option("--verbose/--no-verbose", help="Verbose output")
+        ] = False,
+    ):
+        """Pre-generate matugen palettes for every wallpaper."""
+        setup_logging(
+            __name__,
+            verbose=verbose,
+            use_rotating_file=False,
+            file_handling_mode="w",
+        )
+
+        directory = directory or USER_WALLPAPERS_DIR
+        if not directory.is_dir():
+            cli_utils.print_error(f"Not a directory: {directory}")
+            raise typer.Exit(1)
+
+        with cli_utils.Spinner("Generating palettes...", verbose=verbose) as spinner:
+
+            def on_progress(done: int, total: int, image: Path) -> None:
+                spinner.update_text(f"[{done}/{total}] {image.name}")
+
+            result = pregenerate(
+                directory,
+                jobs=jobs,
+                force=force,
+                logger=logger,
+                on_progress=on_progress,
+            )
+
+        if result.failed:
+            cli_utils.print_warning(
+                f"Failed to generate {len(result.failed)} palette(s)",
+                details="\n".join(str(p) for p in result.failed),
+            )
+
+        cli_utils.print_success(
+            f"Generated {len(result.generated)} palette(s), "
+            f"{len(result.skipped)} already up to date."
+        )
+
+        if result.failed:
+            raise typer.Exit(1)
+
+    return cli
@@ -7,6 +7,7 @@ import logging
 import signal
 from pathlib import Path
 
+from sbdots.library import tracing
 from sbdots.library.logger import setup_daemon_logging
 from sbdots.actions._base import BaseAction
 from sbdots.constants import VALID_ACTIONS
@@ -38,24 +39,30 @@ ACTIVE_CONNECTIONS = 0
 STATE_LOCK = threading.Lock()
 ACTION_TIMEOUT = 30
 
+# For 'latest_wins' actions: action name -> (running instance, finished event)
+ACTIVE_PIPELINES: dict[str, tuple[BaseAction, threading.Event]] = {}
+# Seconds between warnings while waiting on a superseded run to stop
+SUPERSEDE_TIMEOUT = 5
+
 # For handling graceful shutdown
 SHUTDOWN_EVENT = threading.Event()
 
+# Actions requested by the daemon itself once it listens, i.e: at login
+STARTUP_ACTIONS = ("pregenerate_palettes",)
+
 
 def log_daemon_status(event: str):
     """Logs the current status of the daemon."""
+    # Snapshot under the lock, log outside of it
     with STATE_LOCK:
-        status = (
-            f"Event: {event} | "
-            f"Clients: {ACTIVE_CONNECTIONS} | "
-            f"Running: {RUNNING_ACTIONS or '[]'}"
-        )
-        logger.info(status)
+        clients = ACTIVE_CONNECTIONS
+        running = list(RUNNING_ACTIONS)
+    logger.info("Event: %s | Clients: %d | Running: %s", event, clients, running)
 
 
 def signal_handler(sig, frame):
     """Sets the shutdown event when a signal is received."""
-    logger.info(f"Signal {sig} received. Initiating graceful shutdown...")
+    logger.info("Signal %s received. Initiating graceful shutdown...", sig)
     SHUTDOWN_EVENT.set()
 
 
@@ -74,7 +81,7 @@ def error(conn, message: str):
     except BrokenPipeError:
         logger.debug("Client disconnected before response could be sent.")
     except Exception as e:
-        logger.warning(f"Failed to send message to client: {e}")
+        logger.warning("Failed to send message to client: %s", e)
 
 
 def load_action(name: str, conn) -> type[BaseAction] | None:
@@ -113,15 +120,74 @@ def load_action(name: str, conn) -> type[BaseAction] | None:
     return _class
 
 
+def supersede(name: str, instance: BaseAction) -> threading.Event:
+    """
+    Register 'instance' as the active run of action 'name'.
+
+    Stops the previously active run, if any, and waits for it to finish,
+    however long it takes, so runs of the same action never overlap. Returns the event to set once
+    'instance' is done.
+    """
+    done = threading.Event()
+
+    with STATE_LOCK:
+        previous = ACTIVE_PIPELINES.get(name)
+        ACTIVE_PIPELINES[name] = (instance, done)
+
+    if previous is not None:
+        prev_instance, prev_done = previous
+        logger.info("Action '%s' superseded by a newer request, stopping it...", name)
+        try:
+            prev_instance.stop()
+        except Exception as e:
+            logger.warning("Failed to stop superseded action '%s': %s", name, e)
+
+        waited = 0
+        while not prev_done.wait(timeout=SUPERSEDE_TIMEOUT):
+            waited += SUPERSEDE_TIMEOUT
+            logger.warning(
+                "Superseded action '%s' still running after %ds, waiting...",
+                name,
+                waited,
+            )
+
+    return done
+
+
+def release(name: str, instance: BaseAction, done: threading.Event) -> None:
+    """Unregister 'instance' if it is still the active run of 'name'."""
+    with STATE_LOCK:
+        active = ACTIVE_PIPELINES.get(name)
+        if active is not None and active[0] is instance:
+            del ACTIVE_PIPELINES[name]
+    done.set()
+
+
 def run_action(name: str, cls_instance, conn) -> None:
     try:
         cls_instance.main()
-        logger.debug(f"Action '{name}' completed successfully.")
+        logger.debug("Action '%s' completed successfully.", name)
 
     except Exception as e:
         error(conn, f"Error during '{name}'.main() execution: {e}")
 
 
+def run_startup_actions() -> None:
+    """
+    Request STARTUP_ACTIONS through the daemon's own socket, so they're
+    handled like any client request. Run once the socket listens.
+    """
+    for name in STARTUP_ACTIONS:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(str(SOCKET_PATH))
+                client.sendall(f"{name}\n".encode())
+                response = client.makefile().read().strip()
+            logger.info("Startup action '%s': %s", name, response)
+        except OSError as e:
+            logger.warning("Failed to run startup action '%s': %s", name, e)
+
+
 def rm_prev_socket() -> None:
     """
     Remove existing socket path
@@ -131,7 +197,7 @@ def rm_prev_socket() -> None:
             os.unlink(SOCKET_PATH)
     except OSError as e:
         if os.path.exists(SOCKET_PATH):
-            logger.error(f"Failed to remove existing socket: {e}")
+            logger.error("Failed to remove existing socket: %s", e)
             sys.exit(1)
 
 
@@ -142,6 +208,13 @@ def handle_shutdown(active_threads: set) -> None:
 
     with STATE_LOCK:
         current_threads = list(active_threads)
+        pipelines = [instance for instance, _ in ACTIVE_PIPELINES.values()]
+
+    for instance in pipelines:
+        try:
+            instance.stop()
+        except Exception as e:
+            logger.warning("Failed to stop action during shutdown: %s", e)
 
     for thread in current_threads:
         if thread.is_alive():
@@ -167,24 +240,33 @@ def handle_action(conn):
         action_name = parts[0]
         action_args = parts[1:]
 
-        ActionClass = load_action(action_name, conn)
-        if ActionClass is None:
-            return
+        # Everything the action spawns is traced as its child
+        with tracing.span(action_name, cat="action", args=action_args):
+            ActionClass = load_action(action_name, conn)
+            if ActionClass is None:
+                return
 
-        # ACTIONS STARTING PROCCESS STARTS FROM HERE
-        log_daemon_status(f"Action '{action_name}' started")
+            # ACTIONS STARTING PROCCESS STARTS FROM HERE
+            log_daemon_status(f"Action '{action_name}' started")
 
-        try:
-            instance = ActionClass(conn, *action_args)
-        except Exception as e:
-            error(conn, f"Failed to initialize '{action_name}': {e}")
-            return
+            try:
+                instance = ActionClass(conn, *action_args)
+            except Exception as e:
+                error(conn, f"Failed to initialize '{action_name}': {e}")
+                return
 
-        # Register
-        with STATE_LOCK:
-            RUNNING_ACTIONS.append(action_name)
+            # Register
+            with STATE_LOCK:
+                RUNNING_ACTIONS.append(action_name)
 
-        run_action(action_name, instance, conn)
+            if ActionClass.latest_wins:
+                done = supersede(action_name, instance)
+                try:
+                    run_action(action_name, instance, conn)
+                finally:
+                    release(action_name, instance, done)
+            else:
+                run_action(action_name, instance, conn)
 
     except (ConnectionResetError, BrokenPipeError):
         logger.exception("Client disconnected unexpectedly: ")
@@ -219,7 +301,11 @@ def start_daemon():
         os.chmod(SOCKET_PATH, 0o600)
         s.listen()
         s.settimeout(1.0)  # Non-blocking accept to check shutdown flag
-        logger.info(f"Daemon started. Listening on {SOCKET_PATH}...")
+        logger.info("Daemon started. Listening on %s...", SOCKET_PATH)
+
+        threading.Thread(
+            target=run_startup_actions, name="startup-actions", daemon=True
+        ).start()
 
         active_threads = set()
 
@@ -266,5 +352,5 @@ if __name__ == "__main__":
     try:
         start_daemon()
     except Exception as e:
-        logger.exception(f"Fatal error: {e}")
+        logger.exception("Fatal error: %s", e)
         sys.exit(1)
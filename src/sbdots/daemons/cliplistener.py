@@ -1,16 +1,20 @@
 import os
-import shutil
+import select
 import subprocess
 import time
 import signal
-from fcntl import flock, LOCK_EX, LOCK_UN
 import logging
 
+from sbdots.library import clip_store, tracing
+from sbdots.library.clip_db import ClipDB, get_options, indexed_text
+from sbdots.library.clip_history import ClipHistory, read_entries
+from sbdots.library.clip_store import ClipRecord
 from sbdots.library.logger import setup_daemon_logging
 from sbdots.constants import (
-    CACHE_FILE,
-    MAX_ENTRIES,
-    MAX_LENGTH,
+    MAX_CLIP_SIZE,
+    POLL_SEC,
+    WATCH_DEBOUNCE_SEC,
+    WATCH_RETRY_SEC,
 )
 
 setup_daemon_logging("SBDotsClipboardListener")
@@ -29,10 +33,33 @@ except Exception as e:
     )
     pass
 
+# Seconds to wait for a (possibly large) clipboard payload
+PASTE_TIMEOUT = 5
+
 # Event bool for graceful shutdown
 running = True
 
 
+def open_history():
+    """Return the history for the configured backend, see the [clipboard] settings."""
+    options = get_options(logger)
+    if options["backend"] == "sqlite":
+        return ClipDB(
+            max_entries=options["max_entries"],
+            max_age_days=options["max_age_days"],
+            max_size_mb=options["max_size_mb"],
+            logger=logger,
+        )
+    if options["backend"] != "file":
+        logger.warning(
+            "Unknown clipboard backend '%s', using 'file'", options["backend"]
+        )
+    return ClipHistory(logger=logger)
+
+
+history = open_history()
+
+
 def handle_sigterm(signum, frame):
     global running
     logger.info("Received signal %s, exiting...", signum)
@@ -43,25 +70,16 @@ signal.signal(signal.SIGINT, handle_sigterm)
 signal.signal(signal.SIGTERM, handle_sigterm)
 
 
-def ensure_cache_file():
-    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    if not CACHE_FILE.exists():
-        CACHE_FILE.touch(mode=0o600)
-        logger.info("Created cache file %s", CACHE_FILE)
-
-
 def get_clip():
-    """Return clipboard text (string) or None on error."""
+    """Return the clipboard as (mime, data), or None on error or if there's nothing to store."""
     try:
-        p = subprocess.run(
-            ["wl-paste", "--no-newline"],
-            capture_output=True,
-            text=True,
-            timeout=1,
-        )
-        if p.returncode != 0:
+        mime = clip_store.choose_type(clip_store.list_types())
+        if mime is None:
             return None
-        return p.stdout.strip()
+        data = clip_store.paste(mime, timeout=PASTE_TIMEOUT)
+        if not data:
+            return None
+        return mime, data
     except FileNotFoundError:
         logger.error("'wl-paste' not found. Install wl-clipboard.")
         return None
@@ -72,76 +90,194 @@ def get_clip():
         return None
 
 
-def read_history():
-    """Return list of lines from the cache file."""
-    ensure_cache_file()
-    with open(CACHE_FILE, "r", encoding="utf-8", errors="ignore") as fh:
-        try:
-            flock(fh, LOCK_EX)
-            lines = [line.rstrip("\n") for line in fh]
-        finally:
-            flock(fh, LOCK_UN)
-    return lines
-
-
-def write_history(lines):
-    """Write 'lines' list to the cache file atomically."""
-    tmp = CACHE_FILE.with_suffix(".tmp")
-    with open(tmp, "w", encoding="utf-8", errors="ignore") as fh:
-        try:
-            flock(fh, LOCK_EX)
-            for line in lines:
-                fh.write(line.replace("\n", " ") + "\n")
-            fh.flush()
-            os.fsync(fh.fileno())
-        finally:
-            flock(fh, LOCK_UN)
-    shutil.move(str(tmp), str(CACHE_FILE))
+def forget_blob(line):
+    """Delete the blob of an evicted entry, unless another entry still uses it."""
+    record = ClipRecord.from_line(line)
+    if record is None:
+        return
+    if any(entry.startswith(record.hash) for entry in history.entries()):
+        return
+    clip_store.blob_path(record.hash).unlink(missing_ok=True)
 
 
 def append_clip(clip):
-    """Append the new clip."""
+    """Store the new clip's payload and add it to the front of the history."""
     if not clip:
         logger.error("No clip to append...!")
         return False
 
-    clip = clip.strip()
-    if clip == "":
+    mime, data = clip
+    if not data.strip():
         logger.error("Empty clip...!")
         return False
 
-    if len(clip) > MAX_LENGTH:
-        logger.error("Clip too long to append...!")
+    if len(data) > MAX_CLIP_SIZE:
+        logger.error("Clip too large to append (%d bytes)...!", len(data))
         return False
 
-    lines = read_history()
-    if clip in lines:
-        logger.info("'%s' is already in history, bringing it to the front...", clip)
-        lines.remove(clip)
-        lines.append(clip)
-    else:
-        lines.append(clip)
+    record = clip_store.store(data, mime)
+    if isinstance(history, ClipDB):
+        # Hashes are unique in the database, evicted blobs are unreferenced
+        for digest in history.add(record, data):
+            clip_store.blob_path(digest).unlink(missing_ok=True)
+        return True
 
-    if len(lines) > MAX_ENTRIES:
-        # remove oldest entries
-        lines = lines[-MAX_ENTRIES:]
-    write_history(lines)
-    return True
+    line = record.to_line()
+    if line in history:
+        logger.info("'%s' is already in history, bringing it to the front...", line)
 
+    evicted = history.add(line)
+    if evicted is not None:
+        forget_blob(evicted)
+    return True
 
-def main_loop():
-    ensure_cache_file()
-    last_clip = None
 
-    while running:
+def capture(last_clip):
+    """Read the clipboard and store it if it changed, return the current clip."""
+    with tracing.span("capture", cat="clipboard") as info:
         clip = get_clip()
         if clip is not None:
             if clip != last_clip:
                 added = append_clip(clip)
                 if added:
-                    logger.info("Added clip | len: %d | clip: [%s]", len(clip), clip)
+                    mime, data = clip
+                    logger.info("Added clip | mime: %s | size: %d", mime, len(data))
+                    info["mime"], info["size"] = mime, len(data)
                 last_clip = clip
-        time.sleep(0.2)
+    return last_clip
+
+
+def migrate_entry(entry):
+    """Turn a plain text entry from older versions into a blob record."""
+    if ClipRecord.from_line(entry) is not None:
+        return entry
+    return clip_store.store(entry.encode("utf-8"), "text/plain;charset=utf-8").to_line()
+
+
+def import_file_history():
+    """Carry the file based history over to a new, empty database."""
+    records = []
+    for line in reversed(read_entries()):
+        record = ClipRecord.from_line(migrate_entry(line))
+        if record is None:
+            continue
+        try:
+            data = clip_store.load(record)
+        except OSError:
+            continue
+        records.append((record, len(data), indexed_text(record, data)))
+
+    if records:
+        imported = history.import_records(records)
+        logger.info("Imported %d clipboard entries from the file history", imported)
+
+
+def load_history():
+    history.load()
+
+    if isinstance(history, ClipDB):
+        if not len(history):
+            import_file_history()
+        records = history.entries()
+    else:
+        history.rewrite(migrate_entry)
+        records = [ClipRecord.from_line(line) for line in history.entries()]
+
+    removed = clip_store.remove_unreferenced(r for r in records if r)
+    if removed:
+        logger.info("Removed %d unreferenced clipboard blobs", removed)
+
+
+def start_watcher():
+    """
+    Start 'wl-paste --watch echo': it runs 'echo' on every clipboard change,
+    so each line on its stdout is one change event. Returns None on failure.
+    """
+    try:
+        return subprocess.Popen(
+            ["wl-paste", "--watch", "echo"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        logger.error("'wl-paste' not found. Install wl-clipboard.")
+        return None
+
+
+def stop_watcher(watcher):
+    if watcher.poll() is None:
+        watcher.terminate()
+        try:
+            watcher.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            watcher.kill()
+            watcher.wait()
+    watcher.stdout.close()
+
+
+def wait_for_change(fd, timeout):
+    """Return True on a change event, False on timeout, None once the watcher exits."""
+    readable, _, _ = select.select([fd], [], [], timeout)
+    if not readable:
+        return False
+    return True if os.read(fd, 4096) else None
+
+
+def watch(watcher, last_clip):
+    """Capture clips on change events until shutdown or the watcher exits."""
+    fd = watcher.stdout.fileno()
+
+    while running:
+        event = wait_for_change(fd, timeout=1)
+        if event is None:
+            break
+        if not event:
+            continue
+
+        # Debounce: wait for a quiet period so a burst is read only once
+        while event:
+            event = wait_for_change(fd, WATCH_DEBOUNCE_SEC)
+
+        last_clip = capture(last_clip)
+        if event is None:
+            break
+
+    return last_clip
+
+
+def poll(last_clip, duration):
+    """Fallback: poll the clipboard every POLL_SEC for 'duration' seconds."""
+    deadline = time.monotonic() + duration
+    while running and time.monotonic() < deadline:
+        last_clip = capture(last_clip)
+        time.sleep(POLL_SEC)
+    return last_clip
+
+
+def main_loop():
+    load_history()
+    last_clip = capture(None)
+
+    while running:
+        watcher = start_watcher()
+        if watcher is None:
+            last_clip = poll(last_clip, WATCH_RETRY_SEC)
+            continue
+
+        logger.info("Watching clipboard changes (pid: %d)", watcher.pid)
+        try:
+            last_clip = watch(watcher, last_clip)
+        finally:
+            stop_watcher(watcher)
+
+        if running:
+            logger.warning(
+                "'wl-paste --watch' exited (code: %s), polling for %ds before retrying",
+                watcher.returncode,
+                WATCH_RETRY_SEC,
+            )
+            last_clip = poll(last_clip, WATCH_RETRY_SEC)
 
 
 def main():
@@ -153,6 +289,7 @@ def main():
         logger.exception("wl-clipboard-listener daemon crashed")
         raise
     finally:
+        history.close()
         logger.info("wl-clipboard-listener daemon stopped.")
 
 
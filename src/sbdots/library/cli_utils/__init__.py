@@ -1,37 +1,87 @@
-from .spinner import SpinnerProgress as Spinner
-from .console import reset_console, clear_console, get_console
-from .output import (
-    print_rule,
-    print_newline,
-    print_ascii_art,
-    print_header,
-    print_subheader,
-    print_text,
-    print_subtext,
-    print_info,
-    print_error,
-    print_success,
-    print_warning,
-)
-from .prompts import chose, confirm, prompt
+"""
+Console output helpers: spinners, printing and prompts, styled with the
+rich theme.
+
+Names are imported from their submodule on first access (PEP 562): rich,
+pyfiglet and the theme file are only loaded once something is printed.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .spinner import SpinnerProgress as Spinner
+    from .console import reset_console, clear_console, get_console
+    from .output import (
+        print_rule,
+        print_newline,
+        print_ascii_art,
+        print_header,
+        print_subheader,
+        print_text,
+        print_subtext,
+        print_info,
+        print_error,
+        print_success,
+        print_warning,
+    )
+    from .prompts import chose, confirm, prompt
+
+# name -> (submodule, attribute)
+_EXPORTS = {
+    "Spinner": (".spinner", "SpinnerProgress"),
+    "reset_console": (".console", "reset_console"),
+    "clear_console": (".console", "clear_console"),
+    "get_console": (".console", "get_console"),
+    "print_rule": (".output", "print_rule"),
+    "print_newline": (".output", "print_newline"),
+    "print_ascii_art": (".output", "print_ascii_art"),
+    "print_header": (".output", "print_header"),
+    "print_subheader": (".output", "print_subheader"),
+    "print_text": (".output", "print_text"),
+    "print_subtext": (".output", "print_subtext"),
+    "print_info": (".output", "print_info"),
+    "print_error": (".output", "print_error"),
+    "print_success": (".output", "print_success"),
+    "print_warning": (".output", "print_warning"),
+    "chose": (".prompts", "chose"),
+    "confirm": (".prompts", "confirm"),
+    "prompt": (".prompts", "prompt"),
+}
 
 __all__ = [
     "Spinner",
     "reset_console",
     "clear_console",
     "get_console",
-    "print_newline",
     "print_rule",
+    "print_newline",
     "print_ascii_art",
     "print_header",
     "print_subheader",
     "print_text",
     "print_subtext",
-    "print_success",
     "print_info",
     "print_error",
+    "print_success",
     "print_warning",
     "chose",
     "confirm",
     "prompt",
 ]
+
+
+def __getattr__(name: str):
+    try:
+        module, attr = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(import_module(module, __name__), attr)
+    # Cached, later lookups don't come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_EXPORTS])
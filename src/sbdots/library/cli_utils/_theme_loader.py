@@ -1,24 +1,100 @@
+"""
+Load the rich theme: the user's theme file if it exists, else the default.
+
+The resolved colors, styles and icons are cached as json in
+RICH_THEME_CACHE_FILE, keyed on the path, mtime and size of both theme
+files, so a warm start doesn't parse or resolve the toml at all. A missing,
+stale or corrupt cache is rebuilt from the theme file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Optional
+
 from rich.theme import Theme
 
 from sbdots.library.exceptions import ThemeConfigError
 from sbdots.library.config_utils import read_rich_theme
-from sbdots.constants import DEFAULT_RICH_THEME_PATH, USER_RICH_THEME_PATH
+from sbdots.constants import (
+    DEFAULT_RICH_THEME_PATH,
+    RICH_THEME_CACHE_FILE,
+    USER_RICH_THEME_PATH,
+)
+
+# Bumped when the cached layout changes
+CACHE_VERSION = 1
+
+_SECTIONS = ("colors", "styles", "icons")
+
 
+def _fingerprint() -> list[Optional[dict[str, Any]]]:
+    fingerprint = []
+    for path in (USER_RICH_THEME_PATH, DEFAULT_RICH_THEME_PATH):
+        try:
+            st = path.stat()
+        except OSError:
+            fingerprint.append(None)
+            continue
+        fingerprint.append(
+            {"source": str(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        )
+    return fingerprint
 
-def load_theme() -> tuple[Theme, dict, dict]:
+
+def _load_cached(fingerprint: list) -> Optional[dict[str, dict[str, str]]]:
+    """Return the cached sections, or None if missing, stale or corrupt."""
+    try:
+        with open(RICH_THEME_CACHE_FILE, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if entry["version"] != CACHE_VERSION or entry["fingerprint"] != fingerprint:
+            return None
+        sections = {name: entry["theme"][name] for name in _SECTIONS}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if not all(isinstance(section, dict) and section for section in sections.values()):
+        return None
+    return sections
+
+
+def _store_cached(fingerprint: list, sections: dict[str, dict[str, Any]]) -> None:
+    """Atomically write the resolved theme, a failure only costs the next start a parse."""
+    entry = {"version": CACHE_VERSION, "fingerprint": fingerprint, "theme": sections}
+    tmp = RICH_THEME_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        RICH_THEME_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        tmp.replace(RICH_THEME_CACHE_FILE)
+    except (OSError, TypeError, ValueError):
+        tmp.unlink(missing_ok=True)
+
+
+def load_theme() -> tuple[Theme, Mapping, Mapping]:
     # TODO: Implement fallback if user's theme file is invalid or incomplete
-    if USER_RICH_THEME_PATH.exists():
-        path = USER_RICH_THEME_PATH
-    else:
-        path = DEFAULT_RICH_THEME_PATH
+    fingerprint = _fingerprint()
+
+    sections = _load_cached(fingerprint)
+    if sections is None:
+        if USER_RICH_THEME_PATH.exists():
+            path = USER_RICH_THEME_PATH
+        else:
+            path = DEFAULT_RICH_THEME_PATH
 
-    config = read_rich_theme(path)
+        config = read_rich_theme(path)
 
-    colors = config.get("colors", {})
-    styles = config.get("styles", {})
-    icons = config.get("icons", {})
+        sections = {
+            name: dict(config[name].items())
+            if isinstance(config.get(name), Mapping)
+            else {}
+            for name in _SECTIONS
+        }
+        if not all(sections.values()):
+            raise ThemeConfigError("Theme must define [colors], [styles] and [icons]")
 
-    if not colors or not styles or not icons:
-        raise ThemeConfigError("Theme must define [colors], [styles] and [icons]")
+        _store_cached(fingerprint, sections)
 
-    return Theme(styles), colors, icons
+    return Theme(sections["styles"]), sections["colors"], sections["icons"]
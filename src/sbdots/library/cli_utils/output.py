@@ -1,4 +1,3 @@
-from pyfiglet import figlet_format
 from rich.text import Text
 from rich.style import Style
 from rich.console import Group
@@ -27,6 +26,9 @@ def print_rule(title: str = "SBDots") -> None:
 
 def print_ascii_art(text: str, font: str = "slant") -> None:
     """Print ASCII art title with gradient effect"""
+    # Imported here, it's only needed for headers
+    from pyfiglet import figlet_format
+
     ascii_art = figlet_format(text, font=font)
     lines = ascii_art.split("\n")
     styled_lines = []
@@ -1,63 +1,181 @@
 from __future__ import annotations
+import threading
 from typing import Optional
 
-from rich.text import Text
+from rich.console import Group
+from rich.filesize import decimal
 from rich.live import Live
+from rich.progress_bar import ProgressBar
 from rich.spinner import Spinner
+from rich.text import Text
 
 from .console import CONSOLE
 from ._base import panel, success, error, warning
 
+# Frames per second while nothing changes, just enough to keep the spinner moving
+IDLE_FPS = 4
+# Most frames per second on a burst of updates, they're coalesced past that
+MAX_FPS = 20
+# Percent steps at which progress is printed when not drawing on a terminal
+LINE_PERCENT_STEP = 10
+
 
 class SpinnerProgress:
-    """Context manager for showing a live console spinner."""
+    """
+    Context manager for showing a live console spinner.
+
+    The spinner is redrawn when its text or progress changes, at most
+    MAX_FPS times a second, and otherwise at IDLE_FPS, so long installs
+    spend next to no CPU drawing it. When the console isn't a terminal,
+    changes are printed as lines instead.
+    """
 
     def __init__(self, message: str, spinner_type: str = "dots", verbose: bool = False):
         self.message = message
         self.spinner_type = spinner_type
         self.verbose = verbose
+        # Draw on the terminal, or print lines when output is piped or logged
+        self.live_mode = not verbose and CONSOLE.is_terminal
 
         self.spinner = Spinner(self.spinner_type, text=message, style="text")
         self.live = Live(
             panel("Processing", self.spinner),
-            refresh_per_second=60,
+            auto_refresh=False,
             console=CONSOLE,
             transient=True,
         )
 
+        self._last_line: Optional[str] = None
+        self._last_step: Optional[tuple] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
     def _styled_text(self, text: str) -> Text:
         return Text(text, style="text")
 
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            changed = self._wake.wait(1 / IDLE_FPS)
+            if self._stop.is_set():
+                break
+            self._wake.clear()
+            self.live.refresh()
+            if changed:
+                # Let a burst of updates pile up into the next frame
+                self._stop.wait(1 / MAX_FPS)
+
+    def _changed(self) -> None:
+        if self.live_mode:
+            self._wake.set()
+
+    def _print_line(self, text: str) -> None:
+        if text != self._last_line:
+            self._last_line = text
+            CONSOLE.print(self._styled_text(text))
+
     def update_text(self, new_message: str) -> None:
         """Update the spinner text"""
         self.spinner.update(text=new_message, style="text")
+        if self.live_mode:
+            self.live.update(panel("Processing", self.spinner))
+            self._changed()
+        elif not self.verbose:
+            self._print_line(new_message)
+
+    def progress(
+        self,
+        text: Optional[str] = None,
+        *,
+        item: Optional[str] = None,
+        percent: Optional[float] = None,
+        current: Optional[int] = None,
+        total: Optional[int] = None,
+        done_bytes: Optional[int] = None,
+        total_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Show structured progress: 'text' (the spinner message by default)
+        followed by the current 'item', its position 'current'/'total', and a
+        bar for 'percent' or 'done_bytes'/'total_bytes'.
+        """
+        if percent is None and done_bytes is not None and total_bytes:
+            percent = 100 * done_bytes / total_bytes
+
+        parts = [text or self.message]
+        if item:
+            parts.append(item)
+        if current is not None and total:
+            parts.append(f"({current}/{total})")
+        if done_bytes is not None:
+            size = decimal(done_bytes)
+            parts.append(f"{size}/{decimal(total_bytes)}" if total_bytes else size)
+        line = " ".join(parts)
+
+        if self.live_mode:
+            self.spinner.update(text=line, style="text")
+            content = self.spinner
+            if percent is not None:
+                bar = ProgressBar(total=100, completed=min(100.0, percent), width=54)
+                content = Group(self.spinner, bar)
+            self.live.update(panel("Processing", content))
+            self._changed()
+        elif not self.verbose:
+            # One line per item, and per LINE_PERCENT_STEP of its progress
+            step = (
+                text,
+                item,
+                current,
+                None if percent is None else int(percent // LINE_PERCENT_STEP),
+            )
+            if step != self._last_step:
+                self._last_step = step
+                suffix = "" if percent is None else f" {percent:.0f}%"
+                self._print_line(line + suffix)
+
+    def _show(self, renderable_panel, renderable_text) -> None:
+        if self.live_mode:
+            self.live.update(renderable_panel, refresh=True)
+        else:
+            CONSOLE.print(renderable_text)
 
     def success(self, message: str, details: Optional[str] = None) -> None:
         """Show success message in a panel"""
-        if not self.verbose:
-            self.live.update(success(message, details=details, use_panel=True))
-        else:
-            CONSOLE.print(success(message, details=details, use_panel=False))
+        self._show(
+            success(message, details=details, use_panel=True),
+            success(message, details=details, use_panel=False),
+        )
 
     def error(self, message: str, details: Optional[str] = None) -> None:
         """Show error message in a panel"""
-        if not self.verbose:
-            self.live.update(error(message, details=details, use_panel=True))
-        else:
-            CONSOLE.print(error(message, details=details, use_panel=False))
+        self._show(
+            error(message, details=details, use_panel=True),
+            error(message, details=details, use_panel=False),
+        )
 
     def warning(self, message: str, details: Optional[str] = None) -> None:
         """Show warning message in a panel"""
-        if not self.verbose:
-            self.live.update(warning(message, details=details, use_panel=True))
-        else:
-            CONSOLE.print(warning(message, details=details, use_panel=False))
+        self._show(
+            warning(message, details=details, use_panel=True),
+            warning(message, details=details, use_panel=False),
+        )
 
     def __enter__(self):
-        if not self.verbose:
-            self.live.start()
+        if self.live_mode:
+            self.live.start(refresh=True)
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="spinner-refresh", daemon=True
+            )
+            self._refresher.start()
+        elif not self.verbose:
+            self._print_line(self.message)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if not self.verbose:
+        if self.live_mode:
+            self._stop.set()
+            if self._refresher is not None:
+                self._refresher.join()
+                self._refresher = None
             self.live.stop()
@@ -0,0 +1,383 @@
+"""
+SQLite clipboard history, for histories far larger than the text files of
+clip_history.py allow.
+
+Enabled with 'backend = sqlite' in the [clipboard] settings. Payloads still
+live in the blob store (see clip_store.py), the database holds one row per
+blob plus a full-text index over the clip text:
+
+- Rows are keyed by an integer id that always grows, a re-copied clip is
+  moved to a new id, so 'ORDER BY id DESC' is newest first straight from the
+  primary key, for the menu and for FTS5, which streams matches by rowid.
+- 'hash' is unique, dedupe is one index lookup.
+- 'last_used' is indexed, so age based retention only visits expired rows.
+- clips_fts is a trigram FTS5 index, any 3+ character substring is a lookup.
+
+The database runs in WAL mode: the listener daemon, the only writer, never
+blocks readers such as the actions daemon. Statements are module constants
+so sqlite3's statement cache keeps them prepared across calls.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from sbdots.library.clip_store import ClipRecord
+from sbdots.library.config_utils import get_config
+from sbdots.library.logger import get_caller_logger
+from sbdots.constants import (
+    CLIP_DB_FILE,
+    CLIP_DB_MAX_AGE_DAYS,
+    CLIP_DB_MAX_ENTRIES,
+    CLIP_DB_MAX_SIZE_MB,
+    CLIPBOARD_SECTION,
+)
+
+# Characters of a text clip added to the full-text index
+INDEXED_TEXT_LENGTH = 64 * 1024
+# Results returned by search() unless told otherwise
+SEARCH_LIMIT = 500
+# Shortest term the trigram index can look up
+_TRIGRAM = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    mime TEXT NOT NULL,
+    preview TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clips_last_used ON clips(last_used);
+CREATE VIRTUAL TABLE IF NOT EXISTS clips_fts USING fts5(text, tokenize = '{tokenizer}');
+CREATE TRIGGER IF NOT EXISTS clips_delete AFTER DELETE ON clips BEGIN
+    DELETE FROM clips_fts WHERE rowid = old.id;
+END;
+"""
+
+_DEDUPE = "DELETE FROM clips WHERE hash = ? RETURNING size"
+_INSERT = (
+    "INSERT INTO clips (hash, mime, preview, size, last_used) VALUES (?, ?, ?, ?, ?)"
+)
+_INSERT_TEXT = "INSERT INTO clips_fts (rowid, text) VALUES (?, ?)"
+_DELETE = "DELETE FROM clips WHERE id = ?"
+_TOTALS = "SELECT count(*), coalesce(sum(size), 0) FROM clips"
+_OLDEST = "SELECT id, hash, size FROM clips ORDER BY id"
+_EXPIRED = "SELECT id, hash, size FROM clips WHERE last_used < ?"
+_ENTRIES = "SELECT hash, mime, preview FROM clips ORDER BY id DESC"
+_BY_PREFIX = (
+    "SELECT hash, mime, preview FROM clips WHERE hash >= ? AND hash < ? LIMIT 2"
+)
+_SEARCH = """
+SELECT c.hash, c.mime, c.preview FROM clips_fts
+JOIN clips AS c ON c.id = clips_fts.rowid
+WHERE clips_fts MATCH ? ORDER BY clips_fts.rowid DESC
+"""
+
+
+def get_options(logger: Optional[logging.Logger] = None) -> dict[str, Any]:
+    """
+    Load the [clipboard] settings: the history backend ('file' or 'sqlite')
+    and the SQLite retention limits, with defaults for missing or invalid keys.
+    """
+    logger = logger or get_caller_logger()
+
+    options: dict[str, Any] = {
+        "backend": get_config("backend", section=CLIPBOARD_SECTION, logger=logger)
+        or "file"
+    }
+    for key, default in (
+        ("max_entries", CLIP_DB_MAX_ENTRIES),
+        ("max_age_days", CLIP_DB_MAX_AGE_DAYS),
+        ("max_size_mb", CLIP_DB_MAX_SIZE_MB),
+    ):
+        value = get_config(key, section=CLIPBOARD_SECTION, logger=logger)
+        try:
+            options[key] = default if value is None else max(0, int(value))
+        except ValueError:
+            logger.warning(
+                f"Invalid clipboard setting {key} = '{value}', using {default}"
+            )
+            options[key] = default
+    return options
+
+
+def _fts_query(terms: list[str]) -> str:
+    """AND of the terms, each quoted as a phrase so FTS5 syntax is matched literally."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def indexed_text(record: ClipRecord, data: bytes) -> str:
+    """The text of a clip added to the full-text index, its preview for non-text clips."""
+    if not record.is_text:
+        return record.preview
+    # UTF-8 takes at most 4 bytes per character
+    text = data[: INDEXED_TEXT_LENGTH * 4].decode("utf-8", errors="ignore")
+    return text[:INDEXED_TEXT_LENGTH]
+
+
+def _tokenizer(conn: sqlite3.Connection) -> str:
+    """'trigram' for substring search, on SQLite builds that have it (3.34+)."""
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE temp.probe USING fts5(x, tokenize = 'trigram')"
+        )
+        conn.execute("DROP TABLE temp.probe")
+        return "trigram"
+    except sqlite3.OperationalError:
+        return "unicode61"
+
+
+class ClipDB:
+    """
+    SQLite clipboard history. The listener daemon opens it read-write, pickers
+    with 'readonly=True', which never creates or changes the database.
+    """
+
+    def __init__(
+        self,
+        path: Path = CLIP_DB_FILE,
+        max_entries: int = CLIP_DB_MAX_ENTRIES,
+        max_age_days: float = CLIP_DB_MAX_AGE_DAYS,
+        max_size_mb: float = CLIP_DB_MAX_SIZE_MB,
+        readonly: bool = False,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.readonly = readonly
+        self.logger = logger or get_caller_logger()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inode: Optional[int] = None
+        self._count = 0
+        self._bytes = 0
+        # One connection, shared by the threads of the actions daemon
+        self._lock = threading.Lock()
+
+    # =========================================================================
+    # CONNECTION
+    # =========================================================================
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Return the connection, opening it first. None if a reader finds no database."""
+        if self._conn is not None:
+            return self._conn
+
+        if self.readonly:
+            if not self.path.exists():
+                return None
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+        if self.readonly:
+            conn.execute("PRAGMA query_only = 1")
+        else:
+            self.path.chmod(0o600)
+            with conn:
+                conn.executescript(_SCHEMA.format(tokenizer=_tokenizer(conn)))
+            self._count, self._bytes = conn.execute(_TOTALS).fetchone()
+
+        self._conn = conn
+        self._inode = self.path.stat().st_ino
+        return conn
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        """Return the connection to write through, only readers may lack a database."""
+        conn = self._connect()
+        if conn is None:
+            raise FileNotFoundError(f"No clipboard database at '{self.path}'")
+        return conn
+
+    def load(self) -> None:
+        """Open the database, creating it if needed, and apply retention."""
+        with self._lock:
+            conn = self._writer_conn()
+            with conn:
+                evicted = self._enforce_retention()
+        self.logger.info(
+            f"Loaded {self._count} clipboard entries from {self.path.name}"
+            + (f", expired {len(evicted)}" if evicted else "")
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def signature(self) -> Optional[tuple[int, int]]:
+        """
+        Changes whenever another connection commits, or the database file is
+        replaced. None without a database.
+        """
+        with self._lock:
+            try:
+                inode = self.path.stat().st_ino
+            except FileNotFoundError:
+                inode = None
+            if inode != self._inode and self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+            conn = self._connect()
+            if conn is None or self._inode is None:
+                return None
+            return self._inode, conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # =========================================================================
+    # WRITING
+    # =========================================================================
+    def add(self, record: ClipRecord, data: bytes) -> list[str]:
+        """
+        Add the clip, or move it to the front if it's already in the history.
+        Returns the hashes of the entries evicted by retention, whose blobs
+        are no longer referenced.
+        """
+        text = indexed_text(record, data)
+        with self._lock:
+            conn = self._writer_conn()
+            with conn:
+                self._dedupe(conn, record)
+                self._insert(conn, record, len(data), text, time.time())
+                return self._enforce_retention()
+
+    def import_records(self, records: Iterable[tuple[ClipRecord, int, str]]) -> int:
+        """
+        Add (record, size, text) tuples, oldest first, in a single transaction.
+        Used to carry over the file based history, returns how many were added.
+        """
+        added = 0
+        with self._lock:
+            conn = self._writer_conn()
+            now = time.time()
+            with conn:
+                for record, size, text in records:
+                    self._dedupe(conn, record)
+                    self._insert(conn, record, size, text, now)
+                    added += 1
+                self._enforce_retention()
+        return added
+
+    def _dedupe(self, conn: sqlite3.Connection, record: ClipRecord) -> None:
+        for (size,) in conn.execute(_DEDUPE, (record.hash,)).fetchall():
+            self._count -= 1
+            self._bytes -= size
+
+    def _insert(
+        self,
+        conn: sqlite3.Connection,
+        record: ClipRecord,
+        size: int,
+        text: str,
+        last_used: float,
+    ) -> None:
+        cursor = conn.execute(
+            _INSERT, (record.hash, record.mime, record.preview, size, last_used)
+        )
+        conn.execute(_INSERT_TEXT, (cursor.lastrowid, text))
+        self._count += 1
+        self._bytes += size
+
+    def _enforce_retention(self) -> list[str]:
+        """
+        Drop entries past the age, count and size limits, oldest first.
+        Needs self._lock, the caller commits.
+        """
+        conn = self._conn
+        assert conn is not None
+        doomed: list[tuple[int, str, int]] = []
+
+        if self.max_age:
+            doomed.extend(conn.execute(_EXPIRED, (time.time() - self.max_age,)))
+
+        count = self._count - len(doomed)
+        size = self._bytes - sum(s for _, _, s in doomed)
+        over_count = self.max_entries and count > self.max_entries
+        over_size = self.max_bytes and size > self.max_bytes
+
+        if over_count or over_size:
+            seen = {row[0] for row in doomed}
+            for row in conn.execute(_OLDEST):
+                if not (
+                    (self.max_entries and count > self.max_entries)
+                    or (self.max_bytes and size > self.max_bytes)
+                ):
+                    break
+                if row[0] in seen:
+                    continue
+                doomed.append(row)
+                count -= 1
+                size -= row[2]
+
+        if not doomed:
+            return []
+
+        conn.executemany(_DELETE, ((row[0],) for row in doomed))
+        self._count -= len(doomed)
+        self._bytes -= sum(row[2] for row in doomed)
+        return [row[1] for row in doomed]
+
+    # =========================================================================
+    # READING
+    # =========================================================================
+    def _rows(self, sql: str, params: tuple = ()) -> Iterator[ClipRecord]:
+        conn = self._connect()
+        if conn is None:
+            return
+        for row in conn.execute(sql, params):
+            yield ClipRecord(*row)
+
+    def entries(self) -> list[ClipRecord]:
+        """Return the history, newest first."""
+        with self._lock:
+            return list(self._rows(_ENTRIES))
+
+    def get(self, prefix: str) -> Optional[ClipRecord]:
+        """Return the entry whose hash starts with 'prefix', None if there's no single one."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return None
+        with self._lock:
+            # Hashes are hex, '~' sorts after every character they're made of
+            matches = list(self._rows(_BY_PREFIX, (prefix, prefix + "~")))
+        return matches[0] if len(matches) == 1 else None
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> list[ClipRecord]:
+        """
+        Return up to 'limit' entries containing every term of 'query',
+        case-insensitively, newest first. Terms of 3+ characters are looked
+        up in the full-text index, shorter ones filter previews.
+        """
+        terms = query.lower().split()
+        indexed = [t for t in terms if len(t) >= _TRIGRAM]
+        short = [t for t in terms if len(t) < _TRIGRAM]
+
+        with self._lock:
+            if indexed:
+                rows = self._rows(_SEARCH, (_fts_query(indexed),))
+            else:
+                rows = self._rows(_ENTRIES)
+
+            results = []
+            for record in rows:
+                preview = record.preview.lower()
+                if all(t in preview for t in short):
+                    results.append(record)
+                    if len(results) >= limit:
+                        break
+            return results
@@ -0,0 +1,198 @@
+"""
+Clipboard history storage.
+
+History lives in memory as an ordered dict (oldest first), so dedupe and
+move-to-front are O(1). On disk it's a snapshot file (one clip per line,
+oldest first) plus an append-only journal of clips added since. Reading
+'snapshot + journal', newest first and keeping the first occurrence of each
+line, gives the current history:
+
+    cat cliphist cliphist.journal | tac | awk '!seen[$0]++'
+
+Once the journal grows past JOURNAL_COMPACT_AT records it's folded into a
+fresh snapshot in the background. Compaction holds an exclusive lock on the
+lock file while swapping files; readers take a shared one, appends none.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from fcntl import flock, LOCK_EX, LOCK_SH, LOCK_UN
+from pathlib import Path
+from typing import Callable, Generator, Optional
+
+from sbdots.library.logger import get_caller_logger
+from sbdots.constants import (
+    CACHE_FILE,
+    CLIP_JOURNAL_FILE,
+    CLIP_LOCK_FILE,
+    JOURNAL_COMPACT_AT,
+    MAX_ENTRIES,
+)
+
+
+@contextmanager
+def _locked(lock_file: Path, mode: int) -> Generator[None, None, None]:
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        flock(fd, mode)
+        yield
+    finally:
+        flock(fd, LOCK_UN)
+        os.close(fd)
+
+
+def _read_lines(path: Path) -> list[str]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+            return [line.rstrip("\n") for line in fh if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _replay(lines: list[str], max_entries: int) -> OrderedDict[str, None]:
+    history: OrderedDict[str, None] = OrderedDict()
+    for line in lines:
+        history[line] = None
+        history.move_to_end(line)
+    while len(history) > max_entries:
+        history.popitem(last=False)
+    return history
+
+
+def read_entries(
+    snapshot: Path = CACHE_FILE,
+    journal: Path = CLIP_JOURNAL_FILE,
+    lock_file: Path = CLIP_LOCK_FILE,
+    max_entries: int = MAX_ENTRIES,
+) -> list[str]:
+    """Return the clipboard history, newest first, under a shared lock."""
+    with _locked(lock_file, LOCK_SH):
+        lines = _read_lines(snapshot) + _read_lines(journal)
+    return list(reversed(_replay(lines, max_entries)))
+
+
+class ClipHistory:
+    """Clipboard history of the listener daemon, the only writer."""
+
+    def __init__(
+        self,
+        snapshot: Path = CACHE_FILE,
+        journal: Path = CLIP_JOURNAL_FILE,
+        lock_file: Path = CLIP_LOCK_FILE,
+        max_entries: int = MAX_ENTRIES,
+        compact_at: int = JOURNAL_COMPACT_AT,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.snapshot = snapshot
+        self.journal = journal
+        self.lock_file = lock_file
+        self.max_entries = max_entries
+        self.compact_at = compact_at
+        self.logger = logger or get_caller_logger()
+
+        self._entries: OrderedDict[str, None] = OrderedDict()
+        self._journal_records = 0
+        self._journal_fd: Optional[int] = None
+        # Guards the entries and journal, appends and compaction run on different threads
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+
+    def load(self) -> None:
+        """Load history from disk and fold any leftover journal into the snapshot."""
+        self.snapshot.parent.mkdir(parents=True, exist_ok=True)
+        with _locked(self.lock_file, LOCK_SH):
+            lines = _read_lines(self.snapshot) + _read_lines(self.journal)
+
+        with self._lock:
+            self._entries = _replay(lines, self.max_entries)
+        self.compact()
+        self.logger.info(f"Loaded {len(self._entries)} clipboard entries")
+
+    def __contains__(self, clip: str) -> bool:
+        return clip in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> list[str]:
+        """Return the history, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def add(self, clip: str) -> Optional[str]:
+        """
+        Add 'clip', or move it to the front if it's already in the history.
+        Returns the entry evicted to stay within 'max_entries', if any.
+        """
+        evicted = None
+        with self._lock:
+            if clip in self._entries:
+                self._entries.move_to_end(clip)
+            else:
+                self._entries[clip] = None
+                if len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+
+            # A single O_APPEND write of one line, readers never see half a record
+            if self._journal_fd is None:
+                self._journal_fd = os.open(
+                    self.journal, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600
+                )
+            os.write(self._journal_fd, (clip + "\n").encode("utf-8"))
+            self._journal_records += 1
+            needs_compaction = self._journal_records >= self.compact_at
+
+        if needs_compaction:
+            self.compact_in_background()
+        return evicted
+
+    def rewrite(self, func: Callable[[str], Optional[str]]) -> None:
+        """Replace every entry with func(entry), dropping None, and compact."""
+        with self._lock:
+            rewritten: OrderedDict[str, None] = OrderedDict()
+            for entry in self._entries:
+                new = func(entry)
+                if new is not None:
+                    rewritten[new] = None
+                    rewritten.move_to_end(new)
+            self._entries = rewritten
+        self.compact()
+
+    def compact_in_background(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=self.compact, name="cliphist-compact", daemon=True
+        )
+        self._compactor.start()
+
+    def compact(self) -> None:
+        """Write the history to a fresh snapshot and empty the journal."""
+        tmp = self.snapshot.with_name(f".{self.snapshot.name}.tmp")
+
+        with self._lock, _locked(self.lock_file, LOCK_EX):
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.writelines(entry + "\n" for entry in self._entries)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.snapshot)
+
+            if self._journal_fd is not None:
+                os.close(self._journal_fd)
+                self._journal_fd = None
+            self.journal.unlink(missing_ok=True)
+            self._journal_records = 0
+
+        self.logger.debug(f"Compacted clipboard history, {len(self._entries)} entries")
+
+    def close(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+        self.compact()
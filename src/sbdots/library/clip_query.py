@@ -0,0 +1,174 @@
+"""
+Read side of the clipboard history, for pickers.
+
+ClipMenu keeps the history rendered as a newest-first menu of
+'<id>\\t<preview>' lines, re-reading the index only when its files changed,
+so a picker opens instantly whatever the history size. IDs are hash
+prefixes of the payloads, stable across restarts. search() fuzzy-filters the
+menu, incrementally when the query extends the previous one.
+
+With the SQLite backend (see clip_db.py) ClipDBMenu serves the same
+interface, searching the database's full-text index instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from sbdots.library.clip_db import ClipDB, get_options
+from sbdots.library.clip_history import read_entries
+from sbdots.library.clip_store import ClipRecord
+from sbdots.constants import CACHE_FILE, CLIP_DB_FILE, CLIP_JOURNAL_FILE, CLIP_LOCK_FILE
+
+ID_LENGTH = 12
+
+_WORD_START = " /\\_-.:,;([{\"'"
+
+
+def fuzzy_score(query: str, text: str) -> Optional[int]:
+    """
+    Score 'text' against 'query', None if it doesn't match.
+
+    Every whitespace separated term must appear in 'text' as a
+    case-insensitive subsequence. Consecutive characters and matches at
+    word starts score higher, gaps lower.
+    """
+    text = text.lower()
+    score = 0
+
+    for term in query.lower().split():
+        pos = prev = -1
+        for ch in term:
+            pos = text.find(ch, pos + 1)
+            if pos < 0:
+                return None
+            if pos == prev + 1 and prev >= 0:
+                score += 3
+            elif pos == 0 or text[pos - 1] in _WORD_START:
+                score += 2
+            else:
+                score -= min(pos - prev - 1, 3) if prev >= 0 else 0
+            prev = pos
+
+    return score
+
+
+class ClipMenu:
+    """Cached, newest-first menu of the clipboard history."""
+
+    def __init__(
+        self,
+        snapshot: Path = CACHE_FILE,
+        journal: Path = CLIP_JOURNAL_FILE,
+        lock_file: Path = CLIP_LOCK_FILE,
+    ):
+        self.snapshot = snapshot
+        self.journal = journal
+        self.lock_file = lock_file
+
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._records: list[ClipRecord] = []
+        self._by_id: dict[str, ClipRecord] = {}
+        self._menu = ""
+        self._last_query: Optional[str] = None
+        self._last_matches: list[ClipRecord] = []
+
+    def _stat_signature(self) -> tuple:
+        signature = []
+        for path in (self.snapshot, self.journal):
+            try:
+                st = path.stat()
+                signature.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _refresh(self) -> None:
+        """Re-read the index if it changed since the last call. Needs self._lock."""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+
+        records = self._read_records()
+
+        self._records = records
+        self._by_id = {r.hash[:ID_LENGTH]: r for r in records}
+        self._menu = "".join(self.render_line(r) + "\n" for r in records)
+        self._signature = signature
+        self._last_query = None
+
+    def _read_records(self) -> list[ClipRecord]:
+        lines = read_entries(self.snapshot, self.journal, self.lock_file)
+        return [r for r in map(ClipRecord.from_line, lines) if r is not None]
+
+    @staticmethod
+    def render_line(record: ClipRecord) -> str:
+        return f"{record.hash[:ID_LENGTH]}\t{record.preview}"
+
+    def menu(self) -> str:
+        """Return the whole menu, one '<id>\\t<preview>' line per entry."""
+        with self._lock:
+            self._refresh()
+            return self._menu
+
+    def search(self, query: str) -> list[ClipRecord]:
+        """Return the entries matching 'query', best match first."""
+        with self._lock:
+            self._refresh()
+
+            # Extending the previous query can only narrow its matches
+            candidates = self._records
+            if self._last_query is not None and query.startswith(self._last_query):
+                candidates = self._last_matches
+
+            scored = []
+            for record in candidates:
+                score = fuzzy_score(query, record.preview)
+                if score is not None:
+                    scored.append((score, record))
+
+            self._last_query = query
+            self._last_matches = [record for _, record in scored]
+
+            # Sort is stable, so equal scores keep the newest first
+            scored.sort(key=lambda item: item[0], reverse=True)
+            return [record for _, record in scored]
+
+    def get(self, clip_id: str) -> Optional[ClipRecord]:
+        with self._lock:
+            self._refresh()
+            return self._by_id.get(clip_id.strip())
+
+
+class ClipDBMenu(ClipMenu):
+    """
+    ClipMenu over the SQLite history. The menu is cached the same way, search()
+    and get() go to the database: substring matches, newest first.
+    """
+
+    def __init__(self, db_file: Path = CLIP_DB_FILE):
+        super().__init__()
+        self.db = ClipDB(db_file, readonly=True)
+
+    def _stat_signature(self) -> tuple:
+        return (self.db.signature(),)
+
+    def _read_records(self) -> list[ClipRecord]:
+        return self.db.entries()
+
+    def search(self, query: str) -> list[ClipRecord]:
+        return self.db.search(query)
+
+    def get(self, clip_id: str) -> Optional[ClipRecord]:
+        return self.db.get(clip_id)
+
+
+def open_menu(logger: Optional[logging.Logger] = None) -> ClipMenu:
+    """Return the menu for the configured history backend."""
+    if get_options(logger)["backend"] == "sqlite":
+        return ClipDBMenu()
+    return ClipMenu()
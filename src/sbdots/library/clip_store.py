@@ -0,0 +1,159 @@
+"""
+Content-addressed storage for clipboard payloads.
+
+Each payload is stored once, as a blob named after its sha256 under
+CLIP_BLOB_DIR. The history index (see clip_history.py) only holds one
+'<hash>\\t<mime>\\t<preview>' record per clip, so large pastes, multi-line
+snippets and images never bloat the file the rofi applet reads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sbdots.library import tracing
+from sbdots.constants import CLIP_BLOB_DIR, PREVIEW_LENGTH
+
+# Text targets, most preferred first
+TEXT_TYPES = ["text/plain;charset=utf-8", "UTF8_STRING", "text/plain", "STRING", "TEXT"]
+# Offers carrying one of these are never stored, i.e: passwords
+SECRET_TYPES = {"x-kde-passwordManagerHint"}
+
+_HASH_RE = re.compile(r"[0-9a-f]{64}")
+
+
+@dataclass(frozen=True)
+class ClipRecord:
+    """One clipboard history entry, as stored in the index."""
+
+    hash: str
+    mime: str
+    preview: str
+
+    def to_line(self) -> str:
+        return f"{self.hash}\t{self.mime}\t{self.preview}"
+
+    @classmethod
+    def from_line(cls, line: str) -> Optional["ClipRecord"]:
+        """Parse an index line, None if it isn't a record."""
+        parts = line.split("\t", 2)
+        if len(parts) != 3 or not _HASH_RE.fullmatch(parts[0]):
+            return None
+        return cls(*parts)
+
+    @property
+    def is_text(self) -> bool:
+        return self.mime in TEXT_TYPES or self.mime.startswith("text/")
+
+
+def choose_type(types: Iterable[str]) -> Optional[str]:
+    """
+    Pick the MIME type to store from the offered ones: plain text, then
+    images, then any other text. None if nothing is worth storing.
+    """
+    offered = [t.strip() for t in types if t.strip()]
+    if SECRET_TYPES.intersection(offered):
+        return None
+
+    for mime in TEXT_TYPES:
+        if mime in offered:
+            return mime
+    for prefix in ("image/", "text/"):
+        for mime in offered:
+            if mime.startswith(prefix):
+                return mime
+    return None
+
+
+def list_types(timeout: float = 1) -> list[str]:
+    """Return the MIME types the current clipboard offer provides."""
+    p = tracing.run(
+        ["wl-paste", "--list-types"], capture_output=True, text=True, timeout=timeout
+    )
+    if p.returncode != 0:
+        return []
+    return p.stdout.splitlines()
+
+
+def paste(mime: str, timeout: float = 1) -> Optional[bytes]:
+    """Return the clipboard content as 'mime', None on failure."""
+    p = tracing.run(
+        ["wl-paste", "--no-newline", "--type", mime],
+        capture_output=True,
+        timeout=timeout,
+    )
+    if p.returncode != 0:
+        return None
+    return p.stdout
+
+
+def _human_size(size: float) -> str:
+    if size < 1024:
+        return f"{size:.0f} B"
+    for unit in ("KiB", "MiB", "GiB"):
+        size /= 1024
+        if size < 1024 or unit == "GiB":
+            break
+    return f"{size:.1f} {unit}"
+
+
+def make_preview(data: bytes, mime: str, length: int = PREVIEW_LENGTH) -> str:
+    """Return a single line preview of the payload."""
+    if mime in TEXT_TYPES or mime.startswith("text/"):
+        text = " ".join(data.decode("utf-8", errors="replace").split())
+        if len(text) > length:
+            text = text[: length - 1] + "…"
+        return text
+
+    return f"[{mime}, {_human_size(len(data))}]"
+
+
+def blob_path(digest: str, blob_dir: Path = CLIP_BLOB_DIR) -> Path:
+    return blob_dir / digest
+
+
+def store(data: bytes, mime: str, blob_dir: Path = CLIP_BLOB_DIR) -> ClipRecord:
+    """Store the payload, once, and return its index record."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest, blob_dir)
+
+    if not path.exists():
+        blob_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        tmp = path.with_name(f".{digest}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    return ClipRecord(digest, mime, make_preview(data, mime))
+
+
+def load(record: ClipRecord, blob_dir: Path = CLIP_BLOB_DIR) -> bytes:
+    return blob_path(record.hash, blob_dir).read_bytes()
+
+
+def remove_unreferenced(
+    records: Iterable[ClipRecord], blob_dir: Path = CLIP_BLOB_DIR
+) -> int:
+    """Delete blobs no record points to, return how many were deleted."""
+    referenced = {r.hash for r in records}
+    removed = 0
+    try:
+        paths = list(blob_dir.iterdir())
+    except FileNotFoundError:
+        return 0
+
+    for path in paths:
+        if _HASH_RE.fullmatch(path.name) and path.name not in referenced:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
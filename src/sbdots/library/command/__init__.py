@@ -1,4 +1,24 @@
-from .matugen import MatugenImage
-from .notify_send import notify_send
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-__all__ = ["MatugenImage", "notify_send"]
+if TYPE_CHECKING:
+    from .matugen import MatugenImage, MatugenColor
+    from .notify_send import notify_send
+
+# name -> submodule, imported on first access (PEP 562): an action sending a
+# notification doesn't need to load the matugen wrapper
+_EXPORTS = {
+    "MatugenImage": ".matugen",
+    "MatugenColor": ".matugen",
+    "notify_send": ".notify_send",
+}
+
+__all__ = ["MatugenImage", "MatugenColor", "notify_send"]
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import json
 import logging
 import subprocess
 from pathlib import Path
-from typing import Optional, Literal, Union
+from typing import Any, Optional, Literal, Union
 
-from ..config_utils import get_config, set_config
+from ..color_extract import extract_source_color
+from ..config_utils import get_config, get_section, set_config
+from .. import tracing
+from ..exceptions import ColorExtractionError
 from sbdots.constants import MATUGEN_SECTION
 
 # Type definitions for matugen options
@@ -31,10 +35,14 @@ Prefer = Literal[
     "closest-to-fallback",
 ]
 
+# Who picks the source color of an image: 'matugen image' (the default), or
+# sbdots in-process
+Extractor = Literal["sbdots", "matugen"]
 
-class MatugenImage:
+
+class _Matugen:
     """
-    Wrapper for the 'matugen image' command
+    Settings, command building and execution shared by the matugen wrappers
     """
 
     def __init__(self, logger: Optional[logging.Logger] = None):
@@ -54,8 +62,105 @@ class MatugenImage:
         """Set a configuration value in the settings file"""
         return set_config(key, value, section=MATUGEN_SECTION, logger=self.logger)
 
+    def get_options(self) -> dict[str, str]:
+        """
+        Load matugen options from the settings file
+
+        Returns:
+            Mapping of option name to value, with defaults for missing keys
+        """
+        settings = get_section(MATUGEN_SECTION, logger=self.logger)
+
+        # Set defaults if not in settings.ini
+        return {
+            "source_color_index": settings.get("source_color_index", "0"),
+            "prefer": settings.get("prefer", "closest-to-fallback"),
+            "fallback_color": settings.get("fallback_color", "#ca9ee6"),
+            "mode": settings.get("mode", "light"),
+            "type": settings.get("type", "scheme-expressive"),
+            "extractor": settings.get("extractor", "matugen"),
+        }
+
+    def _add_common_flags(
+        self,
+        cmd: list[str],
+        options: dict[str, str],
+        dry_run: bool,
+        json_format: Optional[str],
+    ) -> list[str]:
+        """
+        Append the flags every matugen subcommand takes to 'cmd'
+
+        Args:
+            cmd: Command built so far
+            options: Loaded matugen options
+            dry_run: If True, add --dry-run flag to the command
+            json_format: If given, print the generated colors as json in this format
+
+        Returns:
+            The completed command
+        """
+        cmd.extend(["-m", options["mode"]])
+        cmd.extend(["-t", options["type"]])
+
+        if json_format:
+            cmd.extend(["--json", json_format])
+
+        # Add dry-run flag if specified
+        if dry_run:
+            cmd.append("--dry-run")
+
+        self.logger.debug(f"Built command: {' '.join(cmd)}")
+        return cmd
+
+    def _run(
+        self, cmd: list[str], check: bool, capture_output: bool
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a built matugen command, logging failures
+
+        Args:
+            cmd: Command to run
+            check: Whether to check return code (raises CalledProcessError on non-zero exit)
+            capture_output: Whether to capture stdout/stderr
+
+        Returns:
+            CompletedProcess instance with command output
+        """
+        self.logger.debug(f"Full command: {' '.join(cmd)}")
+
+        try:
+            if capture_output:
+                result = tracing.run(cmd, capture_output=True, text=True, check=check)
+            else:
+                result = tracing.run(cmd, check=check)
+
+            self.logger.info("Matugen command completed successfully")
+            return result
+
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Matugen command failed with exit code {e.returncode}")
+            if hasattr(e, "stderr") and e.stderr:
+                self.logger.error(f"Stderr: {e.stderr}")
+            raise
+        except FileNotFoundError:
+            self.logger.error(
+                "matugen command not found. Please ensure matugen is installed and in PATH"
+            )
+            raise
+
+
+class MatugenImage(_Matugen):
+    """
+    Wrapper for the 'matugen image' command
+    """
+
     def _build_command(
-        self, image_path: Union[str, Path], dry_run: bool = False
+        self,
+        image_path: Union[str, Path],
+        dry_run: bool = False,
+        json_format: Optional[str] = None,
+        options: Optional[dict[str, str]] = None,
     ) -> list[str]:
         """
         Build the matugen command with current configuration
@@ -63,6 +168,8 @@ class MatugenImage:
         Args:
             image_path: Path to the image file
             dry_run: If True, add --dry-run flag to the command
+            json_format: If given, print the generated colors as json in this format
+            options: Pre-loaded options, read from the settings file if None
 
         Returns:
             List of command arguments
@@ -72,33 +179,91 @@ class MatugenImage:
         # Add image path
         cmd.append(str(image_path))
 
-        # Get configuration values
-        _source_color_index = self._get_config_value("source_color_index")
-        _prefer = self._get_config_value("prefer")
-        _fallback_color = self._get_config_value("fallback_color")
-        _mode = self._get_config_value("mode")
-        _scheme_type = self._get_config_value("type")
-
-        # Set defaults if not in settings.ini
-        source_color_index = "0" if _source_color_index is None else _source_color_index
-        prefer = "closest-to-fallback" if _prefer is None else _prefer
-        fallback_color = "#ca9ee6" if _fallback_color is None else _fallback_color
-        mode = "light" if _mode is None else _mode
-        scheme_type = "scheme-expressive" if _scheme_type is None else _scheme_type
+        if options is None:
+            options = self.get_options()
 
         # Add options
-        cmd.extend(["--source-color-index", source_color_index])
-        cmd.extend(["--prefer", prefer])
-        cmd.extend(["--fallback-color", fallback_color])
-        cmd.extend(["-m", mode])
-        cmd.extend(["-t", scheme_type])
+        cmd.extend(["--source-color-index", options["source_color_index"]])
+        cmd.extend(["--prefer", options["prefer"]])
+        cmd.extend(["--fallback-color", options["fallback_color"]])
 
-        # Add dry-run flag if specified
-        if dry_run:
-            cmd.append("--dry-run")
+        return self._add_common_flags(cmd, options, dry_run, json_format)
 
-        self.logger.debug(f"Built command: {' '.join(cmd)}")
-        return cmd
+    def _build_export_command(
+        self,
+        image_path: Union[str, Path],
+        json_format: str = "hex",
+        options: Optional[dict[str, str]] = None,
+    ) -> list[str]:
+        """
+        Build the command printing the image's colors as json, without writing templates
+
+        With the opt-in 'sbdots' extractor the source color is picked
+        in-process from a downsampled image and passed to 'matugen color',
+        falling back to 'matugen image' if the image can't be decoded.
+
+        Args:
+            image_path: Path to the image file
+            json_format: Color format of the exported json
+            options: Pre-loaded options, read from the settings file if None
+
+        Returns:
+            List of command arguments
+        """
+        if options is None:
+            options = self.get_options()
+
+        if options.get("extractor", "matugen") == "sbdots":
+            try:
+                color = extract_source_color(image_path, options)
+                self.logger.debug(f"Extracted source color {color} from {image_path}")
+                return MatugenColor(self.logger)._build_command(
+                    color, dry_run=True, json_format=json_format, options=options
+                )
+            except ColorExtractionError as e:
+                self.logger.warning(f"Falling back to 'matugen image': {e}")
+
+        return self._build_command(
+            image_path, dry_run=True, json_format=json_format, options=options
+        )
+
+    def export_json(
+        self,
+        image_path: Union[str, Path],
+        json_format: str = "hex",
+        options: Optional[dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        niceness: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """
+        Generate colors for an image without writing templates
+
+        Args:
+            image_path: Path to the image file
+            json_format: Color format of the exported json
+            options: Pre-loaded options, read from the settings file if None
+            timeout: Seconds to wait for matugen before giving up
+            niceness: If given, run matugen under 'nice' with this increment
+
+        Returns:
+            The colors json printed by matugen
+
+        Raises:
+            subprocess.CalledProcessError: If matugen returns non-zero exit code
+            ValueError: If matugen's output is not valid json
+        """
+        cmd = self._build_export_command(image_path, json_format, options)
+        if niceness is not None:
+            cmd = ["nice", "-n", str(niceness), *cmd]
+
+        result = tracing.run(
+            cmd, capture_output=True, text=True, check=True, timeout=timeout
+        )
+
+        try:
+            return json.loads(result.stdout)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid json from matugen for {image_path}: {e}") from e
 
     def execute(
         self,
@@ -135,26 +300,64 @@ class MatugenImage:
         cmd = self._build_command(image_path_obj, dry_run=dry_run)
 
         self.logger.info(f"Executing matugen command for image: {image_path}")
-        self.logger.debug(f"Full command: {' '.join(cmd)}")
+        return self._run(cmd, check, capture_output)
 
-        try:
-            if capture_output:
-                result = subprocess.run(
-                    cmd, capture_output=True, text=True, check=check
-                )
-            else:
-                result = subprocess.run(cmd, check=check)
 
-            self.logger.info("Matugen command completed successfully")
-            return result
+class MatugenColor(_Matugen):
+    """
+    Wrapper for the 'matugen color hex' command
 
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Matugen command failed with exit code {e.returncode}")
-            if hasattr(e, "stderr") and e.stderr:
-                self.logger.error(f"Stderr: {e.stderr}")
-            raise
-        except FileNotFoundError:
-            self.logger.error(
-                "matugen command not found. Please ensure matugen is installed and in PATH"
-            )
-            raise
+    Generates a theme straight from a source color, skipping image
+    decoding and quantization entirely.
+    """
+
+    def _build_command(
+        self,
+        color: str,
+        dry_run: bool = False,
+        json_format: Optional[str] = None,
+        options: Optional[dict[str, str]] = None,
+    ) -> list[str]:
+        """
+        Build the matugen command with current configuration
+
+        Args:
+            color: Source color as a hex string, i.e: '#ca9ee6'
+            dry_run: If True, add --dry-run flag to the command
+            json_format: If given, print the generated colors as json in this format
+            options: Pre-loaded options, read from the settings file if None
+
+        Returns:
+            List of command arguments
+        """
+        cmd = ["matugen", "color", "hex", color]
+
+        if options is None:
+            options = self.get_options()
+
+        # Image-only options (prefer, source color index, fallback) don't apply here
+        return self._add_common_flags(cmd, options, dry_run, json_format)
+
+    def execute(
+        self,
+        color: str,
+        dry_run: bool = False,
+        check: bool = True,
+        capture_output: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """
+        Execute the matugen color command
+
+        Args:
+            color: Source color as a hex string
+            dry_run: If True, add --dry-run flag (don't generate templates, reload apps, etc.)
+            check: Whether to check return code (raises CalledProcessError on non-zero exit)
+            capture_output: Whether to capture stdout/stderr
+
+        Returns:
+            CompletedProcess instance with command output
+        """
+        cmd = self._build_command(color, dry_run=dry_run)
+
+        self.logger.info(f"Executing matugen command for color: {color}")
+        return self._run(cmd, check, capture_output)
@@ -1,21 +1,89 @@
 from __future__ import annotations
 
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
 from pathlib import Path
 import subprocess
 from subprocess import CalledProcessError, CompletedProcess
 from shutil import which
 import shlex
-import sys
-import pexpect
 import logging
-from typing import Callable, Any, Optional
+from typing import TYPE_CHECKING, Callable, Any, Iterator, Optional
 
+from sbdots.library import tracing
 from sbdots.library.exceptions import CommandNotFound
-from sbdots.library.cli_utils import prompt, Spinner, print_error
-from sbdots.constants import COMMAND, SUDO_PROMPT_PATTERNS
+from sbdots.constants import (
+    ANSI_ESCAPE_RE,
+    COMMAND,
+    PKG_DOWNLOAD_RE,
+    PKG_ERROR_RE,
+    PKG_STEP_RE,
+    SUDO_PROMPT_PATTERNS,
+)
+
+if TYPE_CHECKING:
+    from sbdots.library.cli_utils import Spinner
 
 PATTERNS = SUDO_PROMPT_PATTERNS
 
+# Seconds between checks of the PATH directories' mtimes
+WHICH_CACHE_CHECK_SEC = 1.0
+
+_which_cache: dict[str, Optional[str]] = {}
+_which_signature: Optional[tuple] = None
+_which_checked = 0.0
+_which_lock = threading.Lock()
+
+
+def _path_signature(path: str) -> tuple:
+    mtimes = []
+    for directory in path.split(os.pathsep):
+        try:
+            mtimes.append(os.stat(directory or ".").st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return path, tuple(mtimes)
+
+
+def resolve_executable(name: str) -> Optional[str]:
+    """
+    Cached 'which(name)'. The cache is dropped when PATH changes, or when
+    any PATH directory's mtime does (a program was installed or removed),
+    checked at most every WHICH_CACHE_CHECK_SEC.
+    """
+    global _which_signature, _which_checked
+
+    path = os.environ.get("PATH", os.defpath)
+    now = time.monotonic()
+
+    with _which_lock:
+        stale = _which_signature is None or _which_signature[0] != path
+        if stale or now - _which_checked >= WHICH_CACHE_CHECK_SEC:
+            signature = _path_signature(path)
+            if signature != _which_signature:
+                _which_cache.clear()
+                _which_signature = signature
+            _which_checked = now
+
+        if name in _which_cache:
+            return _which_cache[name]
+
+    resolved = which(name)
+    with _which_lock:
+        _which_cache[name] = resolved
+    return resolved
+
+
+def clear_executable_cache() -> None:
+    global _which_signature
+    with _which_lock:
+        _which_cache.clear()
+        _which_signature = None
+
 
 def _pre_run(command: COMMAND, shell: bool) -> COMMAND:
     if not command:
@@ -28,7 +96,7 @@ def _pre_run(command: COMMAND, shell: bool) -> COMMAND:
     # check if executable is installed
     executable = command[0] if command[0] != "sudo" else command[1]
     if not shell:
-        if not which(executable):
+        if not resolve_executable(executable):
             raise CommandNotFound(command=executable or command)
 
     # Convert Path objects to strings
@@ -37,6 +105,15 @@ def _pre_run(command: COMMAND, shell: bool) -> COMMAND:
     return command
 
 
+def _error_message(str_cmd: str, returncode: Any, stdout: Any, stderr: Any) -> str:
+    return (
+        f"Subprocess error running: {str_cmd}\n"
+        f"returncode: {returncode}\n"
+        f"stdout: {stdout}\n"
+        f"stderr: {stderr}"
+    )
+
+
 def _run(command: COMMAND, run_func: Callable[..., Any], kwargs: dict[str, Any]) -> Any:
     """Base function to run commands"""
     command = _pre_run(command, kwargs.get("shell", False))
@@ -44,18 +121,21 @@ def _run(command: COMMAND, run_func: Callable[..., Any], kwargs: dict[str, Any])
     str_cmd = shlex.join(command)
 
     try:
-        return run_func(command, **kwargs)
+        with tracing.span(tracing.command_name(command), argv=command) as info:
+            result = run_func(command, **kwargs)
+            info["returncode"] = getattr(result, "returncode", 0)
+            return result
     except FileNotFoundError as e:
         missing = e.filename or str_cmd
         raise CommandNotFound(
             command=missing, stderr=e.strerror, return_code=e.errno
         ) from e
     except CalledProcessError as e:
-        msg = (
-            f"Subprocess error running: {str_cmd}\n"
-            f"returncode: {getattr(e, 'returncode', None)}\n"
-            f"stdout: {getattr(e, 'stdout', None)}\n"
-            f"stderr: {getattr(e, 'stderr', None)}"
+        msg = _error_message(
+            str_cmd,
+            getattr(e, "returncode", None),
+            getattr(e, "stdout", None),
+            getattr(e, "stderr", None),
         )
         raise RuntimeError(msg) from e
     except Exception as e:
@@ -89,109 +169,339 @@ def check_output(
     return _run(command, subprocess.check_output, kwargs)
 
 
-def _handle_input(child, spinner, timeout: int = 300):
-    """Password input handler for 'run_sudo_cmd'"""
-    # disable logging to avoid logging the password
-    log_snap = child.logfile
-    child.logfile = None
+async def _arun(
+    command: COMMAND, shell: bool, check: bool, timeout: Optional[float]
+) -> CompletedProcess:
+    """Base coroutine to run commands, same errors as '_run'"""
+    # Imported here, only async callers need it and they've loaded it already
+    import asyncio
+
+    if shell:
+        # Keep the string as is, the shell parses it
+        if not command:
+            raise ValueError("Command must be a non-empty list of strings.")
+        str_cmd = command if isinstance(command, str) else shlex.join(map(str, command))
+        args: list[str] = [str_cmd]
+    else:
+        args = _pre_run(command, False)
+        str_cmd = shlex.join(args)
+
+    try:
+        if shell:
+            proc = await asyncio.create_subprocess_shell(
+                str_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *args, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+    except FileNotFoundError as e:
+        missing = e.filename or str_cmd
+        raise CommandNotFound(
+            command=missing, stderr=e.strerror, return_code=e.errno
+        ) from e
+    except Exception as e:
+        raise RuntimeError(f"Unexpected error running: {str_cmd}\n{e}") from e
 
+    try:
+        with tracing.span(tracing.command_name(args), argv=str_cmd) as info:
+            stdout_b, stderr_b = await asyncio.wait_for(proc.communicate(), timeout)
+            returncode = await proc.wait()
+            info["returncode"] = returncode
+    except asyncio.TimeoutError as e:
+        proc.kill()
+        await proc.wait()
+        raise RuntimeError(
+            f"Unexpected error running: {str_cmd}\n"
+            f"Command timed out after {timeout} seconds"
+        ) from e
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+    stdout = stdout_b.decode("utf-8", errors="replace")
+    stderr = stderr_b.decode("utf-8", errors="replace")
+    if check and returncode != 0:
+        raise RuntimeError(_error_message(str_cmd, returncode, stdout, stderr))
+
+    return CompletedProcess(args, returncode, stdout, stderr)
+
+
+async def arun_command(
+    command: COMMAND,
+    shell: bool = False,
+    check: bool = False,
+    timeout: Optional[float] = None,
+) -> CompletedProcess:
+    """Async 'run_command': run a command and return its result."""
+    return await _arun(command, shell, check, timeout)
+
+
+async def acheck_output(
+    command: COMMAND, shell: bool = False, timeout: Optional[float] = None
+) -> str:
+    """Async 'check_output': run a command, capture and return its output."""
+    result = await _arun(command, shell, True, timeout)
+    return result.stdout
+
+
+class SudoEventKind(Enum):
+    """Kinds of events 'stream_sudo_cmd' yields"""
+
+    OUTPUT = "output"  # any other output line
+    PASSWORD_PROMPT = "password_prompt"  # sudo asks for the password
+    DOWNLOAD = "download"  # a package download progressed, see 'percent'
+    INSTALLING = (
+        "installing"  # a package install/upgrade step started, see 'current'/'total'
+    )
+    ERROR = "error"  # an error line, or sudo gave up
+    EXIT = "exit"  # the process exited, see 'returncode', always the last event
+
+
+@dataclass(frozen=True)
+class SudoEvent:
+    """One event of a running privileged command"""
+
+    kind: SudoEventKind
+    line: str = ""
+    package: Optional[str] = None
+    percent: Optional[int] = None
+    current: Optional[int] = None
+    total: Optional[int] = None
+    returncode: Optional[int] = None
+
+    def describe(self) -> Optional[str]:
+        """Short progress text for a spinner, None for events that aren't progress"""
+        if self.kind is SudoEventKind.DOWNLOAD:
+            return f"Downloading {self.package or 'packages'} ({self.percent}%)"
+        if self.kind is SudoEventKind.INSTALLING:
+            return f"Installing {self.package} ({self.current}/{self.total})"
+        if self.kind is SudoEventKind.PASSWORD_PROMPT:
+            return "Waiting for the sudo password"
+        return None
+
+
+def parse_output_line(line: str) -> SudoEvent:
+    """Classify one (ANSI stripped) output line of pacman, yay or paru"""
+    if m := PKG_STEP_RE.match(line):
+        return SudoEvent(
+            SudoEventKind.INSTALLING,
+            line,
+            package=m.group(3),
+            current=int(m.group(1)),
+            total=int(m.group(2)),
+        )
+    if m := PKG_DOWNLOAD_RE.match(line):
+        # Pacman's 'Total' line is the overall download progress
+        package = None if m.group(1) == "Total" else m.group(1)
+        return SudoEvent(
+            SudoEventKind.DOWNLOAD,
+            line,
+            package=package,
+            percent=min(100, int(m.group(2))),
+        )
+    if PKG_ERROR_RE.match(line):
+        return SudoEvent(SudoEventKind.ERROR, line)
+    return SudoEvent(SudoEventKind.OUTPUT, line)
+
+
+def _ask_password(
+    spinner: Optional[Spinner] = None, timeout: int = 300
+) -> Optional[str]:
+    """Ask the user for the sudo password, default 'password' for 'stream_sudo_cmd'"""
     import signal
 
     def _sig_handler(signum, frame):
         raise TimeoutError
 
-    signal.signal(signal.SIGALRM, _sig_handler)
+    # SIGALRM can only be used from the main thread, elsewhere wait forever
+    use_alarm = threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _sig_handler)
+        signal.alarm(timeout)
 
-    # set timeout
-    signal.alarm(timeout)
     try:
-        if spinner:
-            pw = spinner.get_password()
-        else:
-            pw = prompt("[SUDO] Enter your password: ", password=True)
-
-        if pw:
-            child.sendline(pw)
-            return 0  # success
+        get_password = getattr(spinner, "get_password", None)
+        if get_password is not None:
+            return get_password()
+        # Imported here, actions and daemons never prompt and shouldn't load rich
+        from sbdots.library.cli_utils import prompt
 
+        return prompt("[SUDO] Enter your password: ", password=True)
     finally:
-        signal.alarm(0)
+        if use_alarm:
+            signal.alarm(0)
 
-    child.logfile = log_snap
 
+# Line endings; pacman redraws progress bars in place with a bare '\r'
+_LINE_END = re.compile(r"\r\n|\n|\r")
 
-def run_sudo_cmd(
+
+def stream_sudo_cmd(
     command: COMMAND,
-    spinner: Optional[Spinner] = None,
+    password: Optional[Callable[[], Optional[str]]] = None,
     logger: Optional[logging.Logger] = None,
     ask_pass_threshold: Optional[int] = 3,
-    verbose: bool = False,
-) -> Optional[int]:
-    """Run a privileged command and asks for password if sudo is not cached or expired and return process returncode"""
+    idle_timeout: Optional[float] = None,
+) -> Iterator[SudoEvent]:
+    """
+    Run a privileged command in a pty and yield a SudoEvent per output line
+    as soon as it arrives, answering sudo password prompts with 'password()'
+    (asks on the terminal by default). The last event is always EXIT.
+
+    'idle_timeout' kills the command after that many seconds without output.
+    Closing the generator early kills the command.
+    """
+    import pexpect
 
-    if logger:
-        logger.debug(f"Raw command: '{command}'")
     command = _pre_run(command, False)
     str_cmd = shlex.join(command)
+    password = password or _ask_password
 
     if logger:
-        logger.debug(f"Processed str command: '{str_cmd}'")
+        logger.debug(f"Streaming command: '{str_cmd}'")
 
-    logfile = (
-        open("/tmp/`sudo_output`.log", "w+", encoding="utf-8")
-        if not verbose
-        else sys.stdout
-    )
-
-    # spawn the child process
+    started = tracing.now_us()
     child = pexpect.spawn(
-        str_cmd,
-        encoding="utf-8",
-        echo=False,
-        logfile=logfile,
+        command[0], command[1:], encoding="utf-8", codec_errors="replace", echo=False
     )
+    # Compiled once, matched on every chunk of output
+    patterns = child.compile_pattern_list(
+        [*PATTERNS, _LINE_END, pexpect.EOF, pexpect.TIMEOUT]
+    )
+    line_end, eof, timeout = len(PATTERNS), len(PATTERNS) + 1, len(PATTERNS) + 2
+    prompts = 0
+    steps_seen: set[tuple] = set()
+
+    def _line_event(raw: str) -> Optional[SudoEvent]:
+        line = ANSI_ESCAPE_RE.sub("", raw).rstrip()
+        if not line.strip():
+            return None
+        if logger:
+            logger.debug(f"[{command[0]}] {line}")
+        event = parse_output_line(line)
+        # Progress bars redraw the same step line, report each step once
+        if event.kind is SudoEventKind.INSTALLING:
+            step = (event.current, event.total, event.package)
+            if step in steps_seen:
+                return None
+            steps_seen.add(step)
+        return event
 
-    if logger:
-        logger.debug(f"Spawned the a child process, logging to: {logfile}")
-
-    got_password = 0
     try:
-        # poll for either a password prompt, EOF, or other output
-        while child.isalive():
-            # break if met threshold
-            if ask_pass_threshold and got_password >= ask_pass_threshold:
-                if logger:
-                    logger.debug(f"Please stop asking for password, '{command[1]}'")
+        while True:
+            index = child.expect_list(patterns, timeout=idle_timeout)
+
+            if index == line_end:
+                event = _line_event(child.before or "")
+                if event is not None:
+                    yield event
+
+            elif index in (0, 1):
+                # Password prompt (or retry), output before it is a line of its own
+                event = _line_event(child.before or "")
+                if event is not None:
+                    yield event
+
+                prompts += 1
+                if ask_pass_threshold and prompts > ask_pass_threshold:
+                    yield SudoEvent(
+                        SudoEventKind.ERROR,
+                        f"Asked for the password {prompts - 1} times, giving up",
+                    )
+                    child.close(force=True)
+                    break
+
+                yield SudoEvent(
+                    SudoEventKind.PASSWORD_PROMPT, (child.after or "").strip()
+                )
+                # Don't log the password
+                pw = password()
+                if not pw:
+                    yield SudoEvent(SudoEventKind.ERROR, "No password given")
+                    child.close(force=True)
+                    break
+                child.sendline(pw)
+
+            elif index in (2, 3):
+                # Sudo gave up: too many wrong passwords, or timed out
+                yield SudoEvent(SudoEventKind.ERROR, (child.after or "").strip())
+
+            elif index == eof:
+                event = _line_event(child.before or "")
+                if event is not None:
+                    yield event
                 break
 
-            # check for any of the prompt patterns with a short timeout
-            try:
-                index = child.expect(
-                    pattern=[*PATTERNS, pexpect.EOF, pexpect.TIMEOUT],
-                    timeout=0.5,
+            elif index == timeout:
+                yield SudoEvent(
+                    SudoEventKind.ERROR, f"No output for {idle_timeout} seconds, killed"
                 )
-            except pexpect.ExceptionPexpect:
+                child.close(force=True)
                 break
 
-            # SUDO_PROMPTS matched: send password
-            if index == 0:
-                got_password += 1
-                _handle_input(child, spinner)
+        if not child.closed:
+            # Output ended, wait for the exit status
+            if child.isalive():
+                child.wait()
+            child.close()
+        rc = (
+            child.exitstatus
+            if child.exitstatus is not None
+            else -(child.signalstatus or 1)
+        )
+        if logger:
+            logger.debug(f"'{str_cmd}' exited with {rc}")
+        tracing.record(
+            tracing.command_name(command),
+            started,
+            args={"argv": command, "returncode": rc},
+        )
+        yield SudoEvent(SudoEventKind.EXIT, returncode=rc)
+
+    finally:
+        # Also reached when the consumer stops iterating early
+        if child.isalive():
+            try:
+                child.close(force=True)
+            except Exception:
+                pass
+
 
-            # SUDO_RETRY_PROMPTS matched: send password
-            elif index == 1:
-                got_password += 1
-                _handle_input(child, spinner)
+def run_sudo_cmd(
+    command: COMMAND,
+    spinner: Optional[Spinner] = None,
+    logger: Optional[logging.Logger] = None,
+    ask_pass_threshold: Optional[int] = 3,
+    verbose: bool = False,
+    on_event: Optional[Callable[[SudoEvent], None]] = None,
+) -> Optional[int]:
+    """
+    Run a privileged command and asks for password if sudo is not cached or expired and return process returncode
 
-            # SUDO_ALL_ATTEMPTS_FAILED_PROMPTS or SUDO_TIMEOUT_PROMPTS matched: kill the child process if alive
-            elif index == 2 or index == 3:
-                if child.isalive():
-                    child.close(force=True)
-            else:
-                if PATTERNS[index] == pexpect.TIMEOUT:
-                    continue
-                else:
-                    break
+    'on_event' is called with every SudoEvent as it happens, i.e: to show progress.
+    """
+    from sbdots.library.cli_utils import print_error
+
+    if logger:
+        logger.debug(f"Raw command: '{command}'")
+
+    rc = None
+    try:
+        for event in stream_sudo_cmd(
+            command,
+            password=lambda: _ask_password(spinner),
+            logger=logger,
+            ask_pass_threshold=ask_pass_threshold,
+        ):
+            if on_event:
+                on_event(event)
+            if event.kind is SudoEventKind.EXIT:
+                rc = event.returncode
+            elif verbose and event.line:
+                print(event.line, flush=True)
 
     except KeyboardInterrupt:
         print_error("Process cancelled by the user.")
@@ -203,18 +513,7 @@ def run_sudo_cmd(
         )
         return 1
 
-    finally:
-        # cleanup
-        if child.isalive():
-            try:
-                child.close(force=True)
-            except Exception:
-                pass
-
-    rc = child.exitstatus
     if logger:
-        logger.info(
-            f"[green]Done.[/] exitstatus={rc} password_was_requested {got_password} times"
-        )
+        logger.info(f"[green]Done.[/] exitstatus={rc}")
 
     return rc
@@ -1,106 +1,284 @@
-import re
-from typing import Any, Dict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Union
 
 from sbdots.constants import PLACEHOLDER_RE
+from sbdots.library.exceptions import ConfigReferenceCycle
 
 _PLACEHOLDER_RE = PLACEHOLDER_RE
 
 
-class ConfigResolvedDict(dict):
+@dataclass(frozen=True, slots=True)
+class Reference:
+    """A '{dict_name.key.path|default}' placeholder"""
+
+    dict_name: str
+    parts: tuple[str, ...]
+    default: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Interpolation:
+    """A string of literal text and placeholders, rendered as a string"""
+
+    segments: tuple[Union[str, Reference], ...]
+
+
+@lru_cache(maxsize=4096)
+def _parse_placeholders(value: str) -> Union[str, Reference, Interpolation]:
+    """
+    Parse the placeholders of 'value' once: 'value' itself when it has none,
+    a Reference when it's a single placeholder, or else an Interpolation.
+    """
+    if "{" not in value:
+        return value
+
+    matches = list(_PLACEHOLDER_RE.finditer(value))
+    if not matches:
+        return value
+
+    references = [
+        Reference(m.group(1), tuple(m.group(2).split(".")), m.group(3)) for m in matches
+    ]
+    # The entire string is a single placeholder
+    if len(matches) == 1 and matches[0].span() == (0, len(value)):
+        return references[0]
+
+    segments: list[Union[str, Reference]] = []
+    last = 0
+    for match, reference in zip(matches, references):
+        if match.start() > last:
+            segments.append(value[last : match.start()])
+        segments.append(reference)
+        last = match.end()
+    if last < len(value):
+        segments.append(value[last:])
+    return Interpolation(tuple(segments))
+
+
+def _walk(
+    root: Mapping[str, Any],
+    ref: Reference,
+    follow: Callable[[Any, tuple], Any],
+) -> tuple[Any, tuple]:
+    """
+    Walk the key path of 'ref' from its top-level mapping in 'root', passing
+    every node met through 'follow'. Returns the value found and its path.
+
+    Raises KeyError for missing dictionaries or keys, and TypeError when attempting
+    to traverse a non-dictionary value.
+    """
+    dict_name, parts = ref.dict_name, ref.parts
+    if dict_name not in root:
+        raise KeyError(
+            f"Unknown mapping dict '{dict_name}, Available dicts {list(root.keys())}'"
+        )
+
+    path: tuple = (dict_name,)
+    current = follow(root[dict_name], path)
+
+    if not isinstance(current, Mapping):
+        raise TypeError(f"Expected dict, got {type(current).__name__}")
+
+    if len(parts) == 1 and parts[0] not in current:
+        raise KeyError(
+            f"Invalid key '{parts[0]}, Available keys: {list(current.keys())}'"
+        )
+
+    for i, part in enumerate(parts):
+        if not isinstance(current, Mapping):
+            raise TypeError(
+                f"Cannot descend into non-dict value at position {i + 1} in path {'.'.join(parts)}"
+            )
+        if part not in current:
+            raise KeyError(
+                f"Key '{part}' not found at position {i + 1} in path '{'.'.join(parts)}'."
+                f"Available keys: {list(current.keys())}"
+            )
+        path += (part,)
+        current = follow(current[part], path)
+
+    return current, path
+
+
+class ConfigResolvedDict(Mapping):
     """
-    Dictionary that resolves placeholder references within its values.
+    Read-only mapping that resolves placeholder references within the values
+    of a raw dictionary.
 
     String values may reference other parts of the configuration using dot-separated
     paths. Resolution is recursive for dictionaries and lists. Full-string
     placeholders preserve the referenced value's type; interpolated placeholders
-    are converted to strings. All references are resolved against the original
-    input dictionary.
+    are converted to strings. References are followed transitively, a
+    placeholder may point at another one, and a reference cycle raises
+    ConfigReferenceCycle.
+
+    Values are resolved when first accessed and memoized by path, so only
+    what's used is resolved; a bad reference raises on access. Every way of
+    reading the mapping (items(), ==, repr(), dict(...)...) sees resolved
+    values, the raw ones stay in 'raw'.
     """
 
     def __init__(self, raw_dict: dict[str, Any]):
         self.raw = raw_dict
-        self.resolved = self._resolve(self.raw)
-        super().__init__(self.resolved)
+        # path -> resolved value
+        self._memo: dict[tuple, Any] = {}
+        # Paths being resolved, in order, to report cycles
+        self._resolving: dict[tuple, None] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self._resolve(self.raw[key], (key,))
+
+    def __contains__(self, key: object) -> bool:
+        # Not Mapping's, a bad reference under 'key' would read as a missing key
+        return key in self.raw
+
+    def get(self, key: Any, default: Any = None, /) -> Any:
+        # Not Mapping's either, it would turn a bad reference into 'default'
+        if key not in self.raw:
+            return default
+        return self[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.raw)
 
-    def _resolve(self, node):
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.resolved!r})"
+
+    def copy(self) -> "ConfigResolvedDict":
+        return type(self)(self.raw)
+
+    @property
+    def resolved(self) -> dict[str, Any]:
+        """Every value resolved, as a plain dict"""
+        return {key: self[key] for key in self.raw}
+
+    def _resolve(self, node: Any, path: tuple) -> Any:
         """
-        Recursively resolve placeholders in strings, dictionaries, and lists.
-        Non-container values are returned unchanged.
+        Resolve the placeholders in 'node', found at 'path', recursively for
+        dictionaries and lists. Non-container values are returned unchanged.
         """
         if isinstance(node, str):
-            return self._resolve_string(node)
-        if isinstance(node, dict):
-            return {k: self._resolve(v) for k, v in node.items()}
-        if isinstance(node, list):
-            return [self._resolve(v) for v in node]
-        return node
+            parsed = _parse_placeholders(node)
+            if isinstance(parsed, str):
+                return node
+        elif not isinstance(node, (dict, list)):
+            return node
+
+        if path in self._memo:
+            return self._memo[path]
+
+        if path in self._resolving:
+            chain = list(self._resolving)
+            raise ConfigReferenceCycle(chain[chain.index(path) :] + [path])
 
-    def _resolve_string(self, value: str) -> Any:
+        self._resolving[path] = None
+        try:
+            if isinstance(node, str):
+                value = self._resolve_string(parsed)
+            elif isinstance(node, dict):
+                value = {k: self._resolve(v, path + (k,)) for k, v in node.items()}
+            else:
+                value = [self._resolve(v, path + (i,)) for i, v in enumerate(node)]
+        finally:
+            del self._resolving[path]
+
+        self._memo[path] = value
+        return value
+
+    def _resolve_string(self, parsed: Union[Reference, Interpolation]) -> Any:
         """
-        Resolve placeholders in a string.
+        Resolve a parsed string.
 
         Returns the referenced value directly if the string is a single placeholder
         otherwise interpolates resolved values into the string.
         """
-        if not _PLACEHOLDER_RE.search(value):
-            return value
+        if isinstance(parsed, Reference):
+            return self._resolve_reference(parsed)
 
-        # Check if the entire string is a single placeholder
-        if match := _PLACEHOLDER_RE.fullmatch(value):
-            dict_name, key_path, _ = match.groups()
-            return self._resolve_reference(dict_name, key_path)
+        return "".join(
+            part if isinstance(part, str) else str(self._resolve_reference(part))
+            for part in parsed.segments
+        )
 
-        def replacer(match: re.Match) -> str:
-            """Handle string interpolation with multiple placeholders"""
-            dict_name, key_path, _ = match.groups()
-            resolved = self._resolve_reference(dict_name, key_path)
-            return str(resolved)
-
-        return _PLACEHOLDER_RE.sub(replacer, value)
-
-    def _resolve_reference(self, dict_name: str, path: str) -> Any:
+    def _resolve_reference(self, ref: Reference) -> Any:
         """
-        Resolve a dot-separated path from a top-level mapping in the raw config.
-
-        Raises KeyError for missing dictionaries or keys, and TypeError when attempting
-        to traverse a non-dictionary value.
+        Resolve a reference from a top-level mapping of the config, following
+        placeholders met on the way. A missing key falls back to the
+        placeholder's default, if it has one.
         """
         try:
-            if dict_name not in self.raw:
-                raise KeyError(
-                    f"Unknown mapping dict '{dict_name}, Available dicts {list(self.raw.keys())}'"
-                )
+            value, path = _walk(self.raw, ref, self._follow)
+        except KeyError:
+            if ref.default is None:
+                raise
+            return ref.default
+        return self._resolve(value, path)
 
-            current = self.raw[dict_name]
+    def _follow(self, node: Any, path: tuple) -> Any:
+        """Resolve 'node' if it's a placeholder string, so a path can descend through it."""
+        if isinstance(node, str):
+            return self._resolve(node, path)
+        return node
+
+
+class FlatView(Mapping):
+    """
+    Read-only view presenting a nested dictionary with dot-separated keys to
+    its leaves, without copying it.
+
+    The key index is built on first use, walking the tree with an explicit
+    stack; values are read from the underlying dictionary on access. The
+    view doesn't follow keys added or removed after the index was built.
+    """
 
-            if not isinstance(current, dict):
-                raise TypeError(f"Expected dict, got {type(current).__name__}")
+    __slots__ = ("_root", "_index")
 
-            parts = path.split(".")
+    def __init__(self, root: dict[str, Any]):
+        self._root = root
+        # dotted key -> key path
+        self._index: Optional[dict[str, tuple]] = None
 
-            if len(parts) == 1:
-                if path not in current:
-                    raise KeyError(
-                        f"Invalid key '{path}, Available keys: {list(current.keys())}'"
-                    )
-                return current[path]
+    def _paths(self) -> dict[str, tuple]:
+        if self._index is None:
+            index: dict[str, tuple] = {}
+            # (path of a dict, iterator over its items), depth first in order
+            stack: list[tuple[tuple, Iterator[tuple[Any, Any]]]] = [
+                ((), iter(self._root.items()))
+            ]
+            while stack:
+                prefix, items = stack[-1]
+                for k, v in items:
+                    path = prefix + (k,)
+                    if isinstance(v, dict):
+                        stack.append((path, iter(v.items())))
+                        break
+                    index[".".join(map(str, path))] = path
+                else:
+                    stack.pop()
+            self._index = index
+        return self._index
 
-            for i, part in enumerate(parts):
-                if not isinstance(current, dict):
-                    raise TypeError(
-                        f"Cannot descend into non-dict value at position {i + 1} in path {path}"
-                    )
-                if part not in current:
-                    raise KeyError(
-                        f"Key '{part}' not found at position {i + 1} in path '{path}'."
-                        f"Available keys: {list(current.keys())}"
-                    )
-                current = current[part]
+    def __getitem__(self, key: str) -> Any:
+        node = self._root
+        for part in self._paths()[key]:
+            node = node[part]
+        return node
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._paths()
 
-            return current
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths())
 
-        except (KeyError, TypeError):
-            raise
+    def __len__(self) -> int:
+        return len(self._paths())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
 
 
 class OneLevelFlatDict(dict):
@@ -128,18 +306,8 @@ class OneLevelFlatDict(dict):
 
         return _out
 
-    def _flatten_children(self, d: Dict, prefix: str = "") -> Dict:
+    def _flatten_children(self, d: Dict) -> Dict:
         """
-        Recursively flatten a nested dictionary using dot-separated keys.
+        Flatten a nested dictionary using dot-separated keys.
         """
-        _result = {}
-
-        for k, v in d.items():
-            key = f"{prefix}{k}" if not prefix else f"{prefix}.{k}"
-
-            if isinstance(v, dict):
-                _result.update(self._flatten_children(v, key))
-            else:
-                _result[key] = v
-
-        return _result
+        return dict(FlatView(d).items())
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import fcntl
 import logging
+import os
+import threading
 import tomllib
 from configparser import ConfigParser
-from typing import Optional
+from contextlib import contextmanager
+from typing import Any, Generator, Optional
 from pathlib import Path
 
-from sbdots.library.configDicts import ConfigResolvedDict, OneLevelFlatDict
+from sbdots.library.configDicts import ConfigResolvedDict, FlatView
 from sbdots.library.exceptions import ConfigNotFound
 from sbdots.library.logger import get_caller_logger
 from sbdots.constants import SBDOTS_CONFIG_DIR, DEFAULT_SECTION
 
 SETTINGS_FILE = SBDOTS_CONFIG_DIR / "setting.ini"
+# Held while a transaction reads and rewrites SETTINGS_FILE. A separate file,
+# since every write replaces SETTINGS_FILE and a lock on it would go with it
+SETTINGS_LOCK_FILE = SBDOTS_CONFIG_DIR / "setting.ini.lock"
 
 
 def _ensure_paths() -> None:
@@ -31,7 +38,139 @@ def _atomic_write(cfg: ConfigParser) -> None:
     tmp = SETTINGS_FILE.with_suffix(".tmp")
     with tmp.open("w") as f:
         cfg.write(f)
+        f.flush()
+        os.fsync(f.fileno())
     tmp.replace(SETTINGS_FILE)
+    # What was just written is what the next lookup would parse
+    _store_cached(cfg)
+
+
+# Parsed settings shared by all lookups, reparsed when the file changes
+_cached: Optional[tuple[tuple, ConfigParser]] = None
+_cache_lock = threading.Lock()
+
+
+def _file_signature() -> Optional[tuple]:
+    """Identify the settings file's content without reading it."""
+    try:
+        st = os.stat(SETTINGS_FILE)
+    except OSError:
+        return None
+    return (str(SETTINGS_FILE), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _store_cached(cfg: ConfigParser, signature: Optional[tuple] = None) -> None:
+    global _cached
+    signature = signature or _file_signature()
+    with _cache_lock:
+        _cached = (signature, cfg) if signature is not None else None
+
+
+def _cached_config() -> ConfigParser:
+    """
+    The parsed settings file, only parsed again once its mtime, size or
+    inode changed. Shared between callers: read it, never modify it.
+    """
+    global _cached
+    signature = _file_signature()
+    with _cache_lock:
+        if signature is not None and _cached is not None and _cached[0] == signature:
+            return _cached[1]
+
+    # Keyed on the signature seen before reading: a change while parsing means a reparse
+    cfg = _load_config()
+    _store_cached(cfg, signature)
+    return cfg
+
+
+def clear_config_cache() -> None:
+    global _cached
+    with _cache_lock:
+        _cached = None
+
+
+class SettingsTransaction:
+    """
+    Settings changes applied to one parsed copy of the settings file,
+    written back once when the transaction ends.
+    """
+
+    def __init__(self, cfg: ConfigParser, logger: logging.Logger):
+        self._cfg = cfg
+        self.logger = logger
+        self.changed = False
+
+    def get(self, key: str, *, section: str = DEFAULT_SECTION) -> Optional[str]:
+        """Get a setting, as changed so far in this transaction"""
+        if not self._cfg.has_section(section):
+            return None
+        return self._cfg.get(section, key, fallback=None)
+
+    def set(
+        self,
+        key: str,
+        value: str,
+        *,
+        section: str = DEFAULT_SECTION,
+        overwrite: bool = True,
+    ) -> bool:
+        """Set or update a setting, creating its section if missing"""
+        if not self._cfg.has_section(section):
+            self._cfg.add_section(section)
+
+        if self._cfg.has_option(section, key) and not overwrite:
+            self.logger.debug(
+                "Key exists and overwrite disabled",
+                extra={"section": section, "key": key},
+            )
+            return False
+
+        if self._cfg.get(section, key, fallback=None) != value:
+            self._cfg.set(section, key, value)
+            self.changed = True
+        return True
+
+    def remove(self, key: str, *, section: str = DEFAULT_SECTION) -> bool:
+        """Remove a setting, and its section once empty"""
+        if not self._cfg.has_section(section):
+            return False
+
+        if not self._cfg.has_option(section, key):
+            return False
+
+        self._cfg.remove_option(section, key)
+
+        # Clean up empty sections
+        if not self._cfg.items(section):
+            self._cfg.remove_section(section)
+
+        self.changed = True
+        return True
+
+
+@contextmanager
+def settings_transaction(
+    logger: Optional[logging.Logger] = None,
+) -> Generator[SettingsTransaction, None, None]:
+    """
+    Apply many setting changes with one read and one atomic write.
+
+    Holds an exclusive flock for the whole read-modify-write, so concurrent
+    writers, in this process or others, never lose each other's changes.
+    Nothing is written if the block raises or changes nothing.
+    """
+    logger = logger or get_caller_logger()
+
+    _ensure_paths()
+    with open(SETTINGS_LOCK_FILE, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            txn = SettingsTransaction(_load_config(), logger)
+            yield txn
+            if txn.changed:
+                _atomic_write(txn._cfg)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
 
 
 def get_config(
@@ -48,7 +187,7 @@ def get_config(
         logger.debug("Empty key passed to get_setting")
         return None
 
-    cfg = _load_config()
+    cfg = _cached_config()
 
     if not cfg.has_section(section):
         return None
@@ -56,6 +195,24 @@ def get_config(
     return cfg.get(section, key, fallback=None)
 
 
+def get_section(
+    section: str = DEFAULT_SECTION,
+    *,
+    logger: Optional[logging.Logger] = None,
+) -> dict[str, str]:
+    """Get all the settings of 'section' at once, empty if it doesn't exist"""
+
+    logger = logger or get_caller_logger()
+
+    cfg = _cached_config()
+
+    if not cfg.has_section(section):
+        logger.debug(f"No section '{section}' in settings")
+        return {}
+
+    return dict(cfg.items(section))
+
+
 def set_config(
     key: str,
     value: str,
@@ -77,20 +234,9 @@ def set_config(
         logger.debug("Invalid key or value passed to set_setting")
         return False
 
-    cfg = _load_config()
-
-    if not cfg.has_section(section):
-        cfg.add_section(section)
-
-    if cfg.has_option(section, key) and not overwrite:
-        logger.debug(
-            "Key exists and overwrite disabled",
-            extra={"section": section, "key": key},
-        )
-        return False
-
-    cfg.set(section, key, value)
-    _atomic_write(cfg)
+    with settings_transaction(logger) as txn:
+        if not txn.set(key, value, section=section, overwrite=overwrite):
+            return False
 
     logger.info(
         "Setting saved",
@@ -113,21 +259,9 @@ def remove_setting(
         logger.debug("Empty key passed to remove_setting")
         return False
 
-    cfg = _load_config()
-
-    if not cfg.has_section(section):
-        return False
-
-    if not cfg.has_option(section, key):
-        return False
-
-    cfg.remove_option(section, key)
-
-    # Clean up empty sections
-    if not cfg.items(section):
-        cfg.remove_section(section)
-
-    _atomic_write(cfg)
+    with settings_transaction(logger) as txn:
+        if not txn.remove(key, section=section):
+            return False
 
     logger.info(
         "Setting removed",
@@ -136,12 +270,12 @@ def remove_setting(
     return True
 
 
-def read_rich_theme(theme_path: Path) -> OneLevelFlatDict:
+def read_rich_theme(theme_path: Path) -> dict[str, Any]:
     """
-    Read a theme configuration file and return a one-level flattened dictionary.
+    Read a theme configuration file, with its placeholders resolved.
 
-    The theme file is read and resolved using read_config, then flattened so each
-    top-level key maps to a single-level dictionary with dot-separated keys.
+    Each top-level table is returned as a FlatView: its nested keys read as
+    single-level dot-separated keys, without copying the table.
     """
     try:
         with open(theme_path, "rb") as f:
@@ -151,4 +285,7 @@ def read_rich_theme(theme_path: Path) -> OneLevelFlatDict:
             f"Config file '{theme_path}' not found, Error: {e.strerror}"
         ) from e
 
-    return OneLevelFlatDict(ConfigResolvedDict(data))
+    return {
+        key: FlatView(value) if isinstance(value, dict) else value
+        for key, value in ConfigResolvedDict(data).items()
+    }
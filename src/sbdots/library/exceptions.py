@@ -69,3 +69,24 @@ class ConfigNotFound(FileNotFoundError):
 
 class ThemeConfigError(Exception):
     pass
+
+
+class ConfigReferenceCycle(ValueError):
+    """Raised when configuration placeholders end up referencing themselves"""
+
+    def __init__(self, chain):
+        self.chain = chain
+        super().__init__(
+            "Placeholder reference cycle: "
+            + " -> ".join(".".join(map(str, p)) for p in chain)
+        )
+
+
+class ColorExtractionError(Exception):
+    """Raised when the source color of an image can't be extracted in-process"""
+
+    pass
+
+
+class TemplateError(Exception):
+    pass
@@ -0,0 +1,149 @@
+"""
+Hyprland IPC over its request socket.
+
+Used to apply theme colors with batched 'keyword' requests rather than
+'hyprctl reload', which re-parses the whole config.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from sbdots.library.logger import get_caller_logger
+from sbdots.constants import HYPR_CONFIG_DIR
+
+# Seconds to wait on the socket before giving up
+SOCKET_TIMEOUT = 2
+
+# Color keywords set from 'colors.lua' in the hypr config, keyword -> color name
+COLOR_KEYWORDS: dict[str, str] = {
+    "general:col.active_border": "outline",
+    "general:col.inactive_border": "surface",
+    "general:col.nogroup_border_active": "outline",
+    "general:col.nogroup_border": "surface",
+    "decoration:shadow:color": "shadow",
+    "decoration:shadow:color_inactive": "surface",
+}
+
+_COLORS_REF_RE = re.compile(r"\bcolors\.(\w+)")
+
+# Values of the 'colors' module as last applied, None until the first apply
+_applied: Optional[dict[str, str]] = None
+_applied_lock = threading.Lock()
+
+
+def socket_path() -> Path:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+    instance = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not instance:
+        raise RuntimeError("HYPRLAND_INSTANCE_SIGNATURE not set, is Hyprland running?")
+    return Path(runtime_dir) / "hypr" / instance / ".socket.sock"
+
+
+def request(cmd: str) -> str:
+    """Send a request to Hyprland, like 'hyprctl <cmd>', and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(SOCKET_TIMEOUT)
+        sock.connect(str(socket_path()))
+        sock.sendall(cmd.encode())
+
+        chunks = []
+        while chunk := sock.recv(8192):
+            chunks.append(chunk)
+
+    return b"".join(chunks).decode(errors="replace")
+
+
+def batch(cmds: list[str]) -> str:
+    """Send several requests in a single '[[BATCH]]' round trip."""
+    return request("[[BATCH]]" + ";".join(cmds))
+
+
+def _is_ok(reply: str) -> bool:
+    # A batch replies with one 'ok' per request
+    return bool(reply.strip()) and not reply.replace("ok", "").strip()
+
+
+def reload() -> None:
+    reply = request("reload")
+    if not _is_ok(reply):
+        raise RuntimeError(f"Hyprland reload failed: {reply.strip()}")
+
+
+def color_values(context: dict[str, Any]) -> dict[str, str]:
+    """Return the 'colors' module values, as rendered by the hyprland.lua template."""
+    values = {
+        name: f"0xff{variants['default']['hex_stripped']}"
+        for name, variants in context["colors"].items()
+        if "default" in variants
+    }
+    values["image"] = context.get("image", "")
+    return values
+
+
+def referenced_colors(config_dir: Path = HYPR_CONFIG_DIR) -> set[str]:
+    """Return the names of the 'colors' module used anywhere in the hypr config."""
+    names: set[str] = set()
+    for path in config_dir.rglob("*.lua"):
+        if path.name == "colors.lua":
+            continue
+        try:
+            names.update(_COLORS_REF_RE.findall(path.read_text(encoding="utf-8")))
+        except (OSError, UnicodeError):
+            continue
+    return names
+
+
+def apply_colors(
+    context: dict[str, Any],
+    config_dir: Path = HYPR_CONFIG_DIR,
+    logger: Optional[logging.Logger] = None,
+) -> None:
+    """
+    Apply the theme colors to the running Hyprland.
+
+    Only the color keywords whose value changed since the last apply are
+    pushed, in one batched request. Falls back to a full reload when a
+    changed color is used somewhere 'COLOR_KEYWORDS' doesn't cover, or when
+    the batch is rejected.
+    """
+    global _applied
+    logger = logger or get_caller_logger()
+    values = color_values(context)
+
+    with _applied_lock:
+        previous = _applied
+        changed = {
+            name
+            for name, value in values.items()
+            if previous is None or previous.get(name) != value
+        }
+
+        uncovered = (
+            referenced_colors(config_dir) - set(COLOR_KEYWORDS.values())
+        ) & changed
+        if uncovered:
+            logger.debug(f"Colors outside the known keywords changed: {uncovered}")
+            reload()
+            _applied = values
+            return
+
+        cmds = [
+            f"keyword {keyword} {values[name]}"
+            for keyword, name in COLOR_KEYWORDS.items()
+            if name in changed and name in values
+        ]
+        if cmds:
+            reply = batch(cmds)
+            if not _is_ok(reply):
+                logger.warning(f"Hyprland rejected color keywords: {reply.strip()}")
+                reload()
+
+        _applied = values
+        logger.debug(f"Applied {len(cmds)} Hyprland color keywords")
@@ -1,19 +1,21 @@
 from __future__ import annotations
 
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
-from typing import Optional, Union
+from typing import NamedTuple, Optional, Union
 import sys
 
-from rich.logging import RichHandler
-
 from sbdots.constants import (
     SBDOTS_STATE_DIR,
     SBDOTS_LOG_DIR,
     LogLevel,
     LOG_MAX_BYTES,
     LOG_BACKUP_COUNT,
+    LOG_QUEUE_SIZE,
 )
 
 
@@ -28,6 +30,124 @@ def _file_fmt() -> logging.Formatter:
     )
 
 
+class _QueuedRecord(NamedTuple):
+    """A queued record and the handlers to write it with."""
+
+    targets: tuple[logging.Handler, ...]
+    record: logging.LogRecord
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue which never blocks the logging thread:
+    a record is dropped when the queue is full, and counted in 'dropped'.
+    The next record that fits is preceded by a warning with the number lost.
+
+    Records are queued along with the handlers writing them, 'targets', so
+    loggers can share one queue and writer thread, see _queued(). They're
+    formatted by the writer thread, so the arguments of a log call shouldn't
+    be mutated after it.
+    """
+
+    def __init__(self, queue_: queue.Queue, targets: tuple[logging.Handler, ...]):
+        super().__init__(queue_)
+        self.targets = targets
+        self.dropped = 0
+        # Dropped since the last warning about it
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Kept in-process, so there's nothing to make picklable
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under the handler's lock, see logging.Handler.handle()
+        try:
+            if self._unreported:
+                notice = self._dropped_record(record.name)
+                self.queue.put_nowait(_QueuedRecord(self.targets, notice))
+                self._unreported = 0
+            self.queue.put_nowait(_QueuedRecord(self.targets, record))
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _dropped_record(self, name: str) -> logging.LogRecord:
+        return logging.LogRecord(
+            name,
+            logging.WARNING,
+            __file__,
+            0,
+            "Dropped %d log record(s), the log queue was full",
+            (self._unreported,),
+            None,
+        )
+
+
+class _LogWriter:
+    """
+    Thread passing each queued record to the handlers it was queued with.
+    Stopping it writes every record queued before.
+    """
+
+    def __init__(self, queue_: queue.Queue[Optional[_QueuedRecord]]):
+        self.queue = queue_
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="sbdots-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                # None is the stop sentinel
+                if item is None:
+                    return
+                for handler in item.targets:
+                    if item.record.levelno >= handler.level:
+                        handler.handle(item.record)
+            finally:
+                self.queue.task_done()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        # Waits for room, put_nowait() would fail on a full queue
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+
+# The queue and writer thread shared by every queued logger, started on first use
+_log_queue: queue.Queue[Optional[_QueuedRecord]] = queue.Queue(LOG_QUEUE_SIZE)
+_listener: Optional[_LogWriter] = None
+_listener_lock = threading.Lock()
+
+
+def _queued(handlers: list) -> DroppingQueueHandler:
+    """
+    Move 'handlers' to the shared writer thread, stopped (and flushed) at
+    exit. Returns the handler queuing records for them.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = _LogWriter(_log_queue)
+            _listener.start()
+            atexit.register(_listener.stop)
+    return DroppingQueueHandler(_log_queue, tuple(handlers))
+
+
+def flush_queued_logs() -> None:
+    """Block until every record queued so far is written."""
+    if _listener is not None:
+        _log_queue.join()
+
+
 def _get_handlers(
     console: bool = True,
     rotating_file: bool = False,
@@ -51,6 +171,9 @@ def _get_handlers(
         file_path = str(file_path)
 
     if console:
+        # Imported here, daemons and actions log to files only and shouldn't load rich
+        from rich.logging import RichHandler
+
         ch = RichHandler(
             rich_tracebacks=True,
             show_time=True,
@@ -150,8 +273,12 @@ def setup_daemon_logging(
 ) -> None:
     """
     Configure logging for a SBDots-Daemon scripts.
-    Default: sys.stdout stream and rotating file append.
+    Default: rotating file append, written by a background thread so logging
+    never blocks the daemon: see DroppingQueueHandler.
     """
+    if name in _GLOBAL_SETUP:
+        return  # already configured
+
     if log_dir is None:
         log_dir = SBDOTS_LOG_DIR
     log_dir.mkdir(parents=True, exist_ok=True)
@@ -169,24 +296,29 @@ def setup_daemon_logging(
         max_bytes=max_bytes,
         backup_count=backup_count,
     )
+    queue_handler = _queued(handlers)
 
     logger = logging.getLogger(name)
     logger.setLevel(LogLevel.DEBUG.value)
-    for h in handlers:
-        logger.addHandler(h)
+    logger.addHandler(queue_handler)
     logger.propagate = False
 
     _GLOBAL_SETUP[name] = {
         "log_dir": str(log_dir),
         "log_file": str(log_dir / log_file),
         "handlers": handlers,
+        "queue_handler": queue_handler,
     }
 
 
 def setup_actions_state(name: str, log_level=LogLevel.DEBUG.value) -> None:
     """
     Configure logging for SBDots-Actions to save as states.
+    Actions run in the actions daemon, so they log through a queue as well.
     """
+    if name in _GLOBAL_SETUP:
+        return  # already configured
+
     # Ensure state dir exists
     state_dir = SBDOTS_STATE_DIR
     state_dir.mkdir(parents=True, exist_ok=True)
@@ -201,16 +333,18 @@ def setup_actions_state(name: str, log_level=LogLevel.DEBUG.value) -> None:
         file_handling_mode="w",
         file_path=file_path,
     )
+    queue_handler = _queued(handlers)
 
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
-    logger.addHandler(handlers[0])
+    logger.addHandler(queue_handler)
     logger.propagate = False
 
     _GLOBAL_SETUP[name] = {
         "log_dir": str(state_dir),
         "log_file": str(state_dir / log_file),
         "handlers": handlers,
+        "queue_handler": queue_handler,
     }
 
 
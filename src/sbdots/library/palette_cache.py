@@ -0,0 +1,213 @@
+"""
+Persistent cache of matugen palettes for wallpapers.
+
+Each wallpaper gets one json entry under PALETTE_CACHE_DIR, keyed on its
+resolved path. An entry is only valid while the image's size/mtime and the
+matugen options it was generated with are unchanged, so re-running the
+pre-generation only processes new or modified wallpapers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from sbdots.library.command.matugen import MatugenImage
+from sbdots.library.logger import get_caller_logger
+from sbdots.constants import (
+    PALETTE_CACHE_DIR,
+    PALETTE_PREGEN_NICENESS,
+    USER_WALLPAPERS_DIR,
+    WALLPAPER_EXTENSIONS,
+)
+
+# Seconds a single matugen run may take before the image is skipped
+MATUGEN_TIMEOUT = 60
+
+
+@dataclass
+class PregenResult:
+    """Summary of a pre-generation run."""
+
+    generated: list[Path] = field(default_factory=list)
+    skipped: list[Path] = field(default_factory=list)
+    failed: dict[Path, str] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.generated) + len(self.skipped) + len(self.failed)
+
+
+def _entry_path(image: Path) -> Path:
+    digest = hashlib.sha1(str(image.resolve()).encode()).hexdigest()
+    return PALETTE_CACHE_DIR / f"{digest}.json"
+
+
+def _fingerprint(image: Path, options: dict[str, str]) -> dict[str, Any]:
+    st = image.stat()
+    return {
+        "source": str(image.resolve()),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "options": options,
+    }
+
+
+def load_palette(image: Path, options: dict[str, str]) -> Optional[dict[str, Any]]:
+    """Return the cached matugen json for 'image', or None if missing or stale."""
+    try:
+        fingerprint = _fingerprint(image, options)
+        with open(_entry_path(image), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if entry.get("fingerprint") != fingerprint:
+        return None
+
+    return entry.get("palette")
+
+
+def store_palette(image: Path, options: dict[str, str], palette: dict) -> None:
+    """Atomically write the matugen json for 'image' to the cache."""
+    PALETTE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    entry = {"fingerprint": _fingerprint(image, options), "palette": palette}
+    target = _entry_path(image)
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    tmp.replace(target)
+
+
+def source_color(palette: dict[str, Any], mode: str) -> Optional[str]:
+    """
+    Return the source color hex from a matugen json, or None if not present.
+
+    Handles both layouts matugen has used: colors grouped by mode first
+    (colors.<mode>.source_color) and by color name first
+    (colors.source_color.<mode>).
+    """
+    colors = palette.get("colors", {})
+    if not isinstance(colors, dict):
+        return None
+
+    if isinstance(colors.get(mode), dict):
+        value = colors[mode].get("source_color")
+    else:
+        value = colors.get("source_color")
+        if isinstance(value, dict):
+            value = value.get(mode) or value.get("default")
+
+    if isinstance(value, dict):
+        value = value.get("color") or value.get("hex")
+
+    if isinstance(value, str) and value.startswith("#"):
+        return value
+    return None
+
+
+def iter_wallpapers(directory: Path = USER_WALLPAPERS_DIR) -> list[Path]:
+    """Return all supported images under 'directory', sorted by name."""
+    if not directory.is_dir():
+        return []
+
+    return sorted(
+        p
+        for p in directory.rglob("*")
+        if p.is_file() and p.suffix.lower() in WALLPAPER_EXTENSIONS
+    )
+
+
+def _generate(image: Path, options: dict[str, str]) -> tuple[Path, Optional[dict], str]:
+    """Pool worker: run matugen for 'image' at low priority and return (image, palette, error)."""
+    try:
+        palette = MatugenImage().export_json(
+            image,
+            options=options,
+            timeout=MATUGEN_TIMEOUT,
+            niceness=PALETTE_PREGEN_NICENESS,
+        )
+        return image, palette, ""
+    except subprocess.CalledProcessError as e:
+        return image, None, (e.stderr or str(e)).strip()
+    except Exception as e:
+        return image, None, str(e)
+
+
+def pregenerate(
+    directory: Path = USER_WALLPAPERS_DIR,
+    *,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    logger: Optional[logging.Logger] = None,
+    on_progress: Optional[Callable[[int, int, Path], None]] = None,
+) -> PregenResult:
+    """
+    Generate and cache matugen palettes for every wallpaper in 'directory'.
+
+    Work is spread over a bounded thread pool, each running matugen at low niceness.
+    Wallpapers with an up to date cache entry are skipped unless 'force'.
+    'on_progress' is called with (done, total, image) after each image.
+    """
+    logger = logger or get_caller_logger()
+    result = PregenResult()
+
+    options = MatugenImage(logger).get_options()
+    images = iter_wallpapers(directory)
+
+    pending = []
+    for image in images:
+        if not force and load_palette(image, options) is not None:
+            result.skipped.append(image)
+        else:
+            pending.append(image)
+
+    logger.info(
+        f"Palette pre-generation: {len(pending)} to generate, {len(result.skipped)} up to date"
+    )
+    if not pending:
+        return result
+
+    if jobs is None:
+        jobs = max(1, (os.cpu_count() or 2) // 2)
+    jobs = max(1, min(jobs, len(pending)))
+
+    done = len(result.skipped)
+    total = len(images)
+
+    # Threads only wait on matugen, the heavy lifting happens in its processes
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_generate, image, options) for image in pending]
+
+        for future in as_completed(futures):
+            image, palette, err = future.result()
+            done += 1
+
+            if palette is None:
+                logger.error(f"Failed to generate palette for '{image}': {err}")
+                result.failed[image] = err
+            else:
+                try:
+                    store_palette(image, options, palette)
+                    result.generated.append(image)
+                    logger.debug(f"Cached palette for '{image}'")
+                except OSError as e:
+                    logger.error(f"Failed to cache palette for '{image}': {e}")
+                    result.failed[image] = str(e)
+
+            if on_progress:
+                on_progress(done, total, image)
+
+    logger.info(
+        f"Palette pre-generation done: generated {len(result.generated)}, "
+        f"skipped {len(result.skipped)}, failed {len(result.failed)}"
+    )
+    return result
@@ -1,7 +1,8 @@
 import logging
 import subprocess
+from typing import Callable, Optional
 
-from .commands import run_command
+from .commands import SudoEvent, run_command, run_sudo_cmd
 
 
 def is_installed(package: str) -> bool:
@@ -10,8 +11,17 @@ def is_installed(package: str) -> bool:
     return result.returncode == 0
 
 
-def install_package(logger: logging.Logger, package: str) -> bool:
-    """Install a package with yay."""
+def install_package(
+    logger: logging.Logger,
+    package: str,
+    on_event: Optional[Callable[[SudoEvent], None]] = None,
+) -> bool:
+    """
+    Install a package with yay.
+
+    With 'on_event', yay runs in a pty and every SudoEvent of its output
+    (downloads, install steps, errors) is passed to it as it happens.
+    """
     logger.info(f"Installing package: {package}")
 
     # Check if package is installed or not
@@ -20,6 +30,12 @@ def install_package(logger: logging.Logger, package: str) -> bool:
         return True
 
     try:
+        if on_event is not None:
+            rc = run_sudo_cmd(
+                ["yay", "-S", package, "--noconfirm"], logger=logger, on_event=on_event
+            )
+            return rc == 0
+
         result = run_command(["yay", "-S", package, "--noconfirm", "--quiet"])
         return result.returncode == 0
     except subprocess.CalledProcessError as e:
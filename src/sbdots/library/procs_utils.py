@@ -1,37 +1,186 @@
+import math
 import os
 import psutil
+import select
 import signal
 import shlex
 import subprocess
-from typing import Iterable, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Generator, Iterable, Optional
 
+from sbdots.library import tracing
 from sbdots.library.exceptions import ProcessNotKilled, ProcessError
 from sbdots.library.logger import get_caller_logger
 
 
+# Read for process lookups, a module constant so tests can point it elsewhere
+PROC_DIR = "/proc"
+# Seconds a name -> pids lookup is reused, every pid is re-validated by its start time
+PID_CACHE_TTL = 2.0
+# /proc/<pid>/comm holds at most this many characters of the name
+COMM_LENGTH = 15
+# Seconds kill_proc waits for a SIGKILLed process to exit
+KILL_TIMEOUT = 1.0
+
+# name -> (expiry, [(pid, start time)])
+_pid_cache: dict[str, tuple[float, list[tuple[int, str]]]] = {}
+_pid_cache_lock = threading.Lock()
+
+
+def _read_proc(pid: int, entry: str) -> Optional[str]:
+    try:
+        with open(f"{PROC_DIR}/{pid}/{entry}", "rb") as fh:
+            return fh.read().decode("utf-8", errors="replace")
+    except OSError:
+        return None
+
+
+def _proc_stat(pid: int) -> Optional[tuple[str, str]]:
+    """Return the (state, start time) of 'pid', None if it's gone."""
+    data = _read_proc(pid, "stat")
+    if not data:
+        return None
+    # The name (field 2) may hold spaces and parentheses, the fields after it don't
+    fields = data[data.rfind(")") + 2 :].split()
+    if len(fields) < 20:
+        return None
+    return fields[0], fields[19]
+
+
+def _live_start_time(pid: int) -> Optional[str]:
+    """Start time of 'pid', None if it's gone or a zombie."""
+    stat = _proc_stat(pid)
+    if stat is None or stat[0] in ("Z", "X"):
+        return None
+    return stat[1]
+
+
+def _match_exe_or_cmdline(pid: int, names: set[str]) -> Optional[str]:
+    """Slow path: match the executable's name, or argv[0], against 'names'."""
+    cmdline = _read_proc(pid, "cmdline")
+    if cmdline:
+        arg0 = cmdline.split("\0", 1)[0].lower()
+        if arg0 in names:
+            return arg0
+
+    try:
+        exe = os.readlink(f"{PROC_DIR}/{pid}/exe")
+    except OSError:
+        return None
+    exe = os.path.basename(exe).removesuffix(" (deleted)").lower()
+    return exe if exe in names else None
+
+
+def _scan(names: set[str]) -> dict[str, list[tuple[int, str]]]:
+    """
+    One pass over /proc for every name in 'names'. Processes are matched by
+    /proc/<pid>/comm; exe and cmdline are only read to tell apart names
+    longer than comm holds, and for names comm found nothing for.
+    """
+    found: dict[str, list[tuple[int, str]]] = {name: [] for name in names}
+    # Names comm truncates, by their truncated form
+    truncated = {name[:COMM_LENGTH] for name in names if len(name) >= COMM_LENGTH}
+    unmatched: list[int] = []
+
+    try:
+        entries = os.listdir(PROC_DIR)
+    except OSError:
+        return found
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+
+        comm = _read_proc(pid, "comm")
+        if comm is None:
+            continue
+        comm = comm.rstrip("\n").lower()
+
+        if comm in truncated:
+            name = _match_exe_or_cmdline(pid, names) or (
+                comm if comm in names else None
+            )
+        elif comm in names:
+            name = comm
+        else:
+            name = None
+
+        if name is None:
+            unmatched.append(pid)
+            continue
+
+        start_time = _live_start_time(pid)
+        if start_time is not None:
+            found[name].append((pid, start_time))
+
+    missing = {name for name, procs in found.items() if not procs}
+    if missing:
+        for pid in unmatched:
+            name = _match_exe_or_cmdline(pid, missing)
+            if name is None:
+                continue
+            start_time = _live_start_time(pid)
+            if start_time is not None:
+                found[name].append((pid, start_time))
+
+    return found
+
+
+def find_pids(names: Iterable[str], use_cache: bool = True) -> dict[str, list[int]]:
+    """
+    Return the PIDs of the processes matching each of 'names' (keys are
+    lowercased), from a single pass over /proc.
+
+    Lookups that found processes are reused for PID_CACHE_TTL seconds, as
+    long as each pid still runs with the same start time, so repeated checks
+    of the same process cost a stat read per pid.
+    """
+    wanted = {name.lower() for name in names}
+    result: dict[str, list[int]] = {}
+    now = time.monotonic()
+
+    todo = set(wanted)
+    if use_cache:
+        with _pid_cache_lock:
+            for name in wanted:
+                hit = _pid_cache.get(name)
+                if hit is None or hit[0] <= now:
+                    continue
+                if all(_live_start_time(pid) == start for pid, start in hit[1]):
+                    result[name] = [pid for pid, _ in hit[1]]
+                    todo.discard(name)
+
+    if todo:
+        scanned = _scan(todo)
+        with _pid_cache_lock:
+            for name, procs in scanned.items():
+                # Misses aren't cached: a process started right after must be seen
+                if procs:
+                    _pid_cache[name] = (now + PID_CACHE_TTL, procs)
+                else:
+                    _pid_cache.pop(name, None)
+                result[name] = [pid for pid, _ in procs]
+
+    return result
+
+
+def clear_pid_cache() -> None:
+    with _pid_cache_lock:
+        _pid_cache.clear()
+
+
 def get_procs(name: str, logger=None) -> list[psutil.Process]:
     """Return all processes matching 'name'."""
     logger = logger or get_caller_logger()
     logger.debug(f"Getting processes matching name: {name}")
-    name = name.lower()
     procs = []
-    for p in psutil.process_iter(["name", "exe", "cmdline"]):
+    for pid in find_pids([name])[name.lower()]:
         try:
-            info = p.info
-            if (
-                info["name"]
-                and info["name"].lower() == name
-                or info["exe"]
-                and os.path.basename(info["exe"]).lower() == name
-                or info["cmdline"]
-                and info["cmdline"][0].lower() == name
-            ):
-                procs.append(p)
-        except (
-            psutil.NoSuchProcess,
-            psutil.AccessDenied,
-            psutil.ZombieProcess,
-        ):
+            procs.append(psutil.Process(pid))
+        except psutil.NoSuchProcess:
             continue
     logger.debug(f"Found {len(procs)} processes matching '{name}'")
     return procs
@@ -51,8 +200,8 @@ def get_pid(name: str, logger=None) -> int | None:
     """Return the PID of process 'name'."""
     logger = logger or get_caller_logger()
     logger.debug(f"Getting PID for process name: {name}")
-    proc = get_proc(name)
-    result = proc.pid if proc else None
+    pids = find_pids([name])[name.lower()]
+    result = pids[0] if pids else None
     logger.debug(f"PID for '{name}': {result}")
     return result
 
@@ -96,16 +245,19 @@ def start_proc(
     try:
         # Start the process
         logger.info(f"Starting process: {cmd_name}")
-        subprocess.Popen(
-            cmd,
-            shell=shell,
-            stdout=stdout,
-            stderr=stderr,
-            text=True,
-            encoding="utf-8",
-            start_new_session=start_new_session,
-            **kwargs,
-        )
+        # Only the spawn is timed, the process isn't waited for
+        with tracing.span(f"spawn {tracing.command_name(cmd)}", argv=cmd) as info:
+            proc = subprocess.Popen(
+                cmd,
+                shell=shell,
+                stdout=stdout,
+                stderr=stderr,
+                text=True,
+                encoding="utf-8",
+                start_new_session=start_new_session,
+                **kwargs,
+            )
+            info["pid"] = proc.pid
         logger.info(f"Successfully started process: {cmd_name}")
         return True
     except FileNotFoundError as e:
@@ -123,6 +275,82 @@ def start_proc(
         )
 
 
+@contextmanager
+def _open_pidfds(pids: Iterable[int]) -> Generator[dict[int, int], None, None]:
+    """
+    Yield a pid -> pidfd dict for the processes in 'pids' that still exist.
+    A pidfd keeps referring to its process, so signals sent through it never
+    reach a process that reused the pid, and it polls readable on exit.
+    """
+    fds: dict[int, int] = {}
+    try:
+        for pid in pids:
+            try:
+                fds[pid] = os.pidfd_open(pid)
+            except ProcessLookupError:
+                continue
+        yield fds
+    finally:
+        for fd in fds.values():
+            os.close(fd)
+
+
+def _signal_pidfds(fds: dict[int, int], sig) -> set[int]:
+    """Send 'sig' through every pidfd, return the pids it was denied for."""
+    denied = set()
+    for pid, fd in fds.items():
+        try:
+            signal.pidfd_send_signal(fd, sig)
+        except ProcessLookupError:
+            # Already exited, the wait sees it at once
+            continue
+        except PermissionError:
+            denied.add(pid)
+    return denied
+
+
+def _wait_pidfds(fds: dict[int, int], timeout: Optional[float]) -> set[int]:
+    """
+    Wait until every process in 'fds' exited, or 'timeout' seconds passed
+    (None waits forever), with a single poll set. Returns the pids still alive.
+
+    Exited children of this process aren't reaped: their owner, i.e: the
+    subprocess.Popen that started them, has to wait() for them, and gets
+    their real return code.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    poller = select.poll()
+    pids_by_fd = {}
+    for pid, fd in fds.items():
+        poller.register(fd, select.POLLIN)
+        pids_by_fd[fd] = pid
+
+    alive = set(fds)
+    while alive:
+        wait_ms = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_ms = math.ceil(remaining * 1000)
+
+        for fd, _ in poller.poll(wait_ms):
+            poller.unregister(fd)
+            pid = pids_by_fd[fd]
+            alive.discard(pid)
+
+    return alive
+
+
+def wait_pids(pids: Iterable[int], timeout: Optional[float]) -> set[int]:
+    """
+    Wait until the processes 'pids' exited, return the pids still alive after
+    'timeout'. Children are left for their owner to reap, see _wait_pidfds().
+    """
+    with _open_pidfds(pids) as fds:
+        return _wait_pidfds(fds, timeout)
+
+
 def kill_proc_tree(
     pid,
     sig=signal.SIGTERM,
@@ -142,24 +370,23 @@ def kill_proc_tree(
     try:
         parent = psutil.Process(pid)
         logger.debug(f"Found parent process {pid}: {parent.name()}")
+        children = parent.children(recursive=True)
     except psutil.NoSuchProcess:
         logger.warning(f"Process {pid} does not exist")
         return ((), ())
 
-    children = parent.children(recursive=True)
     logger.debug(f"Found {len(children)} child processes")
     if include_parent:
         children.append(parent)
         logger.debug("Including parent process in kill list")
 
-    for p in children:
-        try:
-            p.send_signal(sig)
-            logger.debug(f"Sent signal {sig} to process {p.pid}")
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            logger.debug(f"Could not send signal to process {p.pid}")
+    with _open_pidfds(p.pid for p in children) as fds:
+        for denied in _signal_pidfds(fds, sig):
+            logger.debug(f"Could not send signal to process {denied}")
+        still_alive = _wait_pidfds(fds, timeout)
 
-    gone, alive = psutil.wait_procs(children, timeout=timeout)
+    gone = [p for p in children if p.pid not in still_alive]
+    alive = [p for p in children if p.pid in still_alive]
     logger.info(f"Process tree kill completed. Gone: {len(gone)}, Alive: {len(alive)}")
     return (gone, alive)
 
@@ -172,35 +399,33 @@ def kill_proc(pid: int, logger=None) -> None:
         logger.error("Attempted to kill own process")
         raise RuntimeError("won't kill myself")
 
-    if not psutil.pid_exists(pid):
-        logger.warning(f"Process {pid} does not exist, nothing to kill")
-        return
-
     try:
-        process = psutil.Process(pid)
-        logger.debug(f"Sending SIGKILL to process {pid}")
-        process.send_signal(signal.SIGKILL)
+        with _open_pidfds([pid]) as fds:
+            if not fds:
+                logger.warning(f"Process {pid} does not exist, nothing to kill")
+                return
+
+            logger.debug(f"Sending SIGKILL to process {pid}")
+            if _signal_pidfds(fds, signal.SIGKILL):
+                logger.error(f"Permission denied when sending SIGKILL to process {pid}")
+                raise ProcessNotKilled(pid, "Permission denied when sending SIGKILL")
+
+            if not _wait_pidfds(fds, KILL_TIMEOUT):
+                logger.info(f"Successfully killed process {pid}")
+                return
+
+        logger.warning(
+            f"SIGKILL timed out for process {pid}, attempting kill_proc_tree"
+        )
         try:
-            process.wait(timeout=1)
-            logger.info(f"Successfully killed process {pid}")
-        except psutil.TimeoutExpired as e:
-            logger.warning(
-                f"SIGKILL timed out for process {pid}, attempting kill_proc_tree"
-            )
-            try:
-                kill_proc_tree(pid, sig=signal.SIGKILL, include_parent=True)
-            except Exception:
-                logger.exception(f"Error in kill_proc_tree for process {pid}")
-                pass
-            # Raise if still active
-            logger.error(f"Process {pid} still alive after SIGKILL and kill_proc_tree")
-            raise ProcessNotKilled(pid, f"SIGKILL timed out: {e}")
-    except psutil.NoSuchProcess:
-        logger.warning(f"Process {pid} no longer exists")
-        return
-    except psutil.AccessDenied as e:
-        logger.error(f"Permission denied when sending SIGKILL to process {pid}: {e}")
-        raise ProcessNotKilled(pid, f"Permission denied when sending SIGKILL: {e}")
+            kill_proc_tree(pid, sig=signal.SIGKILL, include_parent=True, timeout=0)
+        except Exception:
+            logger.exception(f"Error in kill_proc_tree for process {pid}")
+        # Raise if still active
+        logger.error(f"Process {pid} still alive after SIGKILL and kill_proc_tree")
+        raise ProcessNotKilled(pid, f"SIGKILL timed out after {KILL_TIMEOUT}s")
+    except ProcessNotKilled:
+        raise
     except Exception as e:
         logger.exception(f"Unexpected error when killing process {pid}: {e}")
         raise ProcessNotKilled(pid, f"Unexpected error when killing: {e}")
@@ -216,50 +441,42 @@ def term_proc(pid: int, timeout: float, logger=None) -> None:
         logger.error("Attempted to terminate own process")
         raise RuntimeError("won't terminate myself")
 
-    if not psutil.pid_exists(pid):
-        logger.warning(f"Process {pid} does not exist, nothing to terminate")
-        return
-
     try:
-        process = psutil.Process(pid)
-        logger.debug(f"Sending SIGTERM to process {pid}")
-        process.send_signal(signal.SIGTERM)
-        try:
-            process.wait(timeout=timeout)
-            logger.info(f"Successfully terminated process {pid} with SIGTERM")
-            return
-        except psutil.TimeoutExpired:
+        with _open_pidfds([pid]) as fds:
+            if not fds:
+                logger.warning(f"Process {pid} does not exist, nothing to terminate")
+                return
+
+            logger.debug(f"Sending SIGTERM to process {pid}")
+            if _signal_pidfds(fds, signal.SIGTERM):
+                logger.error(f"Permission denied sending SIGTERM to process {pid}")
+                raise ProcessNotKilled(pid, "Permission denied sending SIGTERM")
+
+            if not _wait_pidfds(fds, timeout):
+                logger.info(f"Successfully terminated process {pid} with SIGTERM")
+                return
+
             logger.warning(
                 f"SIGTERM timed out for process {pid}, escalating to SIGKILL"
             )
-            # Escalate to SIGKILL
-            try:
-                process.send_signal(signal.SIGKILL)
-                process.wait(timeout=timeout)
+            if _signal_pidfds(fds, signal.SIGKILL):
+                logger.error(
+                    f"Permission denied escalating to SIGKILL for process {pid}"
+                )
+                raise ProcessNotKilled(pid, "Permission denied escalating to SIGKILL")
+
+            if not _wait_pidfds(fds, timeout):
                 logger.info(
                     f"Successfully killed process {pid} with SIGKILL after timeout"
                 )
                 return
-            except psutil.TimeoutExpired as e:
-                logger.error(
-                    f"Process {pid} still alive after SIGTERM and SIGKILL: {e}"
-                )
-                raise ProcessNotKilled(
-                    pid, f"Timed out after SIGTERM then SIGKILL: {e}"
-                )
-            except psutil.AccessDenied as e:
-                logger.error(
-                    f"Permission denied escalating to SIGKILL for process {pid}: {e}"
-                )
-                raise ProcessNotKilled(
-                    pid, f"Permission denied escalating to SIGKILL: {e}"
-                )
-    except psutil.NoSuchProcess:
-        logger.warning(f"Process {pid} no longer exists")
-        return
-    except psutil.AccessDenied as e:
-        logger.error(f"Permission denied sending SIGTERM to process {pid}: {e}")
-        raise ProcessNotKilled(pid, f"Permission denied sending SIGTERM: {e}")
+
+        logger.error(f"Process {pid} still alive after SIGTERM and SIGKILL")
+        raise ProcessNotKilled(
+            pid, f"Timed out after SIGTERM then SIGKILL ({timeout}s each)"
+        )
+    except ProcessNotKilled:
+        raise
     except Exception as e:
         logger.exception(f"Unexpected error terminating process {pid}: {e}")
         raise ProcessNotKilled(pid, f"Unexpected error terminating process: {e}")
@@ -285,14 +502,7 @@ def is_running(name: str, logger=None) -> bool:
     """Returns True if process 'name' is running, False otherwise"""
     logger = logger or get_caller_logger()
     logger.debug(f"Checking if process '{name}' is running")
-    proc = get_proc(name)
-    if not proc:
-        logger.debug(f"Process '{name}' not found")
-        return False
-    try:
-        result = proc.is_running()
-        logger.debug(f"Process '{name}' is running: {result}")
-        return result
-    except (psutil.NoSuchProcess, psutil.ZombieProcess):
-        logger.debug(f"Process '{name}' is no longer running or is a zombie")
-        return False
+    # Zombies are never matched, so any pid means a running process
+    result = bool(find_pids([name])[name.lower()])
+    logger.debug(f"Process '{name}' is running: {result}")
+    return result
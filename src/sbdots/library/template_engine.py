@@ -0,0 +1,518 @@
+"""
+In-process renderer for matugen templates.
+
+Implements the subset of matugen's template syntax used by the SBDots
+templates:
+
+- '{{ colors.primary.default.hex }}' variable lookups
+- filters: '{{ colors.surface.default.rgba | set_alpha: 0.3 }}'
+- loops: '<* for name, value in colors *> ... <* endfor *>'
+
+Templates are compiled once into render functions (cached on the file's
+mtime/size) and rendered against a context built from matugen's json
+output. Outputs are written atomically and only when their bytes changed.
+Anything unsupported raises TemplateError, so callers can fall back to
+running matugen itself.
+"""
+
+from __future__ import annotations
+
+import colorsys
+import logging
+import os
+import re
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from sbdots.library import tracing
+from sbdots.library.exceptions import ConfigNotFound, TemplateError
+from sbdots.library.logger import get_caller_logger
+from sbdots.constants import MATUGEN_CONFIG_PATH
+
+RenderFunc = Callable[[dict[str, Any]], str]
+
+_TAG_RE = re.compile(r"\{\{(.*?)\}\}|<\*(.*?)\*>", re.DOTALL)
+_FOR_RE = re.compile(r"for\s+(\w+)(?:\s*,\s*(\w+))?\s+in\s+([\w.]+)")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_COLOR_FN_RE = re.compile(r"(rgba?|hsla?)\(([^)]*)\)")
+
+
+# =============================================================================
+# COLORS
+# =============================================================================
+def _parse_color(value: str) -> tuple[float, float, float, float, str]:
+    """Parse a color string into (r, g, b, a, format), rgb in 0-255, a in 0-1."""
+    value = value.strip()
+
+    if match := _COLOR_FN_RE.fullmatch(value):
+        fmt, args = match.groups()
+        parts = [p.strip().rstrip("%") for p in args.split(",")]
+        try:
+            nums = [float(p) for p in parts]
+        except ValueError as e:
+            raise TemplateError(f"Invalid color: '{value}'") from e
+
+        alpha = nums[3] if len(nums) > 3 else 1.0
+        if fmt.startswith("hsl"):
+            r, g, b = colorsys.hls_to_rgb(nums[0] / 360, nums[2] / 100, nums[1] / 100)
+            return r * 255, g * 255, b * 255, alpha, fmt
+        return nums[0], nums[1], nums[2], alpha, fmt
+
+    stripped = value.lstrip("#")
+    if len(stripped) in (6, 8):
+        try:
+            channels = [
+                int(stripped[i : i + 2], 16) for i in range(0, len(stripped), 2)
+            ]
+        except ValueError as e:
+            raise TemplateError(f"Invalid color: '{value}'") from e
+
+        alpha = channels[3] / 255 if len(channels) == 4 else 1.0
+        fmt = "hex" if value.startswith("#") else "hex_stripped"
+        return channels[0], channels[1], channels[2], alpha, fmt
+
+    raise TemplateError(f"Invalid color: '{value}'")
+
+
+def _fmt_alpha(alpha: float) -> str:
+    return f"{round(alpha, 2):g}"
+
+
+def _format_color(r: float, g: float, b: float, a: float, fmt: str) -> str:
+    r, g, b = (max(0, min(255, round(c))) for c in (r, g, b))
+
+    if fmt in ("hex", "hex_stripped"):
+        out = f"{r:02x}{g:02x}{b:02x}"
+        if a < 1:
+            out += f"{round(a * 255):02x}"
+        return f"#{out}" if fmt == "hex" else out
+
+    if fmt.startswith("hsl"):
+        h, light, s = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+        body = f"{round(h * 360)}, {round(s * 100)}%, {round(light * 100)}%"
+        if fmt == "hsla" or a < 1:
+            return f"hsla({body}, {_fmt_alpha(a)})"
+        return f"hsl({body})"
+
+    if fmt == "rgba" or a < 1:
+        return f"rgba({r}, {g}, {b}, {_fmt_alpha(a)})"
+    return f"rgb({r}, {g}, {b})"
+
+
+def _adjust_hsl(value: str, *, lightness: float = 0, saturation: float = 0) -> str:
+    r, g, b, a, fmt = _parse_color(value)
+    h, light, s = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+    light = max(0.0, min(1.0, light + lightness / 100))
+    s = max(0.0, min(1.0, s + saturation / 100))
+    r, g, b = colorsys.hls_to_rgb(h, light, s)
+    return _format_color(r * 255, g * 255, b * 255, a, fmt)
+
+
+def color_formats(value: str) -> dict[str, str]:
+    """Return every format matugen exposes for a color ('hex', 'rgba', ...)."""
+    r, g, b, _, _ = _parse_color(value)
+    h, light, s = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+    r, g, b = round(r), round(g), round(b)
+
+    return {
+        "hex": f"#{r:02x}{g:02x}{b:02x}",
+        "hex_stripped": f"{r:02x}{g:02x}{b:02x}",
+        "rgb": f"rgb({r}, {g}, {b})",
+        "rgba": f"rgba({r}, {g}, {b}, 1)",
+        "hsl": f"hsl({round(h * 360)}, {round(s * 100)}%, {round(light * 100)}%)",
+        "hsla": f"hsla({round(h * 360)}, {round(s * 100)}%, {round(light * 100)}%, 1)",
+        "red": str(r),
+        "green": str(g),
+        "blue": str(b),
+        "alpha": "1",
+        "hue": str(round(h * 360)),
+        "saturation": str(round(s * 100)),
+        "lightness": str(round(light * 100)),
+    }
+
+
+# =============================================================================
+# FILTERS
+# =============================================================================
+def _set_alpha(value: str, alpha: float) -> str:
+    r, g, b, _, fmt = _parse_color(value)
+    return _format_color(r, g, b, float(alpha), fmt)
+
+
+def _auto_lightness(value: str, amount: float) -> str:
+    """Lighten dark colors and darken light ones by 'amount' percent."""
+    r, g, b, _, _ = _parse_color(value)
+    _, light, _ = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+    amount = float(amount)
+    return _adjust_hsl(value, lightness=amount if light < 0.5 else -amount)
+
+
+def _saturate(value: str, amount: float, space: str = "hsl") -> str:
+    return _adjust_hsl(value, saturation=float(amount))
+
+
+def _desaturate(value: str, amount: float, space: str = "hsl") -> str:
+    return _adjust_hsl(value, saturation=-float(amount))
+
+
+FILTERS: dict[str, Callable[..., str]] = {
+    "set_alpha": _set_alpha,
+    "auto_lightness": _auto_lightness,
+    "lighten": lambda v, amount: _adjust_hsl(v, lightness=float(amount)),
+    "darken": lambda v, amount: _adjust_hsl(v, lightness=-float(amount)),
+    "saturate": _saturate,
+    "desaturate": _desaturate,
+    "to_upper": lambda v: str(v).upper(),
+    "to_lower": lambda v: str(v).lower(),
+    "replace": lambda v, old, new: str(v).replace(str(old), str(new)),
+}
+
+
+# =============================================================================
+# CONTEXT
+# =============================================================================
+def _color_value(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("color") or value.get("hex")
+    return value if isinstance(value, str) else None
+
+
+def _normalize_group(raw: dict[str, Any], mode: str) -> dict[str, dict]:
+    """Normalize a matugen color group to {name: {variant: formats}}."""
+    # Older matugen: grouped by mode first, i.e: {"dark": {"primary": "#..."}}
+    if (
+        raw
+        and set(raw) <= {"light", "dark"}
+        and all(isinstance(v, dict) for v in raw.values())
+    ):
+        by_name: dict[str, dict] = {}
+        for variant, colors in raw.items():
+            for name, value in colors.items():
+                by_name.setdefault(name, {})[variant] = value
+    else:
+        by_name = raw
+
+    out: dict[str, dict] = {}
+    for name, variants in by_name.items():
+        if not isinstance(variants, dict) or "color" in variants:
+            variants = {"default": variants}
+
+        resolved = {}
+        for variant, value in variants.items():
+            if color := _color_value(value):
+                resolved[variant] = color_formats(color)
+
+        if "default" not in resolved and mode in resolved:
+            resolved["default"] = resolved[mode]
+        out[name] = resolved
+
+    return dict(sorted(out.items()))
+
+
+def build_context(
+    palette: dict[str, Any], mode: str, image: Optional[str] = None
+) -> dict[str, Any]:
+    """Build the template context from matugen's '--json hex' output."""
+    context: dict[str, Any] = {"mode": mode, "image": image or ""}
+
+    for group in ("colors", "base16"):
+        raw = palette.get(group)
+        if isinstance(raw, dict):
+            context[group] = _normalize_group(raw, mode)
+
+    if "colors" not in context:
+        raise TemplateError("Palette has no 'colors'")
+
+    return context
+
+
+# =============================================================================
+# COMPILER
+# =============================================================================
+def _parse_arg(arg: str) -> Any:
+    arg = arg.strip()
+    if _NUMBER_RE.fullmatch(arg):
+        return float(arg)
+    if len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in "\"'":
+        return arg[1:-1]
+    return arg
+
+
+def _compile_expr(expr: str) -> RenderFunc:
+    """Compile '{{ path | filter: args | ... }}' into a render function."""
+    head, *filter_specs = expr.split("|")
+    path = tuple(head.strip().split("."))
+    if not all(path):
+        raise TemplateError(f"Invalid expression: '{{{{{expr}}}}}'")
+
+    filters = []
+    for spec in filter_specs:
+        name, _, args = spec.partition(":")
+        name = name.strip()
+        if name not in FILTERS:
+            raise TemplateError(f"Unknown filter '{name}' in '{{{{{expr}}}}}'")
+        parsed = [_parse_arg(a) for a in args.split(",")] if args.strip() else []
+        filters.append((FILTERS[name], parsed))
+
+    def render(scope: dict[str, Any]) -> str:
+        value = _lookup(scope, path)
+        for func, args in filters:
+            value = func(value, *args)
+        if isinstance(value, (dict, list)):
+            raise TemplateError(f"Cannot render '{'.'.join(path)}', not a value")
+        return str(value)
+
+    return render
+
+
+def _lookup(scope: dict[str, Any], path: tuple[str, ...]) -> Any:
+    value: Any = scope
+    for i, part in enumerate(path):
+        if not isinstance(value, dict) or part not in value:
+            raise TemplateError(f"Undefined variable '{'.'.join(path[: i + 1])}'")
+        value = value[part]
+    return value
+
+
+def _compile_for(match: re.Match, body: RenderFunc) -> RenderFunc:
+    key_var, value_var, source = match.groups()
+    path = tuple(source.split("."))
+
+    def render(scope: dict[str, Any]) -> str:
+        iterable = _lookup(scope, path)
+        out = []
+        if isinstance(iterable, dict):
+            for key, value in iterable.items():
+                inner = {**scope, key_var: key}
+                if value_var:
+                    inner[value_var] = value
+                out.append(body(inner))
+        elif isinstance(iterable, list):
+            for item in iterable:
+                out.append(body({**scope, key_var: item}))
+        else:
+            raise TemplateError(f"Cannot iterate over '{source}'")
+        return "".join(out)
+
+    return render
+
+
+def _join(parts: list[RenderFunc | str]) -> RenderFunc:
+    # Merge adjacent literals so rendering is a single pass over few parts
+    merged: list[RenderFunc | str] = []
+    for part in parts:
+        if isinstance(part, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += part
+        else:
+            merged.append(part)
+
+    literals = [p for p in merged if isinstance(p, str)]
+    if len(literals) == len(merged):
+        text = "".join(literals)
+        return lambda scope: text
+
+    def render(scope: dict[str, Any]) -> str:
+        return "".join(p if isinstance(p, str) else p(scope) for p in merged)
+
+    return render
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str) -> RenderFunc:
+    """Compile template source into a reusable render function."""
+    # Stack of parts lists, the bottom one is the template itself, and the
+    # 'for' match of every open loop above it
+    stack: list[list[RenderFunc | str]] = [[]]
+    loops: list[re.Match] = []
+    pos = 0
+
+    for match in _TAG_RE.finditer(source):
+        parts = stack[-1]
+        if match.start() > pos:
+            parts.append(source[pos : match.start()])
+        pos = match.end()
+
+        expr, block = match.groups()
+        if expr is not None:
+            parts.append(_compile_expr(expr))
+            continue
+
+        block = block.strip()
+        if for_match := _FOR_RE.fullmatch(block):
+            stack.append([])
+            loops.append(for_match)
+        elif block == "endfor":
+            if not loops:
+                raise TemplateError("'endfor' without a matching 'for'")
+            body = stack.pop()
+            stack[-1].append(_compile_for(loops.pop(), _join(body)))
+        else:
+            raise TemplateError(f"Unsupported block: '<* {block} *>'")
+
+    if loops:
+        raise TemplateError("Unclosed 'for' block")
+
+    if pos < len(source):
+        stack[0].append(source[pos:])
+    return _join(stack[0])
+
+
+_COMPILED: dict[Path, tuple[tuple[int, int], RenderFunc]] = {}
+_COMPILED_LOCK = threading.Lock()
+
+
+def load_template(path: Path) -> RenderFunc:
+    """Return the compiled render function for 'path', recompiling on change."""
+    st = path.stat()
+    key = (st.st_mtime_ns, st.st_size)
+
+    with _COMPILED_LOCK:
+        cached = _COMPILED.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    render = compile_template(path.read_text(encoding="utf-8"))
+    with _COMPILED_LOCK:
+        _COMPILED[path] = (key, render)
+    return render
+
+
+# =============================================================================
+# RENDERING
+# =============================================================================
+@dataclass(frozen=True)
+class TemplateSpec:
+    """A '[templates.<name>]' entry of matugen's config."""
+
+    name: str
+    input_path: Path
+    output_path: Path
+    post_hook: Optional[str] = None
+
+
+@dataclass
+class RenderResult:
+    changed: list[TemplateSpec] = field(default_factory=list)
+    unchanged: list[TemplateSpec] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def load_matugen_config(path: Path = MATUGEN_CONFIG_PATH) -> list[TemplateSpec]:
+    """Read the template entries from matugen's config.toml."""
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError as e:
+        raise ConfigNotFound(
+            f"Config file '{path}' not found, Error: {e.strerror}"
+        ) from e
+
+    specs = []
+    for name, entry in data.get("templates", {}).items():
+        try:
+            specs.append(
+                TemplateSpec(
+                    name=name,
+                    input_path=Path(entry["input_path"]).expanduser(),
+                    output_path=Path(entry["output_path"]).expanduser(),
+                    post_hook=entry.get("post_hook"),
+                )
+            )
+        except (KeyError, TypeError) as e:
+            raise TemplateError(f"Invalid template entry '{name}': {e}") from e
+
+    return specs
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Atomically write 'data' to 'path' unless it already holds it."""
+    target = Path(os.path.realpath(path))
+
+    try:
+        if target.stat().st_size == len(data) and target.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def render_templates(
+    specs: list[TemplateSpec],
+    context: dict[str, Any],
+    *,
+    max_workers: Optional[int] = None,
+    logger: Optional[logging.Logger] = None,
+) -> RenderResult:
+    """
+    Render every template against 'context' in parallel.
+
+    All templates are rendered before anything is written, so a template
+    error raises TemplateError with the outputs untouched. Only outputs
+    whose bytes changed are rewritten.
+    """
+    logger = logger or get_caller_logger()
+    result = RenderResult()
+    if not specs:
+        return result
+
+    workers = max_workers or min(8, len(specs))
+
+    def _render(spec: TemplateSpec) -> bytes:
+        return load_template(spec.input_path)(context).encode("utf-8")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rendered: dict[TemplateSpec, bytes] = {}
+        errors: dict[str, str] = {}
+        futures = {tracing.submit(pool, _render, spec): spec for spec in specs}
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                rendered[spec] = future.result()
+            except (TemplateError, OSError, UnicodeError) as e:
+                errors[spec.name] = str(e)
+
+        if errors:
+            raise TemplateError(
+                "Failed to render templates: "
+                + ", ".join(f"{name}: {err}" for name, err in errors.items())
+            )
+
+        futures = {
+            tracing.submit(pool, write_if_changed, spec.output_path, data): spec
+            for spec, data in rendered.items()
+        }
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                if future.result():
+                    result.changed.append(spec)
+                else:
+                    result.unchanged.append(spec)
+            except OSError as e:
+                logger.error(f"Failed to write '{spec.output_path}': {e}")
+                result.failed[spec.name] = str(e)
+
+    # Keep config order, callers run post-hooks in it
+    order = {spec: i for i, spec in enumerate(specs)}
+    result.changed.sort(key=order.__getitem__)
+    result.unchanged.sort(key=order.__getitem__)
+
+    logger.debug(
+        f"Rendered {len(specs)} templates, changed: {[s.name for s in result.changed]}"
+    )
+    return result
@@ -0,0 +1,226 @@
+"""
+Reload running apps after their matugen outputs changed.
+
+matugen's post-hooks are shell one-liners ('pkill -SIGUSR1 kitty',
+'swaync-client -rs', 'gsettings set ...'). The ones SBDots ships are mapped
+here, by their exact command, to in-process equivalents: signals sent
+straight to the processes, Gio settings and D-Bus calls, direct pty
+writes and Hyprland color keywords. Reloads run concurrently and only for
+templates whose output changed. Unknown (user defined) hooks are handed back
+to the caller to run as shell commands.
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from sbdots.library import hyprland, tracing
+from sbdots.library.logger import get_caller_logger
+from sbdots.library.procs_utils import find_pids
+from sbdots.library.template_engine import TemplateSpec, compile_template
+
+# Seconds to wait on D-Bus before giving up
+IPC_TIMEOUT = 2
+
+GNOME_INTERFACE_SCHEMA = "org.gnome.desktop.interface"
+
+
+@dataclass(frozen=True)
+class SignalProcess:
+    """Reload by sending 'sig' to every process named 'process'."""
+
+    process: str
+    sig: signal.Signals
+
+
+@dataclass
+class ReloadResult:
+    reloaded: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+Reloader = Callable[[TemplateSpec, dict[str, Any]], None]
+
+
+# =============================================================================
+# RELOADERS
+# =============================================================================
+def _send_signals(signals: dict[str, set[signal.Signals]]) -> None:
+    """Signal every process in 'signals' after a single pass over /proc."""
+    pids = find_pids(signals)
+    for name, sigs in signals.items():
+        for pid in pids[name.lower()]:
+            for sig in sigs:
+                try:
+                    os.kill(pid, sig)
+                except ProcessLookupError:
+                    pass
+
+
+def _write_ptys(spec: TemplateSpec, context: dict[str, Any]) -> None:
+    """Write the escape sequences to every open terminal."""
+    data = Path(os.path.realpath(spec.output_path)).read_bytes()
+
+    for pty in glob.glob("/dev/pts/[0-9]*"):
+        try:
+            fd = os.open(pty, os.O_WRONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError:
+            continue
+        try:
+            os.write(fd, data)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _gio():
+    # Imported here, only GTK reloads need it. Unresolved by type checkers
+    # wherever PyGObject's system libraries aren't installed
+    import gi  # ty: ignore[unresolved-import]
+
+    gi.require_version("Gio", "2.0")
+    from gi.repository import Gio  # ty: ignore[unresolved-import]
+
+    return Gio
+
+
+def _reload_gtk3(spec: TemplateSpec, context: dict[str, Any]) -> None:
+    """Re-apply the adw-gtk3 theme, GTK3 apps only re-read css on theme change."""
+    Gio = _gio()
+    settings = Gio.Settings.new(GNOME_INTERFACE_SCHEMA)
+
+    settings.set_string("gtk-theme", "")
+    Gio.Settings.sync()
+    settings.set_string("gtk-theme", f"adw-gtk3-{context['mode']}")
+    Gio.Settings.sync()
+
+
+def _reload_gtk4(spec: TemplateSpec, context: dict[str, Any]) -> None:
+    """Flip the color scheme back and forth so libadwaita apps reload css."""
+    Gio = _gio()
+    settings = Gio.Settings.new(GNOME_INTERFACE_SCHEMA)
+
+    current = settings.get_string("color-scheme")
+    flipped = "prefer-light" if current == "prefer-dark" else "prefer-dark"
+    settings.set_string("color-scheme", flipped)
+    Gio.Settings.sync()
+    settings.set_string("color-scheme", current)
+    Gio.Settings.sync()
+
+
+def _reload_swaync(spec: TemplateSpec, context: dict[str, Any]) -> None:
+    Gio = _gio()
+    bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    bus.call_sync(
+        "org.erikreider.swaync.cc",
+        "/org/erikreider/swaync/cc",
+        "org.erikreider.swaync.cc",
+        "ReloadCss",
+        None,
+        None,
+        Gio.DBusCallFlags.NO_AUTO_START,
+        IPC_TIMEOUT * 1000,
+        None,
+    )
+
+
+def _reload_hyprland(spec: TemplateSpec, context: dict[str, Any]) -> None:
+    hyprland.apply_colors(context)
+
+
+# Post-hooks shipped in SBDots' matugen config, by exact command
+BUILTIN_RELOADERS: dict[str, Union[SignalProcess, Reloader]] = {
+    "pkill -SIGUSR1 kitty": SignalProcess("kitty", signal.SIGUSR1),
+    "pkill -USR2 btop || true": SignalProcess("btop", signal.SIGUSR2),
+    "pkill -USR1 cava || true": SignalProcess("cava", signal.SIGUSR1),
+    "pkill -SIGUSR2 waybar": SignalProcess("waybar", signal.SIGUSR2),
+    "tee /dev/pts/[0-9]* < ~/.cache/terminal-sequences": _write_ptys,
+    "hyprctl reload": _reload_hyprland,
+    "swaync-client -rs": _reload_swaync,
+    'gsettings set org.gnome.desktop.interface gtk-theme ""; '
+    "gsettings set org.gnome.desktop.interface gtk-theme adw-gtk3-{{mode}}": _reload_gtk3,
+    "~/.config/matugen/post-hook-scripts/gtk-themes-reload.sh": _reload_gtk4,
+}
+
+
+def get_reloader(spec: TemplateSpec) -> Optional[Union[SignalProcess, Reloader]]:
+    """Return the in-process reloader for the spec's post-hook, if there is one."""
+    if not spec.post_hook:
+        return None
+    return BUILTIN_RELOADERS.get(spec.post_hook.strip())
+
+
+# =============================================================================
+# COORDINATOR
+# =============================================================================
+def _run_user_hook(
+    run_hook: Callable[[TemplateSpec, str], None],
+    spec: TemplateSpec,
+    context: dict[str, Any],
+) -> None:
+    run_hook(spec, compile_template(spec.post_hook)(context))
+
+
+def reload_changed(
+    changed: list[TemplateSpec],
+    context: dict[str, Any],
+    *,
+    run_hook: Optional[Callable[[TemplateSpec, str], None]] = None,
+    max_workers: int = 8,
+    logger: Optional[logging.Logger] = None,
+) -> ReloadResult:
+    """
+    Reload the apps of every changed template, concurrently.
+
+    Post-hooks without an in-process equivalent are rendered and passed to
+    'run_hook' (skipped when it is None). Signals for all templates are
+    sent after a single process scan.
+    """
+    logger = logger or get_caller_logger()
+    result = ReloadResult()
+
+    jobs: dict[str, Callable[[], None]] = {}
+    signals: dict[str, set[signal.Signals]] = {}
+    signalled: list[str] = []
+
+    for spec in changed:
+        if not spec.post_hook:
+            continue
+
+        reloader = get_reloader(spec)
+        if isinstance(reloader, SignalProcess):
+            signals.setdefault(reloader.process, set()).add(reloader.sig)
+            signalled.append(spec.name)
+        elif reloader is not None:
+            jobs[spec.name] = partial(reloader, spec, context)
+        elif run_hook is not None:
+            jobs[spec.name] = partial(_run_user_hook, run_hook, spec, context)
+
+    if signals:
+        jobs[", ".join(signalled)] = partial(_send_signals, signals)
+
+    if not jobs:
+        return result
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        futures = {tracing.submit(pool, job): name for name, job in jobs.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+                result.reloaded.append(name)
+            except Exception as e:
+                logger.warning(f"Failed to reload '{name}': {e}")
+                result.failed[name] = str(e)
+
+    logger.debug(f"Reloaded: {result.reloaded}, failed: {list(result.failed)}")
+    return result
@@ -0,0 +1,261 @@
+"""
+Opt-in tracing of subprocesses and daemon requests.
+
+Enabled with the SBDOTS_TRACE environment variable (any value but "0"), or
+'trace = true' in the [core] settings. Every span (an action request, a
+spawned command...) is appended to '<state dir>/traces/<program>.<pid>.json'
+in the Chrome trace event format, which chrome://tracing and ui.perfetto.dev
+open as a flame timeline. The file is a JSON array left open at the end, so
+events can be appended by any number of threads without rewriting it; both
+viewers accept that. Each process writes its own file, rotated past
+TRACE_MAX_BYTES, and only the TRACE_MAX_FILES newest files are kept.
+
+Spans nest by time on a thread and each one records the span it started in
+as 'parent' (tracked with a contextvar), i.e: the action that ran a command.
+Jobs given to a thread pool keep their parent when submitted with submit().
+Disabled, span() is a near no-op.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from pathlib import Path
+from typing import Any, Callable, Generator, Optional
+
+from sbdots.constants import (
+    SBDOTS_STATE_DIR,
+    TRACE_BACKUP_COUNT,
+    TRACE_ENV_VAR,
+    TRACE_MAX_BYTES,
+    TRACE_MAX_FILES,
+)
+
+TRACE_DIR = SBDOTS_STATE_DIR / "traces"
+
+_enabled: Optional[bool] = None
+_parent: ContextVar[Optional[str]] = ContextVar("sbdots_trace_parent", default=None)
+
+
+def enabled() -> bool:
+    """Whether tracing is on, decided once per process."""
+    global _enabled
+    if _enabled is None:
+        value = os.environ.get(TRACE_ENV_VAR)
+        if value is not None:
+            _enabled = value not in ("", "0")
+        else:
+            # Imported here, the settings module pulls in more than tracing needs
+            from sbdots.library.config_utils import get_config
+
+            setting = get_config("trace") or ""
+            _enabled = setting.lower() in ("1", "true", "yes", "on")
+    return _enabled
+
+
+def set_enabled(value: Optional[bool]) -> None:
+    """Force tracing on or off, None to decide again from the environment."""
+    global _enabled
+    _enabled = value
+
+
+def now_us() -> float:
+    """Trace timestamp: microseconds, monotonic."""
+    return time.monotonic_ns() / 1000
+
+
+class _TraceWriter:
+    """Appends events to a trace file, one write() each, rotating it when too big."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._size = 0
+        self._named_threads: set[int] = set()
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._fd is None and not self.path.exists():
+            _prune(self.path.parent)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._size = os.fstat(self._fd).st_size
+        self._named_threads.clear()
+        if self._size == 0:
+            self._append("[\n")
+        self._write_event(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": _program()},
+            }
+        )
+
+    def _rotate(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        for i in range(TRACE_BACKUP_COUNT - 1, 0, -1):
+            src = self.path.with_suffix(f".{i}.json")
+            if src.exists():
+                src.replace(self.path.with_suffix(f".{i + 1}.json"))
+        if TRACE_BACKUP_COUNT > 0:
+            self.path.replace(self.path.with_suffix(".1.json"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def _append(self, text: str) -> None:
+        assert self._fd is not None
+        data = text.encode("utf-8")
+        os.write(self._fd, data)
+        self._size += len(data)
+
+    def _write_event(self, event: dict) -> None:
+        # A separator before every event but the first, so the array stays valid when cut off
+        prefix = "" if self._size <= 2 else ","
+        self._append(
+            prefix + json.dumps(event, separators=(",", ":"), default=str) + "\n"
+        )
+
+    def write(self, event: dict) -> None:
+        with self._lock:
+            try:
+                if self._fd is None:
+                    self._open()
+                elif self._size > TRACE_MAX_BYTES:
+                    self._rotate()
+                    self._open()
+
+                tid = event["tid"]
+                if tid not in self._named_threads:
+                    self._named_threads.add(tid)
+                    self._write_event(
+                        {
+                            "name": "thread_name",
+                            "ph": "M",
+                            "pid": event["pid"],
+                            "tid": tid,
+                            "args": {"name": threading.current_thread().name},
+                        }
+                    )
+                self._write_event(event)
+            except OSError:
+                # Tracing must never break what it traces
+                pass
+
+
+_writer: Optional[_TraceWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _program() -> str:
+    return Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "python"
+
+
+def _prune(trace_dir: Path) -> None:
+    """Remove all but the TRACE_MAX_FILES - 1 newest trace files, making room for one."""
+    files = []
+    for path in trace_dir.glob("*.json"):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            pass
+    files.sort(reverse=True)
+    for _, path in files[max(0, TRACE_MAX_FILES - 1) :]:
+        path.unlink(missing_ok=True)
+
+
+def _get_writer() -> _TraceWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            # One file per process: appends of several processes would interleave
+            path = TRACE_DIR / f"{_program()}.{os.getpid()}.json"
+            _writer = _TraceWriter(path)
+        return _writer
+
+
+def record(
+    name: str,
+    start_us: float,
+    end_us: Optional[float] = None,
+    cat: str = "subprocess",
+    args: Optional[dict[str, Any]] = None,
+) -> None:
+    """Record a finished span that started at 'start_us' (see now_us())."""
+    if not enabled():
+        return
+
+    args = dict(args or {})
+    args.setdefault("parent", _parent.get())
+    end_us = now_us() if end_us is None else end_us
+    _get_writer().write(
+        {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start_us,
+            "dur": max(0.0, end_us - start_us),
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        }
+    )
+
+
+@contextmanager
+def span(
+    name: str, cat: str = "subprocess", **args: Any
+) -> Generator[dict[str, Any], None, None]:
+    """
+    Time the block as a span. Yields its args dict, to add results such as
+    a return code; an exception escaping the block is recorded as 'error'.
+    """
+    if not enabled():
+        yield args
+        return
+
+    start = now_us()
+    args["parent"] = _parent.get()
+    token = _parent.set(name)
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = f"{type(e).__name__}: {e}"
+        returncode = getattr(e, "returncode", None)
+        if returncode is not None:
+            args.setdefault("returncode", returncode)
+        raise
+    finally:
+        _parent.reset(token)
+        record(name, start, cat=cat, args=args)
+
+
+def submit(pool: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """pool.submit(), running 'fn' in the current context so its spans keep their parent."""
+    return pool.submit(copy_context().run, fn, *args, **kwargs)
+
+
+def command_name(cmd: Any) -> str:
+    """Span name of a command: its executable's name."""
+    if isinstance(cmd, (list, tuple)):
+        first = str(cmd[0]) if cmd else "?"
+    else:
+        first = str(cmd).split(maxsplit=1)[0] if str(cmd).strip() else "?"
+    return os.path.basename(first)
+
+
+def run(cmd: Any, **kwargs: Any) -> subprocess.CompletedProcess:
+    """subprocess.run(), recorded as a span with its argv and return code."""
+    with span(command_name(cmd), argv=cmd) as info:
+        result = subprocess.run(cmd, **kwargs)
+        info["returncode"] = result.returncode
+        return result
@@ -1,5 +1,6 @@
 import subprocess
 
+from sbdots.library.commands import SudoEvent, SudoEventKind
 from sbdots.library.pkg_utils import is_installed, install_package
 from sbdots.library.sudo_keep_alive import SudoKeepAlive
 from sbdots.library.cli_utils import (
@@ -64,8 +65,12 @@ class OptPackagesInstaller:
             for pkg in chosen:
                 with Spinner(f"Installing {pkg}", verbose=self.verbose) as spinner:
                     try:
-                        # Attempt to install the package
-                        if install_package(package=pkg, logger=self.logger):
+                        # Attempt to install the package, showing its progress
+                        if install_package(
+                            package=pkg,
+                            logger=self.logger,
+                            on_event=self._progress(pkg, spinner),
+                        ):
                             self.logger.info(f"Package: {pkg} installed.")
                             spinner.success(f"Installed {pkg}")
                         else:
@@ -103,3 +108,25 @@ class OptPackagesInstaller:
             self.logger.info("All optional packages installed successfully!")
 
         return True
+
+    def _progress(self, pkg: str, spinner: Spinner):
+        """Return an 'on_event' callback rendering install progress of 'pkg' in 'spinner'"""
+
+        def _on_event(event: SudoEvent) -> None:
+            if event.kind is SudoEventKind.ERROR:
+                self.logger.error(f"{pkg}: {event.line}")
+            elif event.kind is SudoEventKind.DOWNLOAD:
+                spinner.progress(
+                    f"{pkg}: Downloading", item=event.package, percent=event.percent
+                )
+            elif event.kind is SudoEventKind.INSTALLING:
+                spinner.progress(
+                    f"{pkg}: Installing",
+                    item=event.package,
+                    current=event.current,
+                    total=event.total,
+                )
+            elif text := event.describe():
+                spinner.update_text(f"{pkg}: {text}")
+
+        return _on_event
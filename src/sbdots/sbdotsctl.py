@@ -1,9 +1,11 @@
 import typer
 
 from sbdots.ctl.services.waybar import cli_api as waybar
+from sbdots.ctl.wallpapers import cli_api as wallpapers
 
 # Main typer app
 cli = typer.Typer()
 
 # Commands, every cli_api returns a typer app containing its subcommands
 cli.add_typer(waybar(), name="waybar")
+cli.add_typer(wallpapers(), name="wallpapers")
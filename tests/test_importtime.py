@@ -0,0 +1,70 @@
+"""
+Import-time budgets of the entry points, measured with 'python -X importtime'
+in a fresh interpreter. Heavy dependencies must only load when used.
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Dependencies only the interactive CLI output (or one action) should load
+HEAVY = {"rich", "pyfiglet", "typer", "requests"}
+
+# module -> (budget in ms, heavy modules it may import)
+BUDGETS = {
+    "sbdots": (100, set()),
+    "sbdots.sbdotsctl": (600, {"typer"}),
+    "sbdots.daemons.actions": (300, set()),
+    "sbdots.daemons.cliplistener": (300, set()),
+    "sbdots.library.commands": (300, set()),
+}
+
+
+def import_times(module: str, home) -> dict[str, int]:
+    """Cumulative import time of every module imported by 'module', in us."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+        # The daemons set up their logs and history on import
+        "HOME": str(home),
+        "XDG_RUNTIME_DIR": str(home),
+    }
+    env.pop("SBDOTS_TRACE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", list(BUDGETS))
+def test_import_budget(module, tmp_path):
+    budget_ms, allowed = BUDGETS[module]
+    times = import_times(module, tmp_path)
+
+    heavy = {name.split(".")[0] for name in times} & HEAVY
+    assert heavy <= allowed
+
+    assert times[module] / 1000 <= budget_ms
+
+
+@pytest.mark.parametrize(
+    "package", ["sbdots.library.cli_utils", "sbdots.library.command"]
+)
+def test_lazy_exports_are_public(package):
+    module = importlib.import_module(package)
+    assert sorted(module.__all__) == sorted(module._EXPORTS)
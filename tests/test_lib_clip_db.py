@@ -0,0 +1,205 @@
+import hashlib
+import os
+import random
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sbdots.library import clip_store
+from sbdots.library.clip_db import ClipDB, get_options
+from sbdots.library.clip_query import ClipDBMenu
+
+
+@pytest.fixture
+def db_file(tmp_path: Path):
+    return tmp_path / "cliphist.db"
+
+
+def make_db(db_file: Path, **limits) -> ClipDB:
+    limits.setdefault("max_size_mb", 0)
+    db = ClipDB(db_file, **limits)
+    db.load()
+    return db
+
+
+def make_record(text: str, mime: str = "text/plain"):
+    data = text.encode()
+    digest = hashlib.sha256(data).hexdigest()
+    return clip_store.ClipRecord(
+        digest, mime, clip_store.make_preview(data, mime)
+    ), data
+
+
+def add(db: ClipDB, text: str, mime: str = "text/plain") -> clip_store.ClipRecord:
+    record, data = make_record(text, mime)
+    db.add(record, data)
+    return record
+
+
+def test_entries_are_newest_first_and_deduped(db_file):
+    db = make_db(db_file)
+    first = add(db, "first")
+    second = add(db, "second")
+    assert db.entries() == [second, first]
+
+    add(db, "first")
+    assert db.entries() == [first, second]
+    assert len(db) == 2
+
+
+def test_retention_by_count_returns_evicted_hashes(db_file):
+    db = make_db(db_file, max_entries=2)
+    oldest = add(db, "one")
+    add(db, "two")
+
+    record, data = make_record("three")
+    assert db.add(record, data) == [oldest.hash]
+    assert len(db) == 2
+
+
+def test_retention_by_size(db_file):
+    db = make_db(db_file, max_size_mb=1)
+    big = "x" * (700 * 1024)
+    first = add(db, big + "1")
+    add(db, big + "2")
+    assert first not in db.entries()
+    assert len(db) == 1
+
+
+def test_retention_by_age(db_file):
+    db = make_db(db_file, max_age_days=1)
+    add(db, "old")
+
+    with patch(
+        "sbdots.library.clip_db.time.time", return_value=time.time() + 2 * 86400
+    ):
+        new = add(db, "new")
+
+    assert db.entries() == [new]
+
+
+def test_search_matches_full_text_substrings(db_file):
+    db = make_db(db_file)
+    long_text = "header " + "filler " * 50 + "needle-in-the-haystack"
+    target = add(db, long_text)
+    add(db, "something else")
+
+    # Beyond the preview, case-insensitive, substring of a word
+    assert db.search("HAYSTACK") == [target]
+    assert db.search("eedl head") == [target]
+    assert db.search('"quoted" OR') == []
+
+
+def test_search_short_terms_and_limit(db_file):
+    db = make_db(db_file)
+    for i in range(5):
+        add(db, f"entry {i}")
+
+    assert [r.preview for r in db.search("y 3")] == ["entry 3"]
+    assert len(db.search("entry", limit=2)) == 2
+    assert db.search("entry")[0].preview == "entry 4"
+
+
+def test_get_by_id_prefix(db_file):
+    db = make_db(db_file)
+    record = add(db, "hello")
+    assert db.get(record.hash[:12]) == record
+    assert db.get("") is None
+
+
+def test_removed_rows_leave_the_index(db_file):
+    db = make_db(db_file, max_entries=1)
+    add(db, "unique-word")
+    add(db, "other")
+    assert db.search("unique") == []
+
+
+def test_reopen_keeps_history_and_totals(db_file):
+    db = make_db(db_file)
+    record = add(db, "persisted")
+    db.close()
+
+    db = make_db(db_file)
+    assert len(db) == 1
+    assert db.entries() == [record]
+
+
+def test_readonly_menu_without_database(tmp_path):
+    menu = ClipDBMenu(tmp_path / "missing.db")
+    assert menu.menu() == ""
+    assert menu.search("x") == []
+    assert not (tmp_path / "missing.db").exists()
+
+
+def test_readonly_menu_follows_writer(db_file):
+    db = make_db(db_file)
+    menu = ClipDBMenu(db_file)
+    record = add(db, "one")
+    assert menu.menu() == f"{record.hash[:12]}\tone\n"
+
+    other = add(db, "two")
+    assert menu.menu().splitlines()[0] == f"{other.hash[:12]}\ttwo"
+    assert menu.get(other.hash[:12]) == other
+    assert menu.search("two") == [other]
+
+
+def test_get_options_defaults_and_invalid_values():
+    values = {"backend": "sqlite", "max_entries": "abc", "max_age_days": "-3"}
+    with patch(
+        "sbdots.library.clip_db.get_config",
+        side_effect=lambda key, **_: values.get(key),
+    ):
+        options = get_options()
+
+    assert options["backend"] == "sqlite"
+    assert options["max_entries"] == 100_000
+    assert options["max_age_days"] == 0
+    assert options["max_size_mb"] == 1024
+
+
+# Entries seeded by the opt-in benchmark, i.e: SBDOTS_BENCH_ENTRIES=100000
+# for a full history
+BENCH_ENTRIES = int(os.environ.get("SBDOTS_BENCH_ENTRIES", 10_000))
+# Budgets in ms, loose enough for slow machines and CI
+ADD_P95_BUDGET = 5.0
+SEARCH_P95_BUDGET = 25.0
+
+
+def p95(func, runs: int = 100) -> float:
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func(i)
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)[int(runs * 0.95)]
+
+
+@pytest.mark.skipif(
+    "SBDOTS_BENCH_ENTRIES" not in os.environ,
+    reason="benchmark, set SBDOTS_BENCH_ENTRIES to run it",
+)
+def test_benchmark(db_file):
+    """add() and search() stay fast on a large history"""
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(5000)]
+
+    def bench_record(i: int):
+        text = f"clip {i} " + " ".join(rng.choices(words, k=rng.randint(3, 40)))
+        record, data = make_record(text)
+        return record, len(data), text
+
+    db = make_db(db_file, max_entries=0, max_age_days=0)
+    db.import_records(bench_record(i) for i in range(BENCH_ENTRIES))
+
+    def add_one(i: int) -> None:
+        record, _, text = bench_record(BENCH_ENTRIES + i)
+        db.add(record, text.encode())
+
+    assert p95(add_one) < ADD_P95_BUDGET
+    # Every entry matches: a full page of results
+    assert len(db.search("clip")) == 500
+    assert p95(lambda _: db.search("clip")) < SEARCH_P95_BUDGET
+    # Rarer terms, the index is scanned further for a page of results
+    assert p95(lambda _: db.search("word42 word43")) < SEARCH_P95_BUDGET
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from sbdots.library.clip_history import ClipHistory, read_entries
+
+
+@pytest.fixture
+def paths(tmp_path: Path):
+    return {
+        "snapshot": tmp_path / "cliphist",
+        "journal": tmp_path / "cliphist.journal",
+        "lock_file": tmp_path / "cliphist.lock",
+    }
+
+
+def make_history(paths, **kwargs) -> ClipHistory:
+    history = ClipHistory(**paths, **kwargs)
+    history.load()
+    return history
+
+
+def reader(paths, max_entries=50):
+    return read_entries(max_entries=max_entries, **paths)
+
+
+def test_add_dedupes_and_moves_to_front(paths):
+    history = make_history(paths)
+    for clip in ["a", "b", "a", "c"]:
+        history.add(clip)
+
+    assert history.entries() == ["c", "a", "b"]
+    assert reader(paths) == ["c", "a", "b"]
+
+
+def test_adds_only_append_to_journal(paths):
+    history = make_history(paths)
+    history.add("a")
+    history.add("b")
+
+    assert paths["journal"].read_text() == "a\nb\n"
+    assert paths["snapshot"].read_text() == ""
+
+
+def test_trims_to_max_entries(paths):
+    history = make_history(paths, max_entries=2)
+    for clip in ["a", "b", "c"]:
+        history.add(clip)
+
+    assert history.entries() == ["c", "b"]
+    assert reader(paths, max_entries=2) == ["c", "b"]
+
+
+def test_compaction_folds_journal_into_snapshot(paths):
+    history = make_history(paths, compact_at=3)
+    for clip in ["a", "b", "a"]:
+        history.add(clip)
+    history.close()
+
+    assert not paths["journal"].exists()
+    assert paths["snapshot"].read_text() == "b\na\n"
+    assert reader(paths) == ["a", "b"]
+
+
+def test_load_replays_leftover_journal(paths):
+    paths["snapshot"].write_text("a\nb\n")
+    paths["journal"].write_text("a\nc\n")
+
+    history = make_history(paths)
+
+    assert history.entries() == ["c", "a", "b"]
+    assert not paths["journal"].exists()
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from sbdots.library import clip_store
+from sbdots.library.clip_history import ClipHistory
+from sbdots.library.clip_query import ClipMenu, fuzzy_score
+
+
+@pytest.fixture
+def paths(tmp_path: Path):
+    return {
+        "snapshot": tmp_path / "cliphist",
+        "journal": tmp_path / "cliphist.journal",
+        "lock_file": tmp_path / "cliphist.lock",
+    }
+
+
+@pytest.fixture
+def history(paths, tmp_path):
+    history = ClipHistory(**paths)
+    history.load()
+
+    def add(text: str):
+        record = clip_store.store(
+            text.encode(), "text/plain", blob_dir=tmp_path / "blobs"
+        )
+        history.add(record.to_line())
+        return record
+
+    history.add_text = add
+    return history
+
+
+def test_fuzzy_score():
+    assert fuzzy_score("gco", "git checkout") is not None
+    assert fuzzy_score("xyz", "git checkout") is None
+    assert fuzzy_score("check git", "git checkout") is not None
+    # Consecutive and word start matches rank higher
+    assert fuzzy_score("check", "git checkout") > fuzzy_score("check", "c h e c k")
+
+
+def test_menu_is_newest_first_with_stable_ids(paths, history):
+    first = history.add_text("first")
+    second = history.add_text("second")
+
+    menu = ClipMenu(**paths).menu()
+
+    assert menu == f"{second.hash[:12]}\tsecond\n{first.hash[:12]}\tfirst\n"
+
+
+def test_menu_refreshes_when_history_changes(paths, history):
+    menu = ClipMenu(**paths)
+    history.add_text("one")
+    assert menu.menu().count("\n") == 1
+
+    history.add_text("two")
+    assert menu.menu().count("\n") == 2
+
+
+def test_search_ranks_and_narrows(paths, history):
+    history.add_text("git checkout main")
+    history.add_text("good coffee order")
+    history.add_text("unrelated")
+    menu = ClipMenu(**paths)
+
+    assert [r.preview for r in menu.search("gco")] == [
+        "good coffee order",
+        "git checkout main",
+    ]
+    assert [r.preview for r in menu.search("gcom")] == ["git checkout main"]
+    assert menu.search("") != []
+
+
+def test_get_by_id(paths, history):
+    record = history.add_text("restore me")
+
+    assert ClipMenu(**paths).get(record.hash[:12]) == record
+    assert ClipMenu(**paths).get("nope") is None
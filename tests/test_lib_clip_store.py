@@ -0,0 +1,62 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from sbdots.library import clip_store
+from sbdots.library.clip_store import ClipRecord, choose_type, make_preview
+
+
+@pytest.mark.parametrize(
+    "types, expected",
+    [
+        (
+            ["text/html", "text/plain;charset=utf-8", "UTF8_STRING"],
+            "text/plain;charset=utf-8",
+        ),
+        (["text/html", "image/png"], "image/png"),
+        (["text/html"], "text/html"),
+        (["application/x-foo"], None),
+        (["text/plain", "x-kde-passwordManagerHint"], None),
+    ],
+)
+def test_choose_type(types, expected):
+    assert choose_type(types) == expected
+
+
+def test_text_preview_is_single_line_and_truncated():
+    preview = make_preview(b"def f():\n\treturn 1\n" * 20, "text/plain", length=20)
+
+    assert preview == "def f(): return 1 d…"
+    assert "\t" not in preview and "\n" not in preview
+
+
+def test_binary_preview():
+    assert make_preview(b"\x89PNG" * 512, "image/png") == "[image/png, 2.0 KiB]"
+
+
+def test_store_is_content_addressed(tmp_path: Path):
+    data = b"line 1\nline 2\t" * 1000
+
+    record = clip_store.store(data, "text/plain", blob_dir=tmp_path)
+    again = clip_store.store(data, "text/plain", blob_dir=tmp_path)
+
+    assert record == again
+    assert record.hash == hashlib.sha256(data).hexdigest()
+    assert clip_store.load(record, blob_dir=tmp_path) == data
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_record_line_roundtrip():
+    record = ClipRecord("a" * 64, "image/png", "[image/png, 1.0 KiB]")
+
+    assert ClipRecord.from_line(record.to_line()) == record
+    assert ClipRecord.from_line("plain old clip") is None
+
+
+def test_remove_unreferenced(tmp_path: Path):
+    keep = clip_store.store(b"keep", "text/plain", blob_dir=tmp_path)
+    clip_store.store(b"drop", "text/plain", blob_dir=tmp_path)
+
+    assert clip_store.remove_unreferenced([keep], blob_dir=tmp_path) == 1
+    assert [p.name for p in tmp_path.iterdir()] == [keep.hash]
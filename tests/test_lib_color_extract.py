@@ -0,0 +1,207 @@
+import json
+import math
+import shutil
+import struct
+import subprocess
+import zlib
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from sbdots.library.color_extract import (
+    DESIRED_COLORS,
+    TARGET_CHROMA,
+    extract_source_color,
+    lab_to_rgb,
+    pick,
+    quantize,
+    rgb_to_lab,
+    score,
+)
+from sbdots.library.command.matugen import MatugenImage
+from sbdots.library.exceptions import ColorExtractionError
+from sbdots.library.palette_cache import source_color
+
+OPTIONS = {
+    "source_color_index": "0",
+    "prefer": "closest-to-fallback",
+    "fallback_color": "#ca9ee6",
+    "mode": "dark",
+    "type": "scheme-expressive",
+    "extractor": "sbdots",
+}
+
+RED = (200, 30, 40)
+BLUE = (30, 60, 200)
+GRAY = (128, 128, 128)
+
+
+def candidates(histogram: dict):
+    return score(quantize(Counter(histogram)))
+
+
+@pytest.mark.parametrize("rgb", [RED, BLUE, GRAY, (0, 0, 0), (255, 255, 255)])
+def test_lab_roundtrip(rgb):
+    assert lab_to_rgb(rgb_to_lab(*rgb)) == rgb
+
+
+def test_quantize_keeps_weights():
+    colors = quantize(Counter({RED: 70, (202, 28, 41): 10, BLUE: 20}))
+
+    assert sorted(w for _, w in colors) == [20, 80]
+
+
+def test_quantize_many_colors():
+    counts = Counter(
+        {
+            (r, g, b): 1 + r % 7
+            for r in range(0, 256, 9)
+            for g in range(0, 256, 13)
+            for b in range(0, 256, 17)
+        }
+    )
+    colors = quantize(counts)
+
+    assert len(colors) == 16
+    assert sum(w for _, w in colors) == sum(counts.values())
+
+
+def test_grayscale_image_uses_fallback():
+    assert candidates({GRAY: 100, (20, 20, 20): 50}) == []
+    assert pick([], OPTIONS) == "#ca9ee6"
+
+
+def test_dominant_color_scores_first():
+    ranked = candidates({RED: 80, BLUE: 20, GRAY: 50})
+
+    assert ranked[0].rgb == RED
+    assert {c.rgb for c in ranked} == {RED, BLUE}
+
+
+def test_chroma_weight():
+    """Chroma above the target weighs 0.3, below it 0.1, as in Material's Score"""
+    for candidate in candidates({RED: 40, BLUE: 30, (150, 120, 100): 30}):
+        weight = 0.3 if candidate.chroma >= TARGET_CHROMA else 0.1
+        assert candidate.score == pytest.approx(
+            candidate.proportion * 70 + (candidate.chroma - TARGET_CHROMA) * weight
+        )
+
+
+def test_hue_distance_is_relaxed():
+    """Hues closer than 90 degrees are kept until enough colors are found"""
+    hues = {
+        RED: 40,
+        (200, 120, 30): 20,
+        (200, 200, 30): 20,
+        (30, 180, 60): 20,
+    }
+    ranked = candidates(hues)
+
+    assert len(ranked) == DESIRED_COLORS
+    assert {c.rgb for c in ranked} == set(hues)
+
+
+def test_pick_prefer_and_index():
+    ranked = candidates({RED: 80, BLUE: 20})
+
+    assert pick(ranked, {**OPTIONS, "prefer": "closest-to-fallback"}) == "#1e3cc8"
+    assert pick(ranked, {**OPTIONS, "prefer": "lightness"}) == "#c81e28"
+    assert pick(ranked, {**OPTIONS, "prefer": "darkness"}) == "#1e3cc8"
+    assert pick(
+        ranked, {**OPTIONS, "prefer": "darkness", "source_color_index": "1"}
+    ) == ("#c81e28")
+    # Out of range indexes are clamped
+    assert pick(ranked, {**OPTIONS, "source_color_index": "9"}) == "#c81e28"
+
+
+@patch("sbdots.library.command.matugen.extract_source_color", return_value="#123456")
+def test_export_command_uses_extracted_color(_):
+    cmd = MatugenImage()._build_export_command("/wall.png", options=OPTIONS)
+
+    assert cmd[:4] == ["matugen", "color", "hex", "#123456"]
+    assert "--dry-run" in cmd
+
+
+@patch(
+    "sbdots.library.command.matugen.extract_source_color",
+    side_effect=ColorExtractionError("no gdk"),
+)
+def test_export_command_falls_back_to_matugen_image(_):
+    cmd = MatugenImage()._build_export_command("/wall.png", options=OPTIONS)
+
+    assert cmd[:3] == ["matugen", "image", "/wall.png"]
+
+
+def test_export_command_defaults_to_matugen_image():
+    options = {k: v for k, v in OPTIONS.items() if k != "extractor"}
+    cmd = MatugenImage()._build_export_command("/wall.png", options=options)
+
+    assert cmd[:2] == ["matugen", "image"]
+
+
+def test_export_command_matugen_extractor():
+    cmd = MatugenImage()._build_export_command(
+        "/wall.png", options={**OPTIONS, "extractor": "matugen"}
+    )
+
+    assert cmd[:2] == ["matugen", "image"]
+
+
+# Largest hue difference, in degrees, between the source colors of both extractors
+SOURCE_HUE_TOLERANCE = 20.0
+
+
+def write_png(path, width: int, height: int, pixel) -> None:
+    """Write an RGB png, 'pixel(x, y)' giving the color of each pixel"""
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(tag + data)
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+    rows = b"".join(
+        b"\x00" + bytes(c for x in range(width) for c in pixel(x, y))
+        for y in range(height)
+    )
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    path.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+FIXTURES = {
+    # Mostly red, with a blue band
+    "red_blue": lambda x, y: RED if y < 48 else BLUE,
+    # A teal gradient
+    "teal": lambda x, y: (20, 100 + x, 90 + y),
+    # Orange sky over a dark purple ground
+    "sunset": lambda x, y: (230, 120 + y // 2, 40) if y < 40 else (60, 30, 80),
+}
+
+
+@pytest.mark.skipif(not shutil.which("matugen"), reason="matugen is not installed")
+@pytest.mark.parametrize("fixture", sorted(FIXTURES))
+def test_source_color_agrees_with_matugen(tmp_path, fixture):
+    pytest.importorskip("gi")
+    image = tmp_path / f"{fixture}.png"
+    write_png(image, 64, 64, FIXTURES[fixture])
+    options = {**OPTIONS, "prefer": "saturation", "extractor": "matugen"}
+
+    cmd = MatugenImage()._build_export_command(image, options=options)
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    expected = source_color(json.loads(result.stdout), options["mode"])
+    extracted = extract_source_color(image, options)
+
+    difference = abs(rgb_to_lab_hue(extracted) - rgb_to_lab_hue(expected))
+    assert min(difference, 360 - difference) <= SOURCE_HUE_TOLERANCE, (
+        f"sbdots picked {extracted}, matugen {expected}"
+    )
+
+
+def rgb_to_lab_hue(value: str) -> float:
+    value = value.lstrip("#")
+    _, a, b = rgb_to_lab(*(int(value[i : i + 2], 16) for i in (0, 2, 4)))
+    return math.degrees(math.atan2(b, a)) % 360
@@ -1,7 +1,19 @@
+import asyncio
+
 import pytest
 from unittest.mock import patch, MagicMock
 
-from sbdots.library.commands import run_command
+from sbdots.library import commands
+from sbdots.library.commands import (
+    acheck_output,
+    arun_command,
+    SudoEventKind,
+    clear_executable_cache,
+    parse_output_line,
+    resolve_executable,
+    run_command,
+    stream_sudo_cmd,
+)
 from sbdots.library.exceptions import CommandNotFound
 
 
@@ -56,3 +68,156 @@ class TestCommands:
 
         result = run_command("echo hello | grep hello", shell=True)
         assert result is not None or True
+
+
+class TestResolveExecutable:
+    """Tests for the cached executable lookup"""
+
+    def setup_method(self):
+        clear_executable_cache()
+
+    def teardown_method(self):
+        clear_executable_cache()
+
+    def test_lookups_are_cached(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PATH", str(tmp_path))
+        with patch(
+            "sbdots.library.commands.which", return_value="/bin/x"
+        ) as mock_which:
+            assert resolve_executable("x") == "/bin/x"
+            assert resolve_executable("x") == "/bin/x"
+        assert mock_which.call_count == 1
+
+    def test_cache_dropped_when_path_changes(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PATH", str(tmp_path))
+        with patch("sbdots.library.commands.which", return_value=None) as mock_which:
+            resolve_executable("x")
+            monkeypatch.setenv("PATH", str(tmp_path / "other"))
+            resolve_executable("x")
+        assert mock_which.call_count == 2
+
+    def test_cache_dropped_when_directory_changes(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PATH", str(tmp_path))
+        monkeypatch.setattr(commands, "WHICH_CACHE_CHECK_SEC", 0)
+        with patch("sbdots.library.commands.which", return_value=None) as mock_which:
+            resolve_executable("x")
+            (tmp_path / "x").touch()
+            resolve_executable("x")
+        assert mock_which.call_count == 2
+
+
+class TestAsyncCommands:
+    """Tests for the asyncio based helpers"""
+
+    def test_arun_command_captures_output(self):
+        result = asyncio.run(
+            arun_command(["sh", "-c", "echo out; echo err >&2; exit 3"])
+        )
+        assert result.returncode == 3
+        assert result.stdout == "out\n"
+        assert result.stderr == "err\n"
+
+    def test_arun_command_with_shell(self):
+        result = asyncio.run(arun_command("echo hello | tr h j", shell=True))
+        assert result.stdout == "jello\n"
+
+    def test_acheck_output_raises_on_failure(self):
+        with pytest.raises(RuntimeError, match="returncode: 1"):
+            asyncio.run(acheck_output(["false"]))
+
+    def test_acheck_output_timeout(self):
+        with pytest.raises(RuntimeError, match="timed out"):
+            asyncio.run(acheck_output(["sleep", "5"], timeout=0.1))
+
+    @patch("sbdots.library.commands.which", return_value=None)
+    def test_arun_command_raises_on_missing_command(self, mock_which):
+        clear_executable_cache()
+        with pytest.raises(CommandNotFound):
+            asyncio.run(arun_command(["nonexistent_command"]))
+
+    def test_commands_run_concurrently(self):
+        async def run_all():
+            return await asyncio.gather(
+                *(acheck_output(["sleep", "0.3"]) for _ in range(3))
+            )
+
+        loop_time = asyncio.run(_timed(run_all()))
+        assert loop_time < 0.8
+
+
+class TestStreamSudoCmd:
+    """Tests for the event stream of privileged commands"""
+
+    def test_parse_output_line(self):
+        event = parse_output_line(
+            " foo-1.0-1-x86_64  3.4 MiB  2.1 MiB/s 00:02 [###---]  45%"
+        )
+        assert (event.kind, event.package, event.percent) == (
+            SudoEventKind.DOWNLOAD,
+            "foo-1.0-1-x86_64",
+            45,
+        )
+
+        event = parse_output_line("(2/5) upgrading bar  [######] 100%")
+        assert (event.kind, event.package, event.current, event.total) == (
+            SudoEventKind.INSTALLING,
+            "bar",
+            2,
+            5,
+        )
+
+        assert (
+            parse_output_line("error: target not found: baz").kind
+            is SudoEventKind.ERROR
+        )
+        assert (
+            parse_output_line("resolving dependencies...").kind is SudoEventKind.OUTPUT
+        )
+
+    def test_events_are_streamed_and_prompt_answered(self):
+        script = (
+            "printf ' foo  1 MiB [##--]  50%%\\r foo  1 MiB [####] 100%%\\n';"
+            "printf '(1/1) installing foo\\r(1/1) installing foo [#] 100%%\\n';"
+            "printf '[sudo] password for me: '; read -r pw; echo \"got $pw\"; exit 3"
+        )
+        events = list(
+            stream_sudo_cmd(["bash", "-c", script], password=lambda: "secret")
+        )
+        kinds = [e.kind for e in events]
+
+        assert kinds == [
+            SudoEventKind.DOWNLOAD,
+            SudoEventKind.DOWNLOAD,
+            SudoEventKind.INSTALLING,
+            SudoEventKind.PASSWORD_PROMPT,
+            SudoEventKind.OUTPUT,
+            SudoEventKind.EXIT,
+        ]
+        assert [e.percent for e in events[:2]] == [50, 100]
+        assert events[4].line.strip() == "got secret"
+        assert events[-1].returncode == 3
+
+    def test_gives_up_after_threshold(self):
+        script = "while true; do printf '[sudo] password for me: '; read -r pw; done"
+        events = list(
+            stream_sudo_cmd(
+                ["bash", "-c", script], password=lambda: "wrong", ask_pass_threshold=2
+            )
+        )
+        kinds = [e.kind for e in events]
+
+        assert kinds.count(SudoEventKind.PASSWORD_PROMPT) == 2
+        assert kinds[-2:] == [SudoEventKind.ERROR, SudoEventKind.EXIT]
+
+    def test_idle_timeout_kills(self):
+        events = list(stream_sudo_cmd(["sleep", "5"], idle_timeout=0.2))
+        assert events[0].kind is SudoEventKind.ERROR
+        assert events[-1].kind is SudoEventKind.EXIT
+        assert events[-1].returncode != 0
+
+
+async def _timed(coro):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await coro
+    return loop.time() - start
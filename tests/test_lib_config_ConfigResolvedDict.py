@@ -1,6 +1,17 @@
+import copy
+import pickle
+from collections.abc import Mapping
+
 import pytest
 
-from sbdots.library.configDicts import ConfigResolvedDict, _PLACEHOLDER_RE
+from sbdots.library.configDicts import (
+    ConfigResolvedDict,
+    Interpolation,
+    Reference,
+    _PLACEHOLDER_RE,
+    _parse_placeholders,
+)
+from sbdots.library.exceptions import ConfigReferenceCycle
 
 
 BASE_CONFIG = {
@@ -68,7 +79,31 @@ SUCCESS_CONFIG = {
 
 def test_resolves_successfully():
     cfg = ConfigResolvedDict(SUCCESS_CONFIG)
-    assert isinstance(cfg, dict)
+    assert isinstance(cfg, Mapping)
+
+
+def test_every_read_sees_resolved_values():
+    cfg = ConfigResolvedDict(SUCCESS_CONFIG)
+    resolved = cfg.resolved
+
+    assert resolved["http_port"] == 80
+    assert cfg == resolved
+    assert dict(cfg) == resolved
+    assert {**cfg} == resolved
+    assert dict(cfg.items()) == resolved
+    assert list(cfg.values()) == list(resolved.values())
+    assert repr(cfg) == f"ConfigResolvedDict({resolved!r})"
+    assert cfg.copy() == resolved
+    assert pickle.loads(pickle.dumps(cfg)) == resolved
+    assert copy.deepcopy(cfg) == resolved
+
+
+def test_bad_reference_is_not_a_missing_key():
+    cfg = ConfigResolvedDict({"a": {}, "value": "{a.missing}"})
+
+    assert "value" in cfg
+    with pytest.raises(KeyError):
+        cfg.get("value")
 
 
 def test_raw_is_preserved():
@@ -131,7 +166,7 @@ def test_unknown_mapping_dict_raises_key_error():
                 **BASE_CONFIG,
                 "value": "{missing.key}",
             }
-        )
+        )["value"]
 
 
 def test_missing_top_level_key_raises_key_error():
@@ -141,7 +176,7 @@ def test_missing_top_level_key_raises_key_error():
                 **BASE_CONFIG,
                 "value": "{env.nope}",
             }
-        )
+        )["value"]
 
 
 def test_missing_nested_key_raises_key_error():
@@ -151,7 +186,7 @@ def test_missing_nested_key_raises_key_error():
                 **BASE_CONFIG,
                 "value": "{env.ports.missing}",
             }
-        )
+        )["value"]
 
 
 def test_non_dict_root_raises_type_error():
@@ -161,7 +196,7 @@ def test_non_dict_root_raises_type_error():
                 "env": "not-a-dict",
                 "value": "{env.name}",
             }
-        )
+        )["value"]
 
 
 def test_non_dict_mid_path_raises_type_error():
@@ -171,4 +206,78 @@ def test_non_dict_mid_path_raises_type_error():
                 **BASE_CONFIG,
                 "value": "{env.name.value}",
             }
+        )["value"]
+
+
+def test_errors_are_raised_on_access_only():
+    cfg = ConfigResolvedDict(
+        {**BASE_CONFIG, "broken": "{missing.key}", "ok": "{env.name}"}
+    )
+    assert cfg["ok"] == "prod"
+    with pytest.raises(KeyError):
+        cfg["broken"]
+
+
+def test_chained_placeholders_resolve_transitively():
+    cfg = ConfigResolvedDict(
+        {
+            "palette": {"blue": "#89b4fa", "accent": "{palette.blue}"},
+            "ui": {"border": "{palette.accent}", "label": "border {ui.border}"},
+        }
+    )
+    assert cfg["ui"] == {"border": "#89b4fa", "label": "border #89b4fa"}
+
+
+def test_paths_descend_through_placeholders():
+    cfg = ConfigResolvedDict(
+        {
+            "base": {"ports": {"http": 80}},
+            "links": {"ports": "{base.ports}"},
+            "value": "{links.ports.http}",
+        }
+    )
+    assert cfg["value"] == 80
+
+
+def test_cycles_raise():
+    cfg = ConfigResolvedDict({"a": {"x": "{a.y}", "y": "{b.z}"}, "b": {"z": "{a.x}"}})
+    with pytest.raises(ConfigReferenceCycle, match="a.x -> a.y -> b.z -> a.x"):
+        cfg["a"]
+
+    cfg = ConfigResolvedDict({"a": {"b": {"c": "{a.b}"}}})
+    with pytest.raises(ConfigReferenceCycle):
+        cfg["a"]
+
+
+def test_resolution_is_memoized():
+    cfg = ConfigResolvedDict(SUCCESS_CONFIG)
+    assert cfg["service"] is cfg["service"]
+
+
+def test_copies_are_resolved():
+    cfg = ConfigResolvedDict(SUCCESS_CONFIG)
+    assert dict(cfg)["http_port"] == 80
+    assert {**cfg}["db_port"] == 5432
+    assert dict(cfg.items())["debug_mode"] is False
+    assert cfg.get("http_port") == 80
+    assert cfg.get("missing", "default") == "default"
+
+
+def test_defaults_fill_missing_references():
+    cfg = ConfigResolvedDict({**BASE_CONFIG, "value": "{env.missing|fallback}"})
+    assert cfg["value"] == "fallback"
+
+
+def test_placeholders_are_pre_parsed():
+    assert _parse_placeholders("{palette.accent}") == Reference("palette", ("accent",))
+    assert _parse_placeholders("fg {palette.fg} on {palette.bg|black}") == (
+        Interpolation(
+            (
+                "fg ",
+                Reference("palette", ("fg",)),
+                " on ",
+                Reference("palette", ("bg",), "black"),
+            )
         )
+    )
+    assert _parse_placeholders("text") == "text"
@@ -0,0 +1,47 @@
+import pytest
+
+from sbdots.library.configDicts import FlatView, OneLevelFlatDict
+
+
+def test_dotted_keys_in_order():
+    view = FlatView({"a": 1, "b": {"c": 2, "d": {"e": 3}}, "f": 4})
+
+    assert list(view) == ["a", "b.c", "b.d.e", "f"]
+    assert view["b.d.e"] == 3
+    assert len(view) == 4
+    assert "b.c" in view
+    assert "b" not in view
+
+
+def test_matches_one_level_flat_dict():
+    data = {"x": {"a": {"b": {"c": 1}}, "d": 2, "empty": {}}}
+    assert FlatView(data["x"]) == OneLevelFlatDict(data)["x"]
+
+
+def test_values_are_read_without_copying():
+    nested = {"a": {"b": [1]}}
+    view = FlatView(nested)
+    assert view["a.b"] is nested["a"]["b"]
+
+    nested["a"]["b"] = [2]
+    assert view["a.b"] == [2]
+
+
+def test_missing_key_raises():
+    view = FlatView({"a": {"b": 1}})
+    with pytest.raises(KeyError):
+        view["a.c"]
+    assert view.get("a.c", "default") == "default"
+
+
+def test_deep_nesting_does_not_recurse():
+    nested = leaf = {}
+    for _ in range(5000):
+        leaf["k"] = {}
+        leaf = leaf["k"]
+    leaf["v"] = 1
+
+    view = FlatView(nested)
+    (key,) = view
+    assert key.endswith(".k.v")
+    assert view[key] == 1
@@ -1,10 +1,18 @@
+import os
 import tempfile
+import threading
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
+import pytest
+
+from sbdots.library import config_utils
 from sbdots.library.config_utils import (
     get_config,
+    get_section,
+    remove_setting,
     set_config,
+    settings_transaction,
     _ensure_paths,
     _load_config,
 )
@@ -75,3 +83,106 @@ class TestConfigUtils:
 
         assert result or True
         assert mock_atomic_write.called or True
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "setting.ini"
+    monkeypatch.setattr(config_utils, "SBDOTS_CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config_utils, "SETTINGS_FILE", path)
+    config_utils.clear_config_cache()
+    yield path
+    config_utils.clear_config_cache()
+
+
+class TestSettingsCache:
+    """Tests for the parsed settings cache"""
+
+    def test_lookups_parse_the_file_once(self, settings_file):
+        settings_file.write_text("[core]\na = 1\nb = 2\n")
+
+        with patch.object(config_utils, "_load_config", wraps=_load_config) as load:
+            assert get_config("a") == "1"
+            assert get_config("b") == "2"
+            assert get_config("missing") is None
+        assert load.call_count == 1
+
+    def test_external_edits_are_picked_up(self, settings_file):
+        settings_file.write_text("[core]\na = 1\n")
+        assert get_config("a") == "1"
+
+        # Same size and inode, so only the mtime tells them apart
+        mtime = settings_file.stat().st_mtime_ns
+        settings_file.write_text("[core]\na = 2\n")
+        os.utime(settings_file, ns=(mtime + 1_000_000, mtime + 1_000_000))
+        assert get_config("a") == "2"
+
+    def test_writes_refresh_the_cache_without_a_reparse(self, settings_file):
+        assert get_config("a") is None
+        set_config("a", "1")
+
+        with patch.object(config_utils, "_load_config", wraps=_load_config) as load:
+            assert get_config("a") == "1"
+        load.assert_not_called()
+
+    def test_get_section(self, settings_file):
+        settings_file.write_text("[weather]\napi_key = abc\nlatitude = 1.5\n")
+
+        assert get_section("weather") == {"api_key": "abc", "latitude": "1.5"}
+        assert get_section("missing") == {}
+
+    def test_get_section_returns_a_copy(self, settings_file):
+        settings_file.write_text("[weather]\napi_key = abc\n")
+        get_section("weather")["api_key"] = "changed"
+        assert get_config("api_key", section="weather") == "abc"
+
+
+class TestSettingsTransaction:
+    """Tests for batched settings writes"""
+
+    def test_many_changes_one_write(self, settings_file):
+        settings_file.write_text("[weather]\nold = 1\n")
+
+        with patch.object(
+            config_utils, "_atomic_write", wraps=config_utils._atomic_write
+        ) as write:
+            with settings_transaction() as txn:
+                txn.set("api_key", "abc", section="weather")
+                txn.set("latitude", "1.5", section="weather")
+                assert txn.remove("old", section="weather")
+                assert txn.get("api_key", section="weather") == "abc"
+        assert write.call_count == 1
+
+        assert get_section("weather") == {"api_key": "abc", "latitude": "1.5"}
+
+    def test_nothing_is_written_on_error_or_no_change(self, settings_file):
+        set_config("a", "1")
+
+        with patch.object(config_utils, "_atomic_write") as write:
+            with pytest.raises(RuntimeError):
+                with settings_transaction() as txn:
+                    txn.set("a", "2")
+                    raise RuntimeError
+            with settings_transaction() as txn:
+                txn.set("a", "1")
+                assert not txn.set("a", "3", overwrite=False)
+        write.assert_not_called()
+        assert get_config("a") == "1"
+
+    def test_concurrent_writers_keep_every_change(self, settings_file):
+        def write(i):
+            set_config(f"key{i}", str(i), section="many")
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(get_section("many")) == 20
+
+    def test_remove_setting_drops_empty_sections(self, settings_file):
+        set_config("a", "1", section="gone")
+        assert remove_setting("a", section="gone")
+        assert not remove_setting("a", section="gone")
+        assert "[gone]" not in settings_file.read_text()
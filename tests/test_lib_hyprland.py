@@ -0,0 +1,107 @@
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from sbdots.library import hyprland
+from sbdots.library.template_engine import build_context
+
+
+class FakeHyprland:
+    """Records requests sent to a fake request socket and answers 'ok'."""
+
+    def __init__(self, runtime_dir: Path, instance: str):
+        path = runtime_dir / "hypr" / instance / ".socket.sock"
+        path.parent.mkdir(parents=True)
+        self.requests: list[str] = []
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(str(path))
+        self.server.listen()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            with conn:
+                req = conn.recv(65536).decode()
+                self.requests.append(req)
+                count = req.count(";") + 1 if req.startswith("[[BATCH]]") else 1
+                conn.sendall(b"ok" * count)
+
+
+@pytest.fixture
+def fake_hyprland(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setenv("HYPRLAND_INSTANCE_SIGNATURE", "test")
+    monkeypatch.setattr(hyprland, "_applied", None)
+    fake = FakeHyprland(tmp_path, "test")
+    yield fake
+    fake.server.close()
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    config = tmp_path / "hypr"
+    (config / "hyprland").mkdir(parents=True)
+    (config / "hyprland" / "general.lua").write_text(
+        "active_border = colors.outline,\ninactive_border = colors.surface,"
+    )
+    return config
+
+
+def context(outline: str, primary: str = "#000000"):
+    palette = {
+        "colors": {
+            "outline": {"default": outline},
+            "surface": {"default": "#101418"},
+            "shadow": {"default": "#000000"},
+            "primary": {"default": primary},
+        }
+    }
+    return build_context(palette, "dark")
+
+
+def test_first_apply_batches_all_keywords(fake_hyprland, config_dir):
+    hyprland.apply_colors(context("#aabbcc"), config_dir)
+
+    (req,) = fake_hyprland.requests
+    assert req.startswith("[[BATCH]]")
+    assert "keyword general:col.active_border 0xffaabbcc" in req
+    assert req.count("keyword") == len(hyprland.COLOR_KEYWORDS)
+
+
+def test_only_changed_colors_are_pushed(fake_hyprland, config_dir):
+    hyprland.apply_colors(context("#aabbcc"), config_dir)
+    hyprland.apply_colors(context("#112233"), config_dir)
+
+    req = fake_hyprland.requests[-1]
+    assert "general:col.active_border 0xff112233" in req
+    assert "general:col.nogroup_border_active 0xff112233" in req
+    assert "inactive_border" not in req
+
+
+def test_unchanged_colors_send_nothing(fake_hyprland, config_dir):
+    hyprland.apply_colors(context("#aabbcc"), config_dir)
+    hyprland.apply_colors(context("#aabbcc"), config_dir)
+
+    assert len(fake_hyprland.requests) == 1
+
+
+def test_uncovered_color_reloads(fake_hyprland, config_dir):
+    (config_dir / "hyprland" / "misc.lua").write_text("color = colors.primary")
+
+    hyprland.apply_colors(context("#aabbcc"), config_dir)
+    hyprland.apply_colors(context("#aabbcc", primary="#ffffff"), config_dir)
+
+    assert fake_hyprland.requests == ["reload", "reload"]
+
+
+def test_missing_instance_raises(monkeypatch):
+    monkeypatch.delenv("HYPRLAND_INSTANCE_SIGNATURE", raising=False)
+
+    with pytest.raises(RuntimeError):
+        hyprland.request("reload")
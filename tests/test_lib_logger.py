@@ -1,7 +1,12 @@
 import logging
+import queue
 
 from sbdots.library.logger import (
+    DroppingQueueHandler,
+    _LogWriter,
     LogLevel,
+    flush_queued_logs,
+    setup_daemon_logging,
     setup_logging,
     get_caller_logger,
 )
@@ -29,3 +34,87 @@ class TestLogger:
         """Test get_caller_logger returns a logger instance"""
         logger = get_caller_logger()
         assert isinstance(logger, logging.Logger)
+
+
+def drain(q: queue.Queue) -> list[str]:
+    records = []
+    while not q.empty():
+        _, record = q.get_nowait()
+        records.append(record.getMessage())
+    return records
+
+
+class TestQueuedLogging:
+    """Tests for the queued logging of daemons and actions"""
+
+    def test_full_queue_drops_and_reports(self):
+        """Records past the queue size are dropped, then reported once"""
+        handler = DroppingQueueHandler(queue.Queue(2), ())
+        logger = logging.getLogger("test_dropping")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            for i in range(5):
+                logger.info("record %d", i)
+            assert handler.dropped == 3
+            assert drain(handler.queue) == ["record 0", "record 1"]
+
+            logger.info("after")
+        finally:
+            logger.removeHandler(handler)
+
+        assert handler.dropped == 3
+        assert drain(handler.queue) == [
+            "Dropped 3 log record(s), the log queue was full",
+            "after",
+        ]
+
+    def test_daemon_logging_writes_in_background(self, tmp_path):
+        """Records reach the log file through the listener, lazily formatted"""
+        name = "test_daemon_queued"
+        setup_daemon_logging(name, log_dir=tmp_path)
+        logger = logging.getLogger(name)
+        (handler,) = logger.handlers
+        assert isinstance(handler, DroppingQueueHandler)
+
+        for i in range(100):
+            logger.debug("event %d", i)
+        flush_queued_logs()
+
+        lines = (tmp_path / f"{name}.log").read_text().splitlines()
+        assert len(lines) == 100
+        assert lines[-1].endswith("[DEBUG] - event 99")
+        assert handler.dropped == 0
+
+    def test_loggers_share_one_writer_thread(self, tmp_path):
+        """Every queued logger writes through the same queue, to its own file"""
+        names = ["test_shared_a", "test_shared_b"]
+        for name in names:
+            setup_daemon_logging(name, log_dir=tmp_path)
+            logging.getLogger(name).info("from %s", name)
+        flush_queued_logs()
+
+        handlers = [logging.getLogger(name).handlers[0] for name in names]
+        assert handlers[0].queue is handlers[1].queue
+        for name in names:
+            line = (tmp_path / f"{name}.log").read_text().strip()
+            assert line.endswith(f"from {name}")
+
+    def test_writer_stop_writes_queued_records(self):
+        """Stopping the writer thread writes every record queued before it"""
+        written = []
+        target = logging.Handler()
+        target.emit = lambda record: written.append(record.getMessage())
+        handler = DroppingQueueHandler(queue.Queue(3), (target,))
+
+        writer = _LogWriter(handler.queue)
+        for i in range(3):
+            handler.handle(
+                logging.makeLogRecord({"msg": f"record {i}", "levelno": logging.INFO})
+            )
+        writer.start()
+        writer.stop()
+        writer.stop()
+
+        assert written == ["record 0", "record 1", "record 2"]
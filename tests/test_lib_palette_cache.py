@@ -0,0 +1,130 @@
+import os
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from sbdots.library import palette_cache
+from sbdots.library.palette_cache import (
+    load_palette,
+    store_palette,
+    source_color,
+    iter_wallpapers,
+    pregenerate,
+)
+
+OPTIONS = {
+    "source_color_index": "0",
+    "prefer": "closest-to-fallback",
+    "fallback_color": "#ca9ee6",
+    "mode": "dark",
+    "type": "scheme-expressive",
+}
+
+PALETTE = {"colors": {"dark": {"source_color": "#4a6b8c", "primary": "#aabbcc"}}}
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path):
+    with patch.object(palette_cache, "PALETTE_CACHE_DIR", tmp_path / "palettes"):
+        yield tmp_path / "palettes"
+
+
+@pytest.fixture
+def wallpaper(tmp_path: Path) -> Path:
+    image = tmp_path / "wall.png"
+    image.write_bytes(b"not really a png")
+    return image
+
+
+def test_store_then_load_roundtrip(cache_dir, wallpaper):
+    store_palette(wallpaper, OPTIONS, PALETTE)
+
+    assert load_palette(wallpaper, OPTIONS) == PALETTE
+
+
+def test_load_missing_returns_none(cache_dir, wallpaper):
+    assert load_palette(wallpaper, OPTIONS) is None
+
+
+def test_load_is_stale_after_image_changes(cache_dir, wallpaper):
+    store_palette(wallpaper, OPTIONS, PALETTE)
+
+    wallpaper.write_bytes(b"a different image")
+    st = wallpaper.stat()
+    os.utime(wallpaper, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert load_palette(wallpaper, OPTIONS) is None
+
+
+def test_load_is_stale_after_options_change(cache_dir, wallpaper):
+    store_palette(wallpaper, OPTIONS, PALETTE)
+
+    assert load_palette(wallpaper, {**OPTIONS, "mode": "light"}) is None
+
+
+def test_load_ignores_corrupt_entry(cache_dir, wallpaper):
+    store_palette(wallpaper, OPTIONS, PALETTE)
+    for entry in cache_dir.iterdir():
+        entry.write_text("{not json")
+
+    assert load_palette(wallpaper, OPTIONS) is None
+
+
+def test_source_color_mode_first_layout():
+    assert source_color(PALETTE, "dark") == "#4a6b8c"
+
+
+def test_source_color_name_first_layout():
+    palette = {
+        "colors": {"source_color": {"dark": "#111111", "light": "#222222"}},
+    }
+
+    assert source_color(palette, "light") == "#222222"
+
+
+def test_source_color_missing_returns_none():
+    assert source_color({"colors": {}}, "dark") is None
+    assert source_color({}, "dark") is None
+
+
+def test_iter_wallpapers_filters_extensions(tmp_path: Path):
+    (tmp_path / "a.jpg").touch()
+    (tmp_path / "b.PNG").touch()
+    (tmp_path / "notes.txt").touch()
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "c.webp").touch()
+
+    names = [p.name for p in iter_wallpapers(tmp_path)]
+
+    assert names == ["a.jpg", "b.PNG", "c.webp"]
+
+
+def test_iter_wallpapers_missing_dir(tmp_path: Path):
+    assert iter_wallpapers(tmp_path / "missing") == []
+
+
+@patch("sbdots.library.palette_cache.ThreadPoolExecutor")
+@patch("sbdots.library.palette_cache.MatugenImage")
+def test_pregenerate_skips_up_to_date(mock_matugen, mock_pool, cache_dir, wallpaper):
+    mock_matugen.return_value.get_options.return_value = OPTIONS
+    store_palette(wallpaper, OPTIONS, PALETTE)
+
+    result = pregenerate(wallpaper.parent, logger=MagicMock())
+
+    assert result.skipped == [wallpaper]
+    assert result.generated == []
+    assert not mock_pool.called
+
+
+@patch("sbdots.library.palette_cache.MatugenImage")
+def test_pregenerate_runs_matugen_niced(mock_matugen, cache_dir, wallpaper):
+    mock_matugen.return_value.get_options.return_value = OPTIONS
+    mock_matugen.return_value.export_json.return_value = PALETTE
+
+    result = pregenerate(wallpaper.parent, logger=MagicMock())
+
+    assert result.generated == [wallpaper]
+    assert load_palette(wallpaper, OPTIONS) == PALETTE
+    kwargs = mock_matugen.return_value.export_json.call_args.kwargs
+    assert kwargs["niceness"] == palette_cache.PALETTE_PREGEN_NICENESS
@@ -1,6 +1,24 @@
+import os
+import signal
+import subprocess
+import sys
+import time
 from unittest.mock import patch, MagicMock
 
-from sbdots.library.procs_utils import is_running, start_proc
+import pytest
+
+from sbdots.library import procs_utils
+from sbdots.library.exceptions import ProcessNotKilled
+from sbdots.library.procs_utils import (
+    find_pids,
+    get_pid,
+    is_running,
+    kill_proc,
+    kill_proc_tree,
+    start_proc,
+    term_proc,
+    wait_pids,
+)
 
 
 class TestProcsUtils:
@@ -57,3 +75,175 @@ class TestProcsUtils:
 
         result = start_proc("echo test", disown=True)
         assert result is not None or True
+
+
+def fake_proc(root, pid, comm, argv=None, exe=None, state="S", start=100):
+    """Create /proc/<pid> with the entries the scanner reads."""
+    path = root / str(pid)
+    path.mkdir()
+    (path / "comm").write_text(comm[:15] + "\n")
+    (path / "cmdline").write_bytes("\0".join(argv or [comm]).encode() + b"\0")
+    fields = [state] + ["0"] * 18 + [str(start)]
+    (path / "stat").write_text(f"{pid} ({comm[:15]}) " + " ".join(fields) + "\n")
+    if exe:
+        os.symlink(exe, path / "exe")
+
+
+@pytest.fixture
+def proc_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(procs_utils, "PROC_DIR", str(tmp_path))
+    procs_utils.clear_pid_cache()
+    yield tmp_path
+    procs_utils.clear_pid_cache()
+
+
+class TestFindPids:
+    """Tests for the /proc scanner"""
+
+    def test_matches_comm_for_several_names_in_one_pass(self, proc_dir):
+        fake_proc(proc_dir, 10, "waybar")
+        fake_proc(proc_dir, 11, "Hypridle")
+        fake_proc(proc_dir, 12, "waybar")
+        (proc_dir / "self").mkdir()
+
+        assert find_pids(["waybar", "hypridle", "swaync"]) == {
+            "waybar": [10, 12],
+            "hypridle": [11],
+            "swaync": [],
+        }
+
+    def test_skips_zombies(self, proc_dir):
+        fake_proc(proc_dir, 10, "waybar", state="Z")
+        assert not is_running("waybar")
+
+    def test_long_names_are_confirmed_by_cmdline(self, proc_dir):
+        fake_proc(proc_dir, 10, "xdg-desktop-portal-hyprland")
+        fake_proc(proc_dir, 11, "xdg-desktop-portal-gtk")
+
+        assert find_pids(["xdg-desktop-portal-hyprland"]) == {
+            "xdg-desktop-portal-hyprland": [10]
+        }
+
+    def test_falls_back_to_exe_and_cmdline(self, proc_dir):
+        fake_proc(proc_dir, 10, "renamed", exe="/usr/bin/hyprpaper")
+        fake_proc(proc_dir, 11, "python3", argv=["my-script", "--flag"])
+
+        assert get_pid("hyprpaper") == 10
+        assert get_pid("my-script") == 11
+
+    def test_cache_is_validated_by_start_time(self, proc_dir):
+        fake_proc(proc_dir, 10, "waybar", start=100)
+        assert get_pid("waybar") == 10
+
+        # Served from the cache while the pid runs with the same start time
+        with patch.object(procs_utils, "_scan") as scan:
+            assert get_pid("waybar") == 10
+        scan.assert_not_called()
+
+        # The pid was reused by another process: scan again
+        (proc_dir / "10" / "stat").write_text(
+            "10 (other) " + " ".join(["S"] + ["0"] * 18 + ["200"]) + "\n"
+        )
+        (proc_dir / "10" / "comm").write_text("other\n")
+        (proc_dir / "10" / "cmdline").write_bytes(b"other\0")
+        fake_proc(proc_dir, 20, "waybar")
+        assert get_pid("waybar") == 20
+
+    def test_misses_are_not_cached(self, proc_dir):
+        assert not is_running("waybar")
+        fake_proc(proc_dir, 10, "waybar")
+        assert is_running("waybar")
+
+
+def spawn(code: str) -> subprocess.Popen:
+    """Start a python child that prints 'ready' once set up."""
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            code + "\nprint('ready', flush=True)\nimport time; time.sleep(30)",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdout.readline().strip() == "ready"
+    return proc
+
+
+class TestTermination:
+    """Tests for the pidfd based kill and wait helpers"""
+
+    def test_term_proc_returns_as_soon_as_the_process_exits(self):
+        proc = spawn("")
+        start = time.monotonic()
+        term_proc(proc.pid, timeout=5)
+        assert time.monotonic() - start < 1
+        assert proc.wait(timeout=1) is not None
+
+    def test_term_proc_escalates_at_the_deadline(self):
+        proc = spawn("import signal; signal.signal(signal.SIGTERM, signal.SIG_IGN)")
+        start = time.monotonic()
+        term_proc(proc.pid, timeout=0.3)
+        elapsed = time.monotonic() - start
+        assert 0.3 <= elapsed < 1.5
+        assert not psutil_exists(proc.pid)
+
+    def test_kill_proc(self):
+        proc = spawn("")
+        kill_proc(proc.pid)
+        assert not psutil_exists(proc.pid)
+
+    def test_children_are_left_to_their_owner(self):
+        proc = spawn("")
+        kill_proc(proc.pid)
+        # Not reaped behind Popen's back, so it sees the real return code
+        assert proc.wait(timeout=1) == -signal.SIGKILL
+
+    def test_missing_process_is_a_no_op(self):
+        proc = spawn("")
+        proc.kill()
+        proc.wait()
+        term_proc(proc.pid, timeout=1)
+        kill_proc(proc.pid)
+
+    def test_permission_denied_raises(self):
+        proc = spawn("")
+        try:
+            with patch(
+                "sbdots.library.procs_utils.signal.pidfd_send_signal",
+                side_effect=PermissionError,
+            ):
+                with pytest.raises(ProcessNotKilled):
+                    kill_proc(proc.pid)
+        finally:
+            proc.kill()
+            proc.wait()
+
+    def test_kill_proc_tree_waits_on_every_process(self):
+        parent = spawn(
+            "import subprocess, sys\n"
+            "kids = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']) for _ in range(2)]"
+        )
+        kids = [c.pid for c in procs_utils.psutil.Process(parent.pid).children()]
+        assert len(kids) == 2
+
+        gone, alive = kill_proc_tree(parent.pid, timeout=5)
+        assert {p.pid for p in gone} == {parent.pid, *kids}
+        assert not alive
+
+    def test_wait_pids_times_out(self):
+        proc = spawn("")
+        try:
+            start = time.monotonic()
+            assert wait_pids([proc.pid], timeout=0.1) == {proc.pid}
+            assert time.monotonic() - start < 0.5
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+def psutil_exists(pid: int) -> bool:
+    try:
+        return procs_utils.psutil.Process(pid).status() != "zombie"
+    except procs_utils.psutil.NoSuchProcess:
+        return False
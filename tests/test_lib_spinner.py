@@ -0,0 +1,86 @@
+import io
+import time
+
+import pytest
+from rich.console import Console
+
+from sbdots.library.cli_utils import console as console_mod
+from sbdots.library.cli_utils import spinner as spinner_mod
+from sbdots.library.cli_utils.spinner import SpinnerProgress
+
+
+def make_console(terminal: bool) -> Console:
+    return Console(
+        file=io.StringIO(),
+        force_terminal=terminal,
+        width=80,
+        theme=console_mod._THEME,
+    )
+
+
+@pytest.fixture
+def piped(monkeypatch):
+    console = make_console(terminal=False)
+    monkeypatch.setattr(spinner_mod, "CONSOLE", console)
+    return console
+
+
+def lines(console: Console) -> list[str]:
+    return console.file.getvalue().splitlines()
+
+
+def test_line_mode_when_not_a_terminal(piped):
+    with SpinnerProgress("Updating") as sp:
+        assert not sp.live_mode
+        sp.update_text("Resolving")
+        sp.update_text("Resolving")
+        sp.success("Done")
+
+    assert lines(piped) == ["Updating", "Resolving", "Done"]
+
+
+def test_line_mode_prints_progress_steps(piped):
+    with SpinnerProgress("Updating") as sp:
+        for percent in (0, 3, 9, 10, 55, 57, 100):
+            sp.progress("Downloading", item="foo", percent=percent)
+        sp.progress("Installing", item="foo", current=1, total=2)
+        sp.progress("Installing", item="foo", current=1, total=2)
+        sp.progress("Installing", item="bar", current=2, total=2)
+
+    assert lines(piped)[1:] == [
+        "Downloading foo 0%",
+        "Downloading foo 10%",
+        "Downloading foo 55%",
+        "Downloading foo 100%",
+        "Installing foo (1/2)",
+        "Installing bar (2/2)",
+    ]
+
+
+def test_line_mode_bytes(piped):
+    with SpinnerProgress("Fetching") as sp:
+        sp.progress(item="pkg", done_bytes=500_000, total_bytes=1_000_000)
+
+    assert lines(piped)[1] == "Fetching pkg 500.0 kB/1.0 MB 50%"
+
+
+def test_verbose_prints_nothing_but_results(piped):
+    with SpinnerProgress("Updating", verbose=True) as sp:
+        sp.update_text("Resolving")
+        sp.progress("Downloading", percent=50)
+        sp.warning("Careful")
+
+    assert lines(piped) == ["Careful"]
+
+
+def test_live_mode_stops_refresher(monkeypatch):
+    monkeypatch.setattr(spinner_mod, "CONSOLE", make_console(terminal=True))
+    with SpinnerProgress("Updating") as sp:
+        assert sp.live_mode
+        for percent in range(100):
+            sp.progress("Downloading", item="foo", percent=percent)
+        time.sleep(0.1)
+        refresher = sp._refresher
+        assert refresher.is_alive()
+
+    assert not refresher.is_alive()
@@ -0,0 +1,159 @@
+from pathlib import Path
+
+import pytest
+
+from sbdots.library.exceptions import ConfigNotFound, TemplateError
+from sbdots.library.template_engine import (
+    TemplateSpec,
+    build_context,
+    compile_template,
+    load_matugen_config,
+    render_templates,
+    write_if_changed,
+)
+
+PALETTE = {
+    "colors": {
+        "primary": {"light": "#336699", "dark": "#aabbcc", "default": "#aabbcc"},
+        "surface": {"light": "#ffffff", "dark": "#101418", "default": "#101418"},
+    },
+    "base16": {"base0b": {"default": "#00ff00"}},
+}
+
+
+@pytest.fixture
+def context():
+    return build_context(PALETTE, "dark", image="/walls/a.png")
+
+
+def render(source: str, context: dict) -> str:
+    return compile_template(source)(context)
+
+
+def test_variables(context):
+    assert render("a {{ colors.primary.default.hex }} b", context) == "a #aabbcc b"
+    assert render("{{colors.primary.light.hex_stripped}}", context) == "336699"
+    assert render("{{base16.base0b.default.hex}} {{ image }}", context) == (
+        "#00ff00 /walls/a.png"
+    )
+
+
+def test_mode_first_layout_gets_default_variant():
+    palette = {
+        "colors": {"dark": {"primary": "#aabbcc"}, "light": {"primary": "#336699"}}
+    }
+    context = build_context(palette, "light")
+
+    assert render("{{colors.primary.default.hex}}", context) == "#336699"
+
+
+def test_filters(context):
+    assert render("{{colors.surface.default.rgba | set_alpha: 0.3}}", context) == (
+        "rgba(16, 20, 24, 0.3)"
+    )
+    # Dark colors get lighter, light colors darker
+    assert (
+        render("{{colors.surface.default.hex | auto_lightness: 10}}", context)
+        > "#101418"
+    )
+    assert (
+        render("{{colors.surface.light.hex | auto_lightness: 10}}", context) < "#ffffff"
+    )
+    assert render("{{colors.primary.default.hex | saturate: 100.0, hsl}}", context) == (
+        "#77bbff"
+    )
+
+
+def test_loop_over_colors(context):
+    source = (
+        "<* for name, value in colors *>{{name}}={{value.default.hex}};<* endfor *>"
+    )
+
+    assert render(source, context) == "primary=#aabbcc;surface=#101418;"
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "{{ colors.missing.default.hex }}",
+        "{{ colors.primary.default.hex | no_such_filter }}",
+        "<* if mode *>x<* endif *>",
+        "<* for name, value in colors *>",
+    ],
+)
+def test_unsupported_raises(source, context):
+    with pytest.raises(TemplateError):
+        render(source, context)
+
+
+def test_write_if_changed(tmp_path: Path):
+    target = tmp_path / "sub" / "out.css"
+
+    assert write_if_changed(target, b"a") is True
+    assert write_if_changed(target, b"a") is False
+    assert write_if_changed(target, b"b") is True
+    assert target.read_bytes() == b"b"
+
+
+def test_write_if_changed_keeps_symlink(tmp_path: Path):
+    real = tmp_path / "real.css"
+    real.write_bytes(b"old")
+    link = tmp_path / "link.css"
+    link.symlink_to(real)
+
+    write_if_changed(link, b"new")
+
+    assert link.is_symlink()
+    assert real.read_bytes() == b"new"
+
+
+def test_render_templates_reports_changed(tmp_path: Path, context):
+    template = tmp_path / "colors.tmpl"
+    template.write_text("{{colors.primary.default.hex}}")
+    specs = [
+        TemplateSpec("a", template, tmp_path / "a.out", "hook-a"),
+        TemplateSpec("b", template, tmp_path / "b.out"),
+    ]
+    (tmp_path / "b.out").write_text("#aabbcc")
+
+    result = render_templates(specs, context)
+
+    assert [s.name for s in result.changed] == ["a"]
+    assert [s.name for s in result.unchanged] == ["b"]
+    assert (tmp_path / "a.out").read_text() == "#aabbcc"
+
+
+def test_render_templates_writes_nothing_on_error(tmp_path: Path, context):
+    good = tmp_path / "good.tmpl"
+    good.write_text("{{colors.primary.default.hex}}")
+    bad = tmp_path / "bad.tmpl"
+    bad.write_text("{{colors.nope.default.hex}}")
+    specs = [
+        TemplateSpec("good", good, tmp_path / "good.out"),
+        TemplateSpec("bad", bad, tmp_path / "bad.out"),
+    ]
+
+    with pytest.raises(TemplateError):
+        render_templates(specs, context)
+
+    assert not (tmp_path / "good.out").exists()
+
+
+def test_load_matugen_config(tmp_path: Path):
+    config = tmp_path / "config.toml"
+    config.write_text(
+        "[config]\n"
+        "[templates.kitty]\n"
+        "input_path = '~/in/kitty.conf'\n"
+        "output_path = '/out/colors.conf'\n"
+        "post_hook = 'pkill -SIGUSR1 kitty'\n"
+    )
+
+    (spec,) = load_matugen_config(config)
+
+    assert spec.name == "kitty"
+    assert spec.input_path == Path.home() / "in" / "kitty.conf"
+    assert spec.post_hook == "pkill -SIGUSR1 kitty"
+
+    with pytest.raises(ConfigNotFound):
+        load_matugen_config(tmp_path / "missing.toml")
@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sbdots.library.cli_utils import _theme_loader
+from sbdots.library.cli_utils._theme_loader import load_theme
+
+THEME = """
+[colors]
+blue = "#89b4fa"
+
+[styles]
+primary = "bold {colors.blue}"
+
+[icons]
+info = "i"
+"""
+
+
+@pytest.fixture
+def theme_files(tmp_path: Path, monkeypatch):
+    user = tmp_path / "user.toml"
+    default = tmp_path / "default.toml"
+    default.write_text(THEME)
+    monkeypatch.setattr(_theme_loader, "USER_RICH_THEME_PATH", user)
+    monkeypatch.setattr(_theme_loader, "DEFAULT_RICH_THEME_PATH", default)
+    monkeypatch.setattr(_theme_loader, "RICH_THEME_CACHE_FILE", tmp_path / "cache.json")
+    return user, default
+
+
+def no_parse():
+    return patch.object(_theme_loader, "read_rich_theme", side_effect=AssertionError)
+
+
+def test_warm_start_skips_parsing(theme_files):
+    theme, colors, icons = load_theme()
+    assert colors == {"blue": "#89b4fa"}
+    assert icons == {"info": "i"}
+
+    with no_parse():
+        theme, colors, _ = load_theme()
+    assert str(theme.styles["primary"]) == "bold #89b4fa"
+    assert colors == {"blue": "#89b4fa"}
+
+
+def test_changed_theme_files_are_reparsed(theme_files):
+    user, default = theme_files
+    load_theme()
+
+    # Same size, only the mtime differs
+    default.write_text(THEME.replace("89b4fa", "1e66f5"))
+    st = default.stat()
+    os.utime(default, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_theme()[1]["blue"] == "#1e66f5"
+
+    # A user theme appearing takes over
+    user.write_text(THEME.replace("89b4fa", "000000"))
+    assert load_theme()[1]["blue"] == "#000000"
+
+
+@pytest.mark.parametrize("content", ["not json", '{"version": 1}', "[]", ""])
+def test_corrupt_cache_falls_back(theme_files, content):
+    load_theme()
+    _theme_loader.RICH_THEME_CACHE_FILE.write_text(content)
+
+    assert load_theme()[1] == {"blue": "#89b4fa"}
+    # And the cache is rebuilt
+    with no_parse():
+        load_theme()
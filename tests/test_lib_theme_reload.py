@@ -0,0 +1,65 @@
+import signal
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sbdots.library import theme_reload
+from sbdots.library.template_engine import TemplateSpec, load_matugen_config
+from sbdots.library.theme_reload import SignalProcess, get_reloader, reload_changed
+
+MATUGEN_CONFIG = (
+    Path(__file__).parent.parent / "dotfiles" / "configs" / "matugen" / "config.toml"
+)
+
+
+def spec(name: str, post_hook=None) -> TemplateSpec:
+    return TemplateSpec(name, Path("/in"), Path(f"/out/{name}"), post_hook)
+
+
+def test_every_shipped_post_hook_has_a_reloader():
+    for template in load_matugen_config(MATUGEN_CONFIG):
+        if template.post_hook:
+            assert get_reloader(template) is not None, template.name
+
+
+@patch.object(theme_reload, "_send_signals")
+def test_signals_are_sent_in_one_pass(mock_send):
+    changed = [
+        spec("kitty", "pkill -SIGUSR1 kitty"),
+        spec("waybar", "pkill -SIGUSR2 waybar"),
+        spec("starship"),
+    ]
+
+    result = reload_changed(changed, {"mode": "dark"}, logger=MagicMock())
+
+    mock_send.assert_called_once_with(
+        {"kitty": {signal.SIGUSR1}, "waybar": {signal.SIGUSR2}}
+    )
+    assert result.reloaded == ["kitty, waybar"]
+
+
+def test_unknown_hooks_go_to_run_hook():
+    run_hook = MagicMock()
+    custom = spec("custom", "notify-send {{mode}}")
+
+    result = reload_changed([custom], {"mode": "light"}, run_hook=run_hook)
+
+    run_hook.assert_called_once_with(custom, "notify-send light")
+    assert result.reloaded == ["custom"]
+
+
+def test_failures_are_reported():
+    failing = MagicMock(side_effect=RuntimeError("boom"))
+    ok = spec("hyprland", "hyprctl reload")
+
+    with patch.dict(theme_reload.BUILTIN_RELOADERS, {"hyprctl reload": failing}):
+        result = reload_changed([ok], {"mode": "dark"}, logger=MagicMock())
+
+    assert result.failed == {"hyprland": "boom"}
+    assert result.reloaded == []
+
+
+def test_builtin_signal_mapping():
+    assert get_reloader(spec("btop", "pkill -USR2 btop || true")) == SignalProcess(
+        "btop", signal.SIGUSR2
+    )
+    assert get_reloader(spec("none")) is None
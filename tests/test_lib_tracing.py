@@ -0,0 +1,131 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from sbdots.library import tracing
+
+
+def read_trace(path: Path) -> list[dict]:
+    # The array is left open for appends, viewers accept that, json doesn't
+    return json.loads(path.read_text() + "]")
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "test.json"
+    monkeypatch.setattr(tracing, "_writer", tracing._TraceWriter(path))
+    tracing.set_enabled(True)
+    yield path
+    tracing.set_enabled(None)
+
+
+def spans(path: Path) -> list[dict]:
+    return [e for e in read_trace(path) if e["ph"] == "X"]
+
+
+def test_disabled_records_nothing(tmp_path, monkeypatch):
+    path = tmp_path / "test.json"
+    monkeypatch.setattr(tracing, "_writer", tracing._TraceWriter(path))
+    tracing.set_enabled(False)
+    try:
+        with tracing.span("noop") as info:
+            info["x"] = 1
+        tracing.run(["true"])
+    finally:
+        tracing.set_enabled(None)
+    assert not path.exists()
+
+
+def test_env_var_enables(monkeypatch):
+    monkeypatch.setenv("SBDOTS_TRACE", "1")
+    tracing.set_enabled(None)
+    assert tracing.enabled()
+    monkeypatch.setenv("SBDOTS_TRACE", "0")
+    tracing.set_enabled(None)
+    assert not tracing.enabled()
+    tracing.set_enabled(None)
+
+
+def test_nested_spans_record_parent(trace_file):
+    with tracing.span("my_action", cat="action"):
+        tracing.run(["sh", "-c", "exit 3"])
+
+    child, parent = spans(trace_file)
+    assert parent["name"] == "my_action"
+    assert parent["cat"] == "action"
+    assert child["name"] == "sh"
+    assert child["args"]["parent"] == "my_action"
+    assert child["args"]["returncode"] == 3
+    assert child["args"]["argv"] == ["sh", "-c", "exit 3"]
+    # Nested in time on the same thread, for the flame view
+    assert parent["ts"] <= child["ts"]
+    assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+    assert parent["tid"] == child["tid"]
+
+
+def test_errors_are_recorded(trace_file):
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("boom")
+
+    (event,) = spans(trace_file)
+    assert event["args"]["error"] == "ValueError: boom"
+
+
+def test_metadata_names_process_and_threads(trace_file):
+    with tracing.span("a"):
+        pass
+
+    names = {e["name"] for e in read_trace(trace_file) if e["ph"] == "M"}
+    assert names == {"process_name", "thread_name"}
+
+
+def test_rotation(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_BYTES", 300)
+    for i in range(10):
+        with tracing.span(f"span-{i}", padding="x" * 50):
+            pass
+
+    rotated = trace_file.with_suffix(".1.json")
+    assert rotated.exists()
+    # Every file is a valid trace on its own
+    assert spans(rotated)
+    assert spans(trace_file)[-1]["name"] == "span-9"
+
+
+def test_one_file_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_DIR", tmp_path)
+    monkeypatch.setattr(tracing, "_writer", None)
+
+    assert tracing._get_writer().path.name.endswith(f".{os.getpid()}.json")
+
+
+def test_old_files_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_FILES", 3)
+    for i in range(5):
+        path = tmp_path / f"old.{i}.json"
+        path.write_text("[\n")
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+
+    tracing._prune(tmp_path)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["old.3.json", "old.4.json"]
+
+
+def test_submit_keeps_parent(trace_file):
+    with tracing.span("reload", cat="action"):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                tracing.submit(pool, tracing.run, ["true"]),
+                pool.submit(tracing.run, ["true"]),
+            ]
+            for future in futures:
+                future.result()
+
+    parents = sorted(
+        str(e["args"]["parent"]) for e in spans(trace_file) if e["name"] == "true"
+    )
+    assert parents == ["None", "reload"]